@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0010_vat_rate_categories"
+down_revision = "0009_passport_drop_weight"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Reduced/zero rates apply to commodity categories identified by HS prefix.
+    op.add_column("vat_rates", sa.Column("hs_prefix", sa.String(length=10)))
+
+
+def downgrade() -> None:
+    op.drop_column("vat_rates", "hs_prefix")
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0011_list_keyset_indexes"
+down_revision = "0010_vat_rate_categories"
+branch_labels = None
+depends_on = None
+
+# Keyset pagination walks these newest-first from a (created_at, id) cursor.
+TABLES = ["shipments", "invoices", "passport_items", "licenses"]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_index(f"ix_{table}_user_created", table, ["user_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_index(f"ix_{table}_user_created", table_name=table)
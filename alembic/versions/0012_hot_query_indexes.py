@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0012_hot_query_indexes"
+down_revision = "0011_list_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+# Per-user lists are already served by the (user_id, created_at, id) indexes
+# from 0011; these cover the child-row loads and the fallback rate lookups
+# made on every calculation.
+
+
+def upgrade() -> None:
+    op.create_index("ix_shipment_items_shipment", "shipment_items", ["shipment_id", "hs_code"])
+    op.create_index("ix_invoice_items_invoice", "invoice_items", ["invoice_id"])
+    op.create_index(
+        "ix_rate_snapshots_lookup",
+        "rate_snapshots",
+        ["shipment_id", "provider", sa.text("fetched_at DESC")],
+    )
+    # request_key is only ever compared for equality; a hash index stays small
+    # regardless of how large the JSONB documents get.
+    op.create_index("ix_rate_snapshots_request_key", "rate_snapshots", ["request_key"], postgresql_using="hash")
+    op.create_index(
+        "ix_tariff_rate_overrides_lookup",
+        "tariff_rate_overrides",
+        ["destination_region", "commodity_code", "origin_country", "preference_flag"],
+        postgresql_include=["duty_rate"],
+    )
+    op.create_index(
+        "ix_eu_taric_rates_lookup",
+        "eu_taric_rates",
+        ["hs_code", "origin_country", "preference_flag"],
+        postgresql_include=["duty_rate"],
+    )
+    op.create_index("ix_vat_rates_country_type", "vat_rates", ["country", "rate_type"])
+    op.create_index(
+        "ix_vat_rates_standard",
+        "vat_rates",
+        ["country"],
+        postgresql_include=["rate"],
+        postgresql_where=sa.text("rate_type = 'standard' AND hs_prefix IS NULL"),
+    )
+    op.create_index(
+        "ix_fx_rates_daily_pair_date",
+        "fx_rates_daily",
+        ["base", "quote", "rate_date"],
+        postgresql_include=["rate"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_fx_rates_daily_pair_date", table_name="fx_rates_daily")
+    op.drop_index("ix_vat_rates_standard", table_name="vat_rates")
+    op.drop_index("ix_vat_rates_country_type", table_name="vat_rates")
+    op.drop_index("ix_eu_taric_rates_lookup", table_name="eu_taric_rates")
+    op.drop_index("ix_tariff_rate_overrides_lookup", table_name="tariff_rate_overrides")
+    op.drop_index("ix_rate_snapshots_request_key", table_name="rate_snapshots")
+    op.drop_index("ix_rate_snapshots_lookup", table_name="rate_snapshots")
+    op.drop_index("ix_invoice_items_invoice", table_name="invoice_items")
+    op.drop_index("ix_shipment_items_shipment", table_name="shipment_items")
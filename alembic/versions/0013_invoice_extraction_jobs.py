@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0013_invoice_extraction_jobs"
+down_revision = "0012_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ADD VALUE cannot run inside a transaction block on older Postgres.
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE invoicestatus ADD VALUE IF NOT EXISTS 'FAILED'")
+    op.add_column("invoices", sa.Column("extraction_attempts", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("invoices", sa.Column("extraction_error", sa.Text()))
+    op.add_column("invoices", sa.Column("extraction_available_at", sa.DateTime(timezone=True)))
+    op.create_index(
+        "ix_invoices_extraction_queue",
+        "invoices",
+        ["created_at"],
+        postgresql_where=sa.text("status = 'UPLOADED'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoices_extraction_queue", table_name="invoices")
+    op.drop_column("invoices", "extraction_available_at")
+    op.drop_column("invoices", "extraction_error")
+    op.drop_column("invoices", "extraction_attempts")
+    # Postgres doesn't support removing enum values easily; FAILED stays.
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0014_invoice_content_hash"
+down_revision = "0013_invoice_extraction_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("invoices", sa.Column("content_hash", sa.String(length=64)))
+    op.add_column("invoices", sa.Column("extraction_version", sa.String(length=128)))
+    op.create_index("ix_invoices_content_hash", "invoices", ["content_hash", "extraction_version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoices_content_hash", table_name="invoices")
+    op.drop_column("invoices", "extraction_version")
+    op.drop_column("invoices", "content_hash")
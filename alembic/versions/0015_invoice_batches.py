@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0015_invoice_batches"
+down_revision = "0014_invoice_content_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("invoices", sa.Column("batch_id", postgresql.UUID(as_uuid=True)))
+    op.add_column("invoices", sa.Column("source_filename", sa.String(length=255)))
+    op.create_index("ix_invoices_batch", "invoices", ["batch_id"], postgresql_where=sa.text("batch_id IS NOT NULL"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoices_batch", table_name="invoices")
+    op.drop_column("invoices", "source_filename")
+    op.drop_column("invoices", "batch_id")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0016_goods_description_search"
+down_revision = "0015_invoice_batches"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "goods_description",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', description)", persisted=True),
+        ),
+    )
+    op.create_index(
+        "ix_goods_description_search", "goods_description", ["search_vector"], postgresql_using="gin"
+    )
+    op.create_index(
+        "ix_goods_description_trgm",
+        "goods_description",
+        ["description"],
+        postgresql_using="gin",
+        postgresql_ops={"description": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_goods_description_trgm", table_name="goods_description")
+    op.drop_index("ix_goods_description_search", table_name="goods_description")
+    op.drop_column("goods_description", "search_vector")
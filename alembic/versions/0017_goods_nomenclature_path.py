@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0017_goods_nomenclature_path"
+down_revision = "0016_goods_description_search"
+branch_labels = None
+depends_on = None
+
+# Same statement as app.taric.hierarchy.REBUILD_PATHS_SQL, copied so the
+# migration doesn't change if the application code does.
+BACKFILL_PATHS = """
+WITH RECURSIVE tree AS (
+    SELECT g.goods_code, g.goods_code::text AS path, 1 AS depth
+    FROM goods_nomenclature g
+    WHERE g.parent_goods_code IS NULL
+       OR g.parent_goods_code = g.goods_code
+       OR NOT EXISTS (SELECT 1 FROM goods_nomenclature p WHERE p.goods_code = g.parent_goods_code)
+    UNION ALL
+    SELECT child.goods_code, tree.path || '.' || child.goods_code, tree.depth + 1
+    FROM goods_nomenclature child
+    JOIN tree ON child.parent_goods_code = tree.goods_code
+    WHERE child.goods_code <> tree.goods_code AND tree.depth < 32
+)
+UPDATE goods_nomenclature g
+SET path = tree.path
+FROM tree
+WHERE g.goods_code = tree.goods_code AND g.path IS DISTINCT FROM tree.path
+"""
+
+
+def upgrade() -> None:
+    op.add_column("goods_nomenclature", sa.Column("path", sa.Text()))
+    op.execute(BACKFILL_PATHS)
+    op.create_index("ix_goods_nomenclature_parent", "goods_nomenclature", ["parent_goods_code"])
+    op.create_index(
+        "ix_goods_nomenclature_path",
+        "goods_nomenclature",
+        ["path"],
+        postgresql_ops={"path": "text_pattern_ops"},
+    )
+    # Cached resolutions were computed from code truncations alone.
+    op.execute("DELETE FROM taric_resolved_cache")
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM taric_resolved_cache")
+    op.drop_index("ix_goods_nomenclature_path", table_name="goods_nomenclature")
+    op.drop_index("ix_goods_nomenclature_parent", table_name="goods_nomenclature")
+    op.drop_column("goods_nomenclature", "path")
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0018_invoice_content_hash_user"
+down_revision = "0017_goods_nomenclature_path"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Cached extractions are only reused within one account.
+    op.drop_index("ix_invoices_content_hash", table_name="invoices")
+    op.create_index(
+        "ix_invoices_user_content_hash", "invoices", ["user_id", "content_hash", "extraction_version"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoices_user_content_hash", table_name="invoices")
+    op.create_index("ix_invoices_content_hash", "invoices", ["content_hash", "extraction_version"])
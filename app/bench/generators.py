@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import random
+import uuid
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from app.models.enums import Direction, Incoterm, ShipmentStatus
+from app.models.shipment import Shipment
+from app.models.shipment_costs import ShipmentCosts
+from app.models.shipment_item import ShipmentItem
+
+# HS chapters run 01-97 and the CN adds 98/99, so chapter 00 never holds real
+# lines. Geographical groups, additional codes and measure ids get a BENCH
+# prefix no TARIC key uses.
+BENCH_CHAPTER = "00"
+BENCH_GEO_PREFIX = "BENCHG"
+BENCH_ADDITIONAL_CODE = ("BENCH", "BENCH")
+BENCH_ORIGINS = ["CN", "US", "IN", "VN", "TR", "BR"]
+
+
+def goods_codes(count: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    codes: set[str] = set()
+    while len(codes) < count:
+        codes.add(f"{BENCH_CHAPTER}{rng.randint(0, 99_999_999):08d}")
+    return sorted(codes)
+
+
+def make_shipment(user_id: uuid.UUID, items: int, codes: list[str], seed: int = 1) -> Shipment:
+    rng = random.Random(seed)
+    shipment = Shipment(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        direction=Direction.IMPORT_EU,
+        destination_country="DE",
+        origin_country_default="CN",
+        incoterm=Incoterm.CIF,
+        currency="EUR",
+        fx_rate_to_eur="1",
+        import_date=date.today(),
+        status=ShipmentStatus.DRAFT,
+    )
+    shipment.costs = ShipmentCosts(
+        shipment_id=shipment.id,
+        freight_amount=Decimal("250"),
+        insurance_amount=Decimal("25"),
+        brokerage_amount=Decimal("40"),
+    )
+    shipment.items = [
+        ShipmentItem(
+            id=uuid.uuid4(),
+            shipment_id=shipment.id,
+            description=f"Bench item {n}",
+            hs_code=rng.choice(codes),
+            origin_country=rng.choice(BENCH_ORIGINS),
+            quantity=Decimal(rng.randint(1, 500)),
+            unit_price=Decimal(rng.randint(1, 2_000)) / Decimal("10"),
+            weight_net_kg=Decimal(rng.randint(1, 100)),
+        )
+        for n in range(items)
+    ]
+    return shipment
+
+
+def taric_rows(
+    codes: list[str], measures: int, geo_groups: int, members_per_group: int, seed: int = 1, real_geo: bool = True
+) -> dict[str, list[dict[str, Any]]]:
+    """Synthetic TARIC rows. ``real_geo=False`` keeps measures on bench groups
+    only; the importer upserts a geo_area row for every measure geo code, so
+    workbooks must not name real countries."""
+    rng = random.Random(seed)
+    groups = [f"{BENCH_GEO_PREFIX}{n:03d}" for n in range(geo_groups)]
+    members = [
+        {"id": uuid.uuid4(), "group_geo_code": group, "member_geo_code": origin}
+        for group in groups
+        for origin in rng.sample(BENCH_ORIGINS, min(members_per_group, len(BENCH_ORIGINS)))
+    ]
+    goods = [{"goods_code": code, "parent_goods_code": code[:4], "level": 10} for code in codes]
+    goods += [{"goods_code": prefix, "parent_goods_code": None, "level": 4} for prefix in sorted({c[:4] for c in codes})]
+
+    measure_rows = []
+    expr_rows = []
+    for n in range(measures):
+        uid = f"bench-{seed}-{n}"
+        code = rng.choice(codes)
+        if rng.random() < 0.3:
+            code = code[:4]
+        geo = rng.choice(["ERGA_OMNES", *groups, *BENCH_ORIGINS] if real_geo else groups)
+        measure_type = rng.choice(["103", "103", "142", "551"])
+        measure_rows.append({"measure_uid": uid, "goods_code": code, "measure_type_code": measure_type, "geo_code": geo})
+        expr_rows.append(
+            {"id": uuid.uuid4(), "measure_uid": uid, "expression_text": f"{rng.randint(0, 20)}.0 %", "seq_no": 1}
+        )
+    return {
+        "goods": goods,
+        "geo_groups": groups,
+        "geo_members": members,
+        "measures": measure_rows,
+        "duty_expressions": expr_rows,
+    }
+
+
+def write_taric_workbooks(directory: Path, rows: dict[str, list[dict[str, Any]]]) -> tuple[Path, Path, Path]:
+    goods_path = directory / "Goods_Nomenclature_bench.xlsx"
+    measures_path = directory / "Measures_bench.xlsx"
+    add_codes_path = directory / "Add_Codes_bench.xlsx"
+    pd.DataFrame(
+        [
+            {
+                "Goods code": g["goods_code"],
+                "Parent goods code": g["parent_goods_code"],
+                "Hierarchical level": g["level"],
+                "Description": f"Bench goods {g['goods_code']}",
+            }
+            for g in rows["goods"]
+        ]
+    ).to_excel(goods_path, index=False)
+    pd.DataFrame(
+        [
+            {
+                "Measure sid": m["measure_uid"],
+                "Goods code": m["goods_code"],
+                "Measure type id": m["measure_type_code"],
+                "Geographical area id": m["geo_code"],
+            }
+            for m in rows["measures"]
+        ]
+    ).to_excel(measures_path, index=False)
+    code_type, code = BENCH_ADDITIONAL_CODE
+    pd.DataFrame([{"Additional code type id": code_type, "Additional code": code, "Description": "Bench"}]).to_excel(
+        add_codes_path, index=False
+    )
+    return goods_path, measures_path, add_codes_path
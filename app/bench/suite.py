@@ -0,0 +1,351 @@
+"""Benchmarks for the calculator, TARIC resolver, importer and provider cache paths.
+
+Runs against the Postgres/Redis configured in the environment and seeds
+synthetic data (chapter-00 goods codes, ``bench-*`` measures, ``BENCHG*``
+geographical groups, a throwaway user); exactly the rows it inserted are
+removed afterwards. The importer benchmark also rebuilds every nomenclature
+path, so the suite only runs against a disposable database: set
+``BENCH_DISPOSABLE_DATABASE=1`` and use a database whose name contains a
+``bench`` or ``test`` segment (e.g. ``landed_cost_bench``)::
+
+    BENCH_DISPOSABLE_DATABASE=1 python -m app.bench --items 10,100,1000 --measures 5000 --out bench.json
+    python -m app.bench --baseline bench.json --threshold 0.2   # exit 1 on regression
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import re
+import statistics
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.engine import make_url
+
+from app.bench.generators import BENCH_ADDITIONAL_CODE, goods_codes, make_shipment, taric_rows, write_taric_workbooks
+from app.core.config import Settings, get_settings
+from app.core.logging import configure_logging, get_logger
+from app.core.redis import redis_client
+from app.db.session import SessionLocal
+from app.models.calculation import Calculation
+from app.models.fallback_tables import FxRateDaily
+from app.models.rate_snapshot import RateSnapshot
+from app.models.shipment import Shipment
+from app.models.shipment_costs import ShipmentCosts
+from app.models.shipment_item import ShipmentItem
+from app.models.taric import (
+    AdditionalCode,
+    GeoArea,
+    GeoAreaMember,
+    GoodsDescription,
+    GoodsNomenclature,
+    Measure,
+    MeasureDutyExpression,
+    TaricResolvedCache,
+    TaricSnapshot,
+)
+from app.models.user import User
+from app.repositories.taric_repo import TaricRepository
+from app.services.calculator import CalculatorService
+from app.services.providers.base import redis_get_json, redis_set_json
+from app.services.providers.fx_ecb import FxProvider
+from app.services.taric_resolver import TaricResolver
+from app.taric.importer import import_taric_files
+
+logger = get_logger()
+
+BENCH_SOURCE_LABEL = "bench"
+# Older than any real snapshot so the bench import never becomes "latest".
+BENCH_SNAPSHOT_DATE = date(2000, 1, 1)
+BENCH_FX_PAIR = ("XAU", "XAG")
+_DISPOSABLE_DB_NAME = re.compile(r"(^|[_-])(bench|test)([_-]|$)")
+# Keeps IN lists well under the asyncpg bind parameter limit.
+_DELETE_CHUNK = 5000
+
+
+class BenchRefused(RuntimeError):
+    """The configured database is not marked as disposable."""
+
+
+def ensure_disposable_database(settings: Settings) -> None:
+    database = make_url(settings.database_url).database or ""
+    if not settings.bench_disposable_database:
+        raise BenchRefused("Refusing to run: set BENCH_DISPOSABLE_DATABASE=1 to use a disposable database")
+    if not _DISPOSABLE_DB_NAME.search(database):
+        raise BenchRefused(f"Refusing to run against database {database!r}: its name must contain 'bench' or 'test'")
+
+
+def _summary(samples: list[float]) -> dict[str, Any]:
+    ordered = sorted(samples)
+    p95_index = max(0, round(0.95 * len(ordered)) - 1)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+    }
+
+
+async def _measure(
+    fn: Callable[[], Awaitable[Any]],
+    repeat: int,
+    warmup: int,
+    before: Callable[[], Awaitable[Any]] | None = None,
+) -> dict[str, Any]:
+    samples = []
+    for n in range(warmup + repeat):
+        if before is not None:
+            await before()
+        started = time.perf_counter()
+        await fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        if n >= warmup:
+            samples.append(elapsed)
+    return _summary(samples)
+
+
+class BenchRun:
+    def __init__(self, items: list[int], measures: int, goods: int, geo_groups: int, repeat: int, warmup: int) -> None:
+        self.items = items
+        self.measures = measures
+        self.repeat = repeat
+        self.warmup = warmup
+        self.geo_groups = geo_groups
+        self.codes = goods_codes(goods)
+        self.user_id = uuid.uuid4()
+        self.shipment_ids: dict[int, uuid.UUID] = {}
+        self.rows = taric_rows(self.codes, measures, geo_groups=geo_groups, members_per_group=3)
+        # Imported through the real importer; measures stay on bench groups.
+        self.import_rows = taric_rows(self.codes, measures, geo_groups=4, members_per_group=3, seed=2, real_geo=False)
+        self.inserted = self._inserted_keys()
+
+    def _inserted_keys(self) -> dict[str, list[Any]]:
+        """Every key the run writes, so cleanup deletes those rows and nothing else."""
+        both = (self.rows, self.import_rows)
+        return {
+            "goods_codes": sorted({g["goods_code"] for rows in both for g in rows["goods"]}),
+            "measure_uids": sorted({m["measure_uid"] for rows in both for m in rows["measures"]}),
+            "geo_member_ids": [m["id"] for m in self.rows["geo_members"]],
+            # The importer creates a geo_area row for each geo code its measures use.
+            "geo_areas": sorted({m["geo_code"] for m in self.import_rows["measures"]}),
+        }
+
+    async def seed(self) -> None:
+        rows = self.rows
+        async with SessionLocal() as session:
+            session.add(User(id=self.user_id, email=f"bench-{self.user_id.hex}@example.com", hashed_password="-"))
+            await session.execute(insert(GoodsNomenclature), rows["goods"])
+            await session.execute(insert(GeoAreaMember), rows["geo_members"])
+            await session.execute(insert(Measure), rows["measures"])
+            await session.execute(insert(MeasureDutyExpression), rows["duty_expressions"])
+            await session.flush()
+            for size in self.items:
+                shipment = make_shipment(self.user_id, size, self.codes, seed=size)
+                session.add(shipment)
+                self.shipment_ids[size] = shipment.id
+            base, quote = BENCH_FX_PAIR
+            session.add(FxRateDaily(base=base, quote=quote, rate=Decimal("80"), rate_date=date.today()))
+            await session.commit()
+
+    async def cleanup(self) -> None:
+        shipment_ids = list(self.shipment_ids.values())
+        base, quote = BENCH_FX_PAIR
+        async with SessionLocal() as session:
+            await session.execute(delete(Calculation).where(Calculation.shipment_id.in_(shipment_ids)))
+            await session.execute(delete(RateSnapshot).where(RateSnapshot.shipment_id.in_(shipment_ids)))
+            await session.execute(delete(ShipmentItem).where(ShipmentItem.shipment_id.in_(shipment_ids)))
+            await session.execute(delete(ShipmentCosts).where(ShipmentCosts.shipment_id.in_(shipment_ids)))
+            await session.execute(delete(Shipment).where(Shipment.user_id == self.user_id))
+            await session.execute(delete(User).where(User.id == self.user_id))
+            keys = self.inserted
+            for chunk in _chunks(keys["measure_uids"]):
+                await session.execute(delete(MeasureDutyExpression).where(MeasureDutyExpression.measure_uid.in_(chunk)))
+                await session.execute(delete(Measure).where(Measure.measure_uid.in_(chunk)))
+            for chunk in _chunks(keys["goods_codes"]):
+                await session.execute(delete(GoodsNomenclature).where(GoodsNomenclature.goods_code.in_(chunk)))
+                await session.execute(delete(GoodsDescription).where(GoodsDescription.goods_code.in_(chunk)))
+                await session.execute(delete(TaricResolvedCache).where(TaricResolvedCache.goods_code.in_(chunk)))
+            for chunk in _chunks(keys["geo_member_ids"]):
+                await session.execute(delete(GeoAreaMember).where(GeoAreaMember.id.in_(chunk)))
+            await session.execute(delete(GeoArea).where(GeoArea.geo_code.in_(keys["geo_areas"])))
+            await session.execute(
+                delete(AdditionalCode).where(
+                    tuple_(AdditionalCode.code_type, AdditionalCode.code) == tuple_(*BENCH_ADDITIONAL_CODE)
+                )
+            )
+            await session.execute(
+                delete(TaricSnapshot).where(
+                    TaricSnapshot.source_label == BENCH_SOURCE_LABEL, TaricSnapshot.snapshot_date == BENCH_SNAPSHOT_DATE
+                )
+            )
+            await session.execute(delete(FxRateDaily).where(FxRateDaily.base == base, FxRateDaily.quote == quote))
+            await session.commit()
+        await redis_client.client.delete("bench:roundtrip")
+
+    async def _clear_resolved_cache(self) -> None:
+        async with SessionLocal() as session:
+            await session.execute(delete(TaricResolvedCache).where(TaricResolvedCache.goods_code == self.codes[0]))
+            await session.commit()
+
+    async def bench_calculate(self, size: int) -> dict[str, Any]:
+        shipment_id = self.shipment_ids[size]
+
+        async def run() -> None:
+            async with SessionLocal() as session:
+                result = await CalculatorService(session).calculate(shipment_id, self.user_id)
+                if result.status != "ok":
+                    raise RuntimeError(f"Bench calculation failed: {result.status}")
+
+        return await _measure(run, self.repeat, self.warmup)
+
+    async def bench_resolve(self, warm: bool) -> dict[str, Any]:
+        code = self.codes[0]
+
+        async def run() -> None:
+            async with SessionLocal() as session:
+                resolver = TaricResolver(TaricRepository(session))
+                await resolver.resolve_taric(code, "CN", date.today(), snapshot_date=BENCH_SNAPSHOT_DATE)
+
+        before = None if warm else self._clear_resolved_cache
+        if warm:
+            await run()
+        return await _measure(run, self.repeat, self.warmup, before=before)
+
+    async def bench_import(self) -> dict[str, Any]:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            goods_file, measures_file, add_codes_file = write_taric_workbooks(Path(tmpdir), self.import_rows)
+
+            async def run() -> None:
+                await import_taric_files(
+                    goods_file=goods_file,
+                    measures_file=measures_file,
+                    add_codes_file=add_codes_file,
+                    snapshot_date=BENCH_SNAPSHOT_DATE,
+                    source_label=BENCH_SOURCE_LABEL,
+                    force=True,
+                )
+
+            # Imports are slow and idempotent; a couple of runs is enough.
+            return await _measure(run, repeat=max(1, self.repeat // 10), warmup=0)
+
+    async def bench_redis_roundtrip(self) -> dict[str, Any]:
+        payload = {"rate": "0.85", "rate_date": date.today().isoformat()}
+
+        async def run() -> None:
+            await redis_set_json("bench:roundtrip", payload, 60)
+            await redis_get_json("bench:roundtrip")
+
+        return await _measure(run, self.repeat, self.warmup)
+
+    async def bench_fx_db_path(self) -> dict[str, Any]:
+        base, quote = BENCH_FX_PAIR
+        cache_key = f"fx:{base}:{quote}:{date.today().isoformat()}"
+
+        async def run() -> None:
+            async with SessionLocal() as session:
+                result = await FxProvider(session).get_rate(base, quote)
+                if result.source != "db":
+                    raise RuntimeError(f"Expected db path, got {result.source}")
+
+        async def evict() -> None:
+            await redis_client.client.delete(cache_key)
+
+        return await _measure(run, self.repeat, self.warmup, before=evict)
+
+    async def run(self) -> dict[str, Any]:
+        ensure_disposable_database(get_settings())
+        await self.seed()
+        results: dict[str, Any] = {}
+        try:
+            for size in self.items:
+                results[f"calculator.calculate[items={size}]"] = await self.bench_calculate(size)
+            results["taric.resolve[cold]"] = await self.bench_resolve(warm=False)
+            results["taric.resolve[warm]"] = await self.bench_resolve(warm=True)
+            results[f"taric.import[measures={self.measures}]"] = await self.bench_import()
+            results["providers.redis_roundtrip"] = await self.bench_redis_roundtrip()
+            results["providers.fx_db_path"] = await self.bench_fx_db_path()
+        finally:
+            await self.cleanup()
+        return results
+
+
+def _chunks(keys: list[Any]) -> list[list[Any]]:
+    return [keys[n : n + _DELETE_CHUNK] for n in range(0, len(keys), _DELETE_CHUNK)]
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        limit = previous["median_ms"] * (1 + threshold)
+        if current["median_ms"] > limit:
+            change = current["median_ms"] / previous["median_ms"] - 1
+            regressions.append(
+                f"{name}: median {current['median_ms']}ms vs baseline {previous['median_ms']}ms (+{change:.0%})"
+            )
+    return regressions
+
+
+def main() -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog="python -m app.bench")
+    parser.add_argument("--items", default="10,100,1000", help="Comma-separated shipment sizes")
+    parser.add_argument("--measures", type=int, default=2000)
+    parser.add_argument("--goods", type=int, default=200)
+    parser.add_argument("--geo-groups", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--out")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed median slowdown vs baseline")
+    args = parser.parse_args()
+    try:
+        ensure_disposable_database(get_settings())
+    except BenchRefused as exc:
+        parser.error(str(exc))
+
+    bench = BenchRun(
+        items=[int(n) for n in args.items.split(",") if n],
+        measures=args.measures,
+        goods=args.goods,
+        geo_groups=args.geo_groups,
+        repeat=args.repeat,
+        warmup=args.warmup,
+    )
+    results = asyncio.run(bench.run())
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "environment": get_settings().environment,
+        },
+        "results": results,
+    }
+    for name, row in results.items():
+        print(f"{name:<40}{row['median_ms']:>12.3f} ms  (p95 {row['p95_ms']:.3f}, n={row['runs']})")
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for line in regressions:
+            logger.warning("bench_regression", detail=line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,9 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.principal import Principal, principal_cache
 from app.core.security import decode_token
+from app.db import session as db_session
 from app.db.session import get_session
 from app.repositories.user_repo import UserRepository
 
@@ -17,10 +19,15 @@ async def get_db_session() -> AsyncSession:
         yield session
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    session: AsyncSession = Depends(get_db_session),
-):
+async def get_read_db_session(session: AsyncSession = Depends(get_db_session)) -> AsyncSession:
+    if db_session.ReadSessionLocal is None:
+        yield session
+        return
+    async with db_session.ReadSessionLocal() as read_session:
+        yield read_session
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
     try:
         payload = decode_token(token)
     except JWTError as exc:
@@ -33,8 +40,14 @@ async def get_current_user(
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
 
-    repo = UserRepository(session)
-    user = await repo.get_by_id(user_id)
+    principal = await principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    async with db_session.SessionLocal() as session:
+        user = await UserRepository(session).get_by_id(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    principal = Principal(id=user.id, email=user.email)
+    await principal_cache.put(user_id, principal)
+    return principal
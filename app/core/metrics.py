@@ -0,0 +1,127 @@
+"""Prometheus metrics.
+
+With several uvicorn workers, point ``PROMETHEUS_MULTIPROC_DIR`` at an empty
+directory (wiped before the workers start) and every worker writes its
+samples there; ``/metrics`` then aggregates all of them. Without it the
+endpoint serves the in-process registry.
+"""
+from __future__ import annotations
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+CALCULATION_DURATION = Histogram(
+    "calculation_duration_seconds",
+    "Time to calculate one shipment, by direction and item count bucket.",
+    ["direction", "items"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of individual upstream HTTP attempts.",
+    ["host", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+PROVIDER_RESULTS = Counter(
+    "provider_results_total",
+    "Rate lookups by provider and the source that served them.",
+    ["provider", "source"],
+)
+TARIC_CACHE = Counter(
+    "taric_resolved_cache_total",
+    "taric_resolved_cache lookups by outcome.",
+    ["outcome"],
+)
+INVOICE_EXTRACTIONS = Counter(
+    "invoice_extractions_total",
+    "Background invoice extraction attempts by outcome.",
+    ["outcome"],
+)
+INVOICE_EXTRACTOR_DURATION = Histogram(
+    "invoice_extractor_duration_seconds",
+    "Time spent in each invoice extractor backend, by document type and result (hit, miss, error).",
+    ["backend", "file_type", "result"],
+    buckets=LATENCY_BUCKETS,
+)
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_state",
+    "1 for the current state of each upstream host's circuit breaker.",
+    ["host", "state"],
+    multiprocess_mode="mostrecent",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool size plus overflow per engine.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out per engine.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+_ITEM_BUCKETS = ((1, "1"), (10, "2-10"), (100, "11-100"), (1000, "101-1000"))
+
+
+def items_bucket(count: int) -> str:
+    for upper, label in _ITEM_BUCKETS:
+        if count <= upper:
+            return label
+    return ">1000"
+
+
+def record_provider_source(provider: str, source: str) -> None:
+    PROVIDER_RESULTS.labels(provider=provider, source=source).inc()
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    pool = engine.pool
+    size = getattr(pool, "size", None)
+    overflow = getattr(pool, "_max_overflow", 0)
+    if callable(size):
+        DB_POOL_SIZE.labels(pool=name).set(size() + max(overflow, 0))
+    in_use = DB_POOL_IN_USE.labels(pool=name)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        in_use.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        in_use.dec()
+
+
+def mark_process_dead() -> None:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_latest() -> tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,121 @@
+"""Keyset pagination and sparse fieldsets for list endpoints.
+
+Lists are ordered newest first by ``(created_at, id)`` and continue from an
+opaque cursor, so every page is an index range scan on
+``(user_id, created_at, id)`` no matter how deep the client pages. The cursor
+for the next page is returned in the ``X-Next-Cursor`` header (absent on the
+last page), leaving response bodies unchanged.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import load_only
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class PageParams:
+    cursor: str | None
+    limit: int
+    fields: set[str] | None
+    created_from: date | None
+    created_to: date | None
+
+
+def page_params(
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: str | None = Query(default=None, description="Comma-separated fields to return"),
+    created_from: date | None = Query(default=None),
+    created_to: date | None = Query(default=None),
+) -> PageParams:
+    selected = {f.strip() for f in fields.split(",") if f.strip()} if fields else None
+    return PageParams(cursor=cursor, limit=limit, fields=selected, created_from=created_from, created_to=created_to)
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(row_id)}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["c"]), uuid.UUID(data["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def check_fields(params: PageParams, schema: type[BaseModel]) -> None:
+    if params.fields is None:
+        return
+    unknown = params.fields - schema.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+
+
+def keyset_page(stmt: Select, model: Any, params: PageParams, columns: Sequence[str] | None = None) -> Select:
+    """Applies the date range, cursor, ordering, limit and column projection.
+
+    One extra row is fetched so ``render_page`` can tell whether another page exists.
+    """
+    if params.created_from:
+        stmt = stmt.where(model.created_at >= datetime.combine(params.created_from, time.min, timezone.utc))
+    if params.created_to:
+        end = datetime.combine(params.created_to + timedelta(days=1), time.min, timezone.utc)
+        stmt = stmt.where(model.created_at < end)
+    if params.cursor:
+        created_at, row_id = decode_cursor(params.cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    if columns:
+        wanted = {"id", "created_at", *columns}
+        attrs = [getattr(model, name) for name in wanted if name in model.__table__.columns]
+        stmt = stmt.options(load_only(*attrs))
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(params.limit + 1)
+
+
+@lru_cache(maxsize=128)
+def _partial_schema(schema: type[BaseModel], fields: frozenset[str]) -> type[BaseModel]:
+    # Validating only the requested attributes avoids touching columns that
+    # load_only left unloaded (which would trigger a lazy load).
+    return create_model(
+        f"{schema.__name__}Partial",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
+
+
+def render_page(
+    rows: Sequence[Any],
+    schema: type[BaseModel],
+    params: PageParams,
+    wrap: str | None = None,
+) -> JSONResponse:
+    page = list(rows[: params.limit])
+    if params.fields is not None:
+        schema = _partial_schema(schema, frozenset(params.fields))
+    body: Any = [schema.model_validate(row).model_dump(mode="json") for row in page]
+    if wrap:
+        body = {wrap: body}
+    headers = {}
+    if len(rows) > params.limit and page:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(page[-1].created_at, page[-1].id)
+    return JSONResponse(content=body, headers=headers)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.redis import redis_client
+
+PRINCIPAL_REVOKED_CHANNEL = "principal:revoked"
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, as much of ``User`` as request handlers need."""
+
+    id: uuid.UUID
+    email: str
+
+    def to_json(self) -> str:
+        return json.dumps({"id": str(self.id), "email": self.email})
+
+    @classmethod
+    def from_json(cls, value: str) -> "Principal":
+        data = json.loads(value)
+        return cls(id=uuid.UUID(data["id"]), email=data["email"])
+
+
+class PrincipalCache:
+    """Two-level cache of principals keyed by token subject: a small
+    in-process LRU with a short TTL in front of a Redis entry with a longer
+    one. ``revoke`` clears both and tells other workers to drop theirs."""
+
+    def __init__(self, local_ttl_seconds: float, redis_ttl_seconds: int, max_entries: int = 10_000) -> None:
+        self.local_ttl_seconds = local_ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.max_entries = max_entries
+        self._local: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+
+    def _key(self, subject: str) -> str:
+        return f"principal:{subject}"
+
+    def get_local(self, subject: str) -> Principal | None:
+        entry = self._local.get(subject)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            self._local.pop(subject, None)
+            return None
+        self._local.move_to_end(subject)
+        return principal
+
+    def put_local(self, subject: str, principal: Principal) -> None:
+        self._local[subject] = (time.monotonic() + self.local_ttl_seconds, principal)
+        self._local.move_to_end(subject)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def drop_local(self, subject: str) -> None:
+        self._local.pop(subject, None)
+
+    async def get(self, subject: str) -> Principal | None:
+        principal = self.get_local(subject)
+        if principal is not None:
+            return principal
+        try:
+            value = await redis_client.client.get(self._key(subject))
+        except Exception:
+            return None
+        if not value:
+            return None
+        principal = Principal.from_json(value)
+        self.put_local(subject, principal)
+        return principal
+
+    async def put(self, subject: str, principal: Principal) -> None:
+        self.put_local(subject, principal)
+        try:
+            await redis_client.client.set(self._key(subject), principal.to_json(), ex=self.redis_ttl_seconds)
+        except Exception:
+            logger.warning("principal_cache_write_failed")
+
+    async def revoke(self, subject: str) -> None:
+        self.drop_local(subject)
+        try:
+            await redis_client.client.delete(self._key(subject))
+            await redis_client.client.publish(PRINCIPAL_REVOKED_CHANNEL, subject)
+        except Exception:
+            logger.warning("principal_revoke_failed", subject=subject)
+
+
+class PrincipalRevocationListener:
+    """Drops locally cached principals revoked by other workers."""
+
+    def __init__(self, cache: PrincipalCache) -> None:
+        self.cache = cache
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("principal_revocation_listen_failed")
+                await asyncio.sleep(self.cache.local_ttl_seconds)
+
+    async def _listen(self) -> None:
+        pubsub = redis_client.client.pubsub()
+        await pubsub.subscribe(PRINCIPAL_REVOKED_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self.cache.drop_local(message["data"])
+        finally:
+            await pubsub.unsubscribe(PRINCIPAL_REVOKED_CHANNEL)
+            await pubsub.aclose()
+
+
+_settings = get_settings()
+principal_cache = PrincipalCache(_settings.principal_cache_local_ttl_seconds, _settings.principal_cache_ttl_seconds)
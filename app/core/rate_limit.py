@@ -1,25 +1,120 @@
 from __future__ import annotations
 
 import time
-from collections import defaultdict, deque
-from fastapi import HTTPException, Request, status
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.core.config import get_settings
+from app.core.deps import get_current_user
+from app.core.logging import get_logger
+from app.core.principal import Principal
+from app.core.redis import redis_client
+
+logger = get_logger()
+
+# Sliding-window log: one sorted-set member per admitted request, scored by
+# its timestamp. Entries older than the window are trimmed on every call and
+# the key expires once the caller goes quiet, so idle clients cost nothing.
+# KEYS: window zset
+# ARGV: now_ms, window_ms, limit, member
+# Returns {allowed (0/1), count, oldest_ms}
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= tonumber(ARGV[3]) then
+  local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+  return {0, count, tonumber(oldest[2])}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, count + 1, 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    limit: int
+    window_seconds: int
+    # "ip" for anonymous routes, "user" to share one allowance across a user's clients
+    key: str = "ip"
+
+    @classmethod
+    def parse(cls, name: str, spec: str, key: str = "ip") -> "RateLimitPolicy":
+        limit, _, window = spec.partition("/")
+        return cls(name=name, limit=int(limit), window_seconds=int(window or 60), key=key)
+
+
+def _policies() -> dict[str, RateLimitPolicy]:
+    settings = get_settings()
+    return {
+        "auth": RateLimitPolicy.parse("auth", settings.rate_limit_auth),
+        "calculate": RateLimitPolicy.parse("calculate", settings.rate_limit_calculate, key="user"),
+        "invoice_upload": RateLimitPolicy.parse("invoice_upload", settings.rate_limit_invoice_upload, key="user"),
+        "taric_import": RateLimitPolicy.parse("taric_import", settings.rate_limit_taric_import),
+    }
 
 
 class RateLimiter:
-    def __init__(self, limit: int = 10, window_seconds: int = 60) -> None:
-        self.limit = limit
-        self.window_seconds = window_seconds
-        self.requests: defaultdict[str, deque] = defaultdict(deque)
-
-    def check(self, request: Request) -> None:
-        key = request.client.host if request.client else "unknown"
-        now = time.time()
-        window = self.requests[key]
-        while window and now - window[0] > self.window_seconds:
-            window.popleft()
-        if len(window) >= self.limit:
-            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
-        window.append(now)
-
-
-rate_limiter = RateLimiter()
+    """Distributed limiter shared by all workers through Redis. If Redis is
+    unreachable requests are let through rather than failing the API."""
+
+    def __init__(self, policy: RateLimitPolicy) -> None:
+        self.policy = policy
+
+    async def hit(self, identity: str) -> tuple[bool, float]:
+        """Returns whether the request is admitted and, if not, seconds until it would be."""
+        now_ms = int(time.time() * 1000)
+        window_ms = self.policy.window_seconds * 1000
+        try:
+            allowed, _, oldest_ms = await redis_client.client.eval(
+                _SLIDING_WINDOW_SCRIPT,
+                1,
+                f"rl:{self.policy.name}:{identity}",
+                now_ms,
+                window_ms,
+                self.policy.limit,
+                f"{now_ms}:{uuid.uuid4().hex[:8]}",
+            )
+        except Exception:
+            logger.warning("rate_limit_unavailable", policy=self.policy.name)
+            return True, 0.0
+        if allowed:
+            return True, 0.0
+        return False, max(0.0, (int(oldest_ms) + window_ms - now_ms) / 1000)
+
+    async def check(self, identity: str) -> None:
+        allowed, retry_after = await self.hit(identity)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(max(1, round(retry_after)))},
+            )
+
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(policy_name: str) -> Callable[..., Awaitable[None]]:
+    """Route dependency enforcing the named policy from ``_policies``."""
+    policy = _policies()[policy_name]
+    limiter = RateLimiter(policy)
+
+    if policy.key == "user":
+
+        async def check_user(user: Principal = Depends(get_current_user)) -> None:
+            await limiter.check(f"user:{user.id}")
+
+        return check_user
+
+    async def check_ip(request: Request) -> None:
+        await limiter.check(f"ip:{_client_ip(request)}")
+
+    return check_ip
@@ -0,0 +1,290 @@
+"""Per-request tracing for the hot paths.
+
+Spans are recorded against the trace bound to the current request through a
+contextvar, so code outside a request (workers, CLIs, tests) pays nothing.
+A finished trace is summarised in the request log line and a ``Server-Timing``
+header; slow requests log every span, and when ``OTEL_EXPORTER_OTLP_ENDPOINT``
+is set traces are shipped as OTLP/HTTP JSON to an OpenTelemetry collector.
+"""
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger()
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    kind: int = SPAN_KIND_INTERNAL
+    duration_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    _started: int = 0
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_ns / 1_000_000
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    request_id: str
+    root: Span
+    max_spans: int
+    spans: list[Span] = field(default_factory=list)
+    dropped: int = 0
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+    def totals(self) -> dict[str, tuple[int, float]]:
+        totals: dict[str, tuple[int, float]] = {}
+        for span in self.spans:
+            count, total = totals.get(span.name, (0, 0.0))
+            totals[span.name] = (count + 1, total + span.duration_ms)
+        return totals
+
+    def server_timing(self) -> str:
+        entries = [f'{name};dur={total:.1f};desc="{count}"' for name, (count, total) in self.totals().items()]
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def _new_span(name: str, parent_id: str | None, kind: int, attributes: dict[str, Any]) -> Span:
+    return Span(
+        name=name,
+        span_id=secrets.token_hex(8),
+        parent_id=parent_id,
+        start_ns=time.time_ns(),
+        kind=kind,
+        attributes=attributes,
+        _started=time.perf_counter_ns(),
+    )
+
+
+def start_trace(request_id: str, name: str, **attributes: Any) -> Trace | None:
+    settings = get_settings()
+    if not settings.tracing_enabled:
+        return None
+    root = _new_span(name, None, SPAN_KIND_SERVER, attributes)
+    trace = Trace(trace_id=secrets.token_hex(16), request_id=request_id, root=root, max_spans=settings.trace_max_spans)
+    _current_trace.set(trace)
+    _current_span.set(root)
+    return trace
+
+
+def finish_trace(trace: Trace) -> None:
+    trace.root.duration_ns = time.perf_counter_ns() - trace.root._started
+    _current_trace.set(None)
+    _current_span.set(None)
+    settings = get_settings()
+    if trace.root.duration_ms >= settings.trace_slow_request_ms:
+        logger.info(
+            "trace",
+            request_id=trace.request_id,
+            trace_id=trace.trace_id,
+            duration_ms=round(trace.root.duration_ms, 2),
+            dropped_spans=trace.dropped,
+            spans=[
+                {"name": s.name, "ms": round(s.duration_ms, 2), "offset_ms": round((s.start_ns - trace.root.start_ns) / 1e6, 2), **s.attributes}
+                for s in trace.spans
+            ],
+        )
+    if exporter is not None:
+        exporter.enqueue(trace)
+
+
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Span | None:
+    if _current_trace.get() is None:
+        return None
+    parent = _current_span.get()
+    return _new_span(name, parent.span_id if parent else None, kind, attributes)
+
+
+def end_span(span: Span | None, **attributes: Any) -> None:
+    if span is None:
+        return
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    span.duration_ns = time.perf_counter_ns() - span._started
+    span.attributes.update(attributes)
+    trace.add(span)
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Iterator[Span | None]:
+    current = start_span(name, kind, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as exc:
+        current.attributes["error"] = type(exc).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        end_span(current)
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        db_span = start_span("db", SPAN_KIND_CLIENT, statement=" ".join(statement.split())[:200])
+        if db_span is not None:
+            conn.info.setdefault("trace_spans", []).append(db_span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        pending = conn.info.get("trace_spans")
+        if pending:
+            end_span(pending.pop(), rows=cursor.rowcount)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(exception_context):
+        conn = exception_context.connection
+        pending = conn.info.get("trace_spans") if conn is not None else None
+        if pending:
+            end_span(pending.pop(), error=type(exception_context.original_exception).__name__)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(trace: Trace, span: Span) -> dict[str, Any]:
+    attributes = {**span.attributes}
+    if span is trace.root:
+        attributes["request_id"] = trace.request_id
+    payload = {
+        "traceId": trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.start_ns + span.duration_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+    }
+    if span.parent_id:
+        payload["parentSpanId"] = span.parent_id
+    return payload
+
+
+class OtlpExporter:
+    """Buffers finished traces and posts them in batches to an OTLP/HTTP
+    collector (``{endpoint}/v1/traces``). When the collector falls behind the
+    oldest traces are dropped rather than growing memory."""
+
+    def __init__(self, endpoint: str, service_name: str, interval_seconds: float, max_queue: int = 2048) -> None:
+        self.url = f"{endpoint.rstrip('/')}/v1/traces"
+        self.service_name = service_name
+        self.interval_seconds = interval_seconds
+        self._queue: deque[Trace] = deque(maxlen=max_queue)
+        self._task: asyncio.Task | None = None
+
+    def enqueue(self, trace: Trace) -> None:
+        self._queue.append(trace)
+
+    def payload(self, traces: list[Trace]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.core.tracing"},
+                            "spans": [_otlp_span(t, s) for t in traces for s in (t.root, *t.spans)],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    async def flush(self, client: httpx.AsyncClient) -> None:
+        traces = []
+        while self._queue:
+            traces.append(self._queue.popleft())
+        if not traces:
+            return
+        try:
+            response = await client.post(self.url, json=self.payload(traces))
+            response.raise_for_status()
+        except httpx.HTTPError:
+            logger.warning("trace_export_failed", traces=len(traces))
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        async with httpx.AsyncClient(timeout=5) as client:
+            await self.flush(client)
+
+    async def _run(self) -> None:
+        async with httpx.AsyncClient(timeout=5) as client:
+            while True:
+                await asyncio.sleep(self.interval_seconds)
+                await self.flush(client)
+
+
+exporter: OtlpExporter | None = None
+
+
+def configure_exporter() -> OtlpExporter | None:
+    global exporter
+    settings = get_settings()
+    if settings.tracing_enabled and settings.otel_exporter_otlp_endpoint:
+        exporter = OtlpExporter(
+            settings.otel_exporter_otlp_endpoint,
+            settings.otel_service_name,
+            settings.otel_export_interval_seconds,
+        )
+    return exporter
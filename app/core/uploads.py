@@ -0,0 +1,67 @@
+"""Streaming persistence of multipart uploads.
+
+Starlette spools each uploaded part to a temporary file while parsing the
+request. ``save_upload`` copies that file to its destination in fixed-size
+chunks on a worker thread. It hashes the data as it goes and gives up with a
+413 as soon as ``max_bytes`` is passed, so neither memory use nor the event
+loop depends on the size of the upload.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class SavedUpload:
+    path: Path
+    sha256: str
+    size: int
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _copy(source: IO[bytes], dest: Path, max_bytes: int | None) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with dest.open("wb") as out:
+        while chunk := source.read(CHUNK_SIZE):
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                raise _TooLarge
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest(), size
+
+
+async def save_stream(
+    source: IO[bytes], dest: Path, max_bytes: int | None = None, name: str | None = None
+) -> SavedUpload:
+    """Copies any readable binary stream (an upload, a zip member) to ``dest``."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        sha256, size = await run_in_threadpool(_copy, source, dest, max_bytes)
+    except _TooLarge:
+        dest.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{name or dest.name} exceeds the {max_bytes} byte upload limit",
+        ) from None
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return SavedUpload(path=dest, sha256=sha256, size=size)
+
+
+async def save_upload(file: UploadFile, dest: Path, max_bytes: int | None = None) -> SavedUpload:
+    await file.seek(0)
+    return await save_stream(file.file, dest, max_bytes, file.filename)
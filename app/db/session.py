@@ -1,15 +1,44 @@
 from __future__ import annotations
 
 from collections.abc import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import get_settings
+from app.core.metrics import instrument_pool
+from app.core.tracing import instrument_engine
 
 settings = get_settings()
 
-engine = create_async_engine(settings.database_url, pool_pre_ping=True)
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        # Recycling connections before server/proxy idle timeouts replaces a
+        # pre-ping round-trip on every checkout.
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        # Set to 0 behind pgbouncer in transaction mode.
+        connect_args={"prepared_statement_cache_size": settings.db_statement_cache_size},
+    )
+    instrument_engine(engine.sync_engine)
+    instrument_pool(engine.sync_engine, name)
+    return engine
+
+
+engine = _create_engine(settings.database_url, "primary")
 SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+# Read-only traffic (TARIC lookups, reference data, list endpoints) goes to
+# the replica when one is configured; otherwise ReadSessionLocal is None and
+# callers reuse their primary session.
+replica_engine = _create_engine(settings.database_replica_url, "replica") if settings.database_replica_url else None
+ReadSessionLocal = (
+    async_sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False) if replica_engine else None
+)
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
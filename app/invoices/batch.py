@@ -0,0 +1,125 @@
+"""Expands a multi-file invoice upload into individual documents.
+
+Plain PDF/DOCX parts are passed through; ``.zip`` parts are opened in place
+(Starlette has already spooled them to a temporary file) and each supported
+member is yielded as a readable stream, so nothing is unpacked to disk or
+memory ahead of time. ``declared_size`` totals what the batch would expand
+to, from part sizes and ZIP headers, so oversized batches are refused before
+anything is written.
+"""
+from __future__ import annotations
+
+import os
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import IO, Iterable, Iterator
+
+from fastapi import UploadFile
+
+SUPPORTED_SUFFIXES = {".pdf", ".docx"}
+
+
+@dataclass
+class BatchDocument:
+    filename: str
+    suffix: str
+    source: IO[bytes] | None = None
+    error: str | None = None
+
+
+def _skip_member(info: zipfile.ZipInfo) -> bool:
+    path = PurePosixPath(info.filename)
+    return info.is_dir() or path.name.startswith(".") or "__MACOSX" in path.parts
+
+
+def _part_size(upload: UploadFile) -> int:
+    if upload.size is not None:
+        return upload.size
+    position = upload.file.tell()
+    size = upload.file.seek(0, os.SEEK_END)
+    upload.file.seek(position)
+    return size
+
+
+def declared_size(files: Iterable[UploadFile], max_bytes: int) -> int:
+    """Uncompressed bytes the batch would store. Members over ``max_bytes``
+    are rejected individually and don't count; a member whose header
+    understates its size is still cut off by the copy."""
+    total = 0
+    for upload in files:
+        suffix = PurePosixPath(upload.filename or "").suffix.lower()
+        if suffix in SUPPORTED_SUFFIXES:
+            total += _part_size(upload)
+        elif suffix == ".zip":
+            try:
+                with zipfile.ZipFile(upload.file) as archive:
+                    total += sum(
+                        info.file_size
+                        for info in archive.infolist()
+                        if not _skip_member(info)
+                        and PurePosixPath(info.filename).suffix.lower() in SUPPORTED_SUFFIXES
+                        and info.file_size <= max_bytes
+                    )
+            except zipfile.BadZipFile:
+                continue
+    return total
+
+
+def iter_documents(files: Iterable[UploadFile], max_files: int, max_bytes: int) -> Iterator[BatchDocument]:
+    count = 0
+
+    def admit(document: BatchDocument) -> BatchDocument:
+        nonlocal count
+        if document.error is None:
+            count += 1
+            if count > max_files:
+                document.error = f"Batch limit of {max_files} files reached"
+                document.source = None
+        return document
+
+    for upload in files:
+        filename = upload.filename or ""
+        suffix = PurePosixPath(filename).suffix.lower()
+        if suffix in SUPPORTED_SUFFIXES:
+            upload.file.seek(0)
+            yield admit(BatchDocument(filename=filename, suffix=suffix, source=upload.file))
+            continue
+        if suffix != ".zip":
+            yield BatchDocument(filename=filename, suffix=suffix, error="Only PDF, DOCX or ZIP allowed")
+            continue
+        try:
+            archive = zipfile.ZipFile(upload.file)
+        except zipfile.BadZipFile:
+            yield BatchDocument(filename=filename, suffix=suffix, error="Unreadable ZIP file")
+            continue
+        with archive:
+            for info in archive.infolist():
+                if _skip_member(info):
+                    continue
+                name = f"{filename}/{info.filename}"
+                member_suffix = PurePosixPath(info.filename).suffix.lower()
+                if member_suffix not in SUPPORTED_SUFFIXES:
+                    yield BatchDocument(filename=name, suffix=member_suffix, error="Only PDF or DOCX allowed")
+                    continue
+                # The declared size is checked up front; the copy enforces it again
+                # on the actual bytes in case the header lies.
+                if info.file_size > max_bytes:
+                    yield BatchDocument(
+                        filename=name, suffix=member_suffix, error=f"Exceeds the {max_bytes} byte upload limit"
+                    )
+                    continue
+                document = admit(BatchDocument(filename=name, suffix=member_suffix))
+                if document.error is not None:
+                    yield document
+                    continue
+                try:
+                    member = archive.open(info)
+                except (RuntimeError, NotImplementedError, zipfile.BadZipFile):
+                    # Encrypted or unsupported compression.
+                    document.error = "Unreadable ZIP member"
+                    yield document
+                    continue
+                with member:
+                    document.source = member
+                    yield document
@@ -0,0 +1,113 @@
+"""Offline comparison of invoice extractor backends.
+
+Runs every PDF/DOCX in a directory through each backend and reports the hit
+rate, latency and, against a reference backend (normally ``replay`` over
+recordings made by the remote model), how many fields and items agree::
+
+    INVOICE_RECORDINGS_DIR=recordings python -m app.invoices.benchmark samples/ \\
+        --backends template,replay --reference replay --out extractors.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.logging import configure_logging
+from app.invoices.batch import SUPPORTED_SUFFIXES
+from app.invoices.extractors import BACKENDS, ExtractionDocument
+from app.invoices.preprocess import INVOICE_FIELDS
+
+_COMPARED_ITEM_FIELDS = ("description", "hs_code", "quantity", "total_price")
+
+
+def _same(left: Any, right: Any) -> bool:
+    if left is None or right is None:
+        return left is right
+    try:
+        return float(left) == float(right)
+    except (TypeError, ValueError):
+        return " ".join(str(left).split()).casefold() == " ".join(str(right).split()).casefold()
+
+
+def agreement(result: dict[str, Any], reference: dict[str, Any]) -> float:
+    """Share of header fields and item cells that match the reference extraction."""
+    pairs = [(result.get(name), reference.get(name)) for name in INVOICE_FIELDS]
+    items, expected = result.get("items") or [], reference.get("items") or []
+    for index, want in enumerate(expected):
+        got = items[index] if index < len(items) else {}
+        pairs.extend((got.get(name), want.get(name)) for name in _COMPARED_ITEM_FIELDS)
+    # Extra items the reference doesn't have count against the result.
+    pairs.extend(("extra", None) for _ in items[len(expected):])
+    return sum(_same(a, b) for a, b in pairs) / len(pairs)
+
+
+async def run(paths: list[Path], backends: list[str], reference: str | None) -> dict[str, Any]:
+    references: dict[Path, dict[str, Any] | None] = {}
+    if reference:
+        for path in paths:
+            references[path] = await BACKENDS[reference].extract(
+                ExtractionDocument(path=path, file_type=path.suffix.lstrip(".").lower())
+            )
+
+    report = {}
+    for name in backends:
+        backend = BACKENDS[name]
+        timings, scores, hits, errors = [], [], 0, 0
+        for path in paths:
+            document = ExtractionDocument(path=path, file_type=path.suffix.lstrip(".").lower())
+            started = time.perf_counter()
+            try:
+                extracted = await backend.extract(document)
+            except Exception:
+                extracted = None
+                errors += 1
+            timings.append((time.perf_counter() - started) * 1000)
+            if extracted is None:
+                continue
+            hits += 1
+            expected = references.get(path)
+            if expected is not None and name != reference:
+                scores.append(agreement(extracted, expected))
+        report[name] = {
+            "documents": len(paths),
+            "hits": hits,
+            "errors": errors,
+            "median_ms": round(statistics.median(timings), 3) if timings else None,
+            "total_s": round(sum(timings) / 1000, 3),
+            "agreement": round(statistics.mean(scores), 4) if scores else None,
+        }
+    return report
+
+
+def main() -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog="python -m app.invoices.benchmark")
+    parser.add_argument("directory", help="Directory of PDF/DOCX invoices")
+    parser.add_argument("--backends", default="template,replay", help="Comma-separated backends to run")
+    parser.add_argument("--reference", default="replay", help="Backend treated as ground truth; empty to skip")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    backends = [name for name in args.backends.split(",") if name]
+    unknown = [name for name in backends + [args.reference] if name and name not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backend(s): {', '.join(unknown)}")
+    paths = sorted(p for p in Path(args.directory).rglob("*") if p.suffix.lower() in SUPPORTED_SUFFIXES)
+    report = asyncio.run(run(paths, backends, args.reference or None))
+    for name, row in report.items():
+        score = "-" if row["agreement"] is None else f"{row['agreement']:.1%}"
+        print(
+            f"{name:<12}{row['hits']:>6}/{row['documents']:<6}{row['median_ms'] or 0:>10.1f} ms  "
+            f"agreement {score}  errors {row['errors']}"
+        )
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Materialises a calculable shipment from an extracted invoice."""
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.enums import Direction, Incoterm
+from app.models.invoice import Invoice
+from app.models.shipment import Shipment
+from app.models.shipment_costs import ShipmentCosts
+from app.services.item_import import ItemImportResult, import_items
+
+
+class InvoiceConversionError(ValueError):
+    pass
+
+
+@dataclass
+class InvoiceConversion:
+    shipment: Shipment
+    items: ItemImportResult
+
+
+def invoice_item_rows(invoice: Invoice) -> list[dict[str, Any]]:
+    """Invoice lines as ``import_items`` rows; the line total becomes the goods value."""
+    return [
+        {
+            "description": item.description or None,
+            "hs_code": item.hs_code,
+            "origin_country": item.origin_country,
+            "passport_item_id": str(item.passport_item_id) if item.passport_item_id else None,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "goods_value": item.total_price,
+            "weight_net_kg": item.net_weight,
+        }
+        for item in invoice.items
+    ]
+
+
+def _default_origin(invoice: Invoice) -> str | None:
+    origins = Counter(item.origin_country.upper() for item in invoice.items if item.origin_country)
+    return origins.most_common(1)[0][0] if origins else None
+
+
+async def convert_invoice(
+    session: AsyncSession,
+    invoice: Invoice,
+    user_id: uuid.UUID,
+    direction: Direction,
+    max_rows: int,
+    destination_country: str | None = None,
+    origin_country_default: str | None = None,
+    incoterm: Incoterm | None = None,
+    currency: str | None = None,
+    import_date: date | None = None,
+    skip_invalid: bool = False,
+) -> InvoiceConversion:
+    """Adds a shipment, its costs and all invoice lines as items, and links the
+    invoice to it, without committing. Header values not given fall back to
+    the invoice. When lines fail validation (and ``skip_invalid`` is not set)
+    no items are inserted and the caller should roll back."""
+    origin = origin_country_default or _default_origin(invoice)
+    if not origin:
+        raise InvoiceConversionError("origin_country_default is required: no invoice line has an origin")
+    currency = currency or invoice.currency
+    if not currency:
+        raise InvoiceConversionError("currency is required: the invoice has none")
+    if incoterm is None:
+        try:
+            incoterm = Incoterm(invoice.incoterm)
+        except ValueError as exc:
+            raise InvoiceConversionError("incoterm is required: the invoice has none or an unknown one") from exc
+
+    shipment = Shipment(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        direction=direction,
+        destination_country=destination_country,
+        origin_country_default=origin.upper(),
+        incoterm=incoterm,
+        currency=currency.upper(),
+        import_date=import_date or invoice.invoice_date,
+    )
+    session.add(shipment)
+    session.add(
+        ShipmentCosts(
+            shipment_id=shipment.id,
+            freight_amount=invoice.freight,
+            insurance_amount=invoice.insurance,
+            notes=f"From invoice {invoice.invoice_number}" if invoice.invoice_number else None,
+        )
+    )
+    # The items INSERT references the shipment row, so it has to exist first.
+    await session.flush()
+    items = await import_items(
+        session, shipment, user_id, invoice_item_rows(invoice), max_rows, skip_invalid=skip_invalid, commit=False
+    )
+    if not items.errors or skip_invalid:
+        invoice.shipment_id = shipment.id
+    return InvoiceConversion(shipment=shipment, items=items)
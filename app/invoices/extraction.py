@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any
+
+from sqlalchemy import case, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.invoices.openai_extractor import _normalize_decimal, _parse_date
+from app.models.invoice import Invoice, InvoiceItem, InvoiceStatus
+
+
+def normalize_currency(value: str | None) -> str | None:
+    if not value:
+        return None
+    val = value.strip().upper()
+    symbols = {
+        "£": "GBP",
+        "€": "EUR",
+        "$": "USD",
+    }
+    if val in symbols:
+        return symbols[val]
+    if val in {"GBP", "EUR", "USD"}:
+        return val
+    for symbol, code in symbols.items():
+        if symbol in val:
+            return code
+    alpha = "".join(ch for ch in val if ch.isalpha())
+    if len(alpha) >= 3:
+        return alpha[:3]
+    return None
+
+
+def normalize_incoterm(value: str | None) -> str | None:
+    if not value:
+        return None
+    val = value.strip().upper()
+    known = {"EXW", "FOB", "CIF", "DDP", "FCA", "CPT", "CIP", "DAP"}
+    for term in known:
+        if term in val:
+            return term
+    # fallback to first 3-4 chars
+    alpha = "".join(ch for ch in val if ch.isalpha())
+    return alpha[:4] if len(alpha) >= 4 else (alpha or None)
+
+
+async def find_cached_extraction(
+    session: AsyncSession, user_id: uuid.UUID, content_hash: str, versions: list[str]
+) -> tuple[dict[str, Any], str] | None:
+    """Returns a stored extraction of the same document, and its version, made
+    by one of the given extractor versions, if any; when several exist, the
+    one from the backend earliest in ``versions`` wins. Only the user's own
+    invoices are considered, so the upload response never reveals whether
+    another account holds the document."""
+    if not versions:
+        return None
+    preference = case({version: position for position, version in enumerate(versions)}, value=Invoice.extraction_version)
+    result = await session.execute(
+        select(Invoice.extracted_payload, Invoice.extraction_version)
+        .where(
+            Invoice.user_id == user_id,
+            Invoice.content_hash == content_hash,
+            Invoice.extraction_version.in_(versions),
+            Invoice.extracted_payload.is_not(None),
+        )
+        .order_by(preference)
+        .limit(1)
+    )
+    row = result.one_or_none()
+    return (row[0], row[1]) if row else None
+
+
+def apply_extraction(session: AsyncSession, invoice: Invoice, extracted: dict[str, Any], version: str) -> None:
+    """Copies an extractor result onto ``invoice``, adds its items and marks it EXTRACTED."""
+    invoice.invoice_number = extracted.get("invoice_number")
+    invoice.invoice_date = _parse_date(extracted.get("invoice_date"))
+    invoice.supplier_name = extracted.get("supplier_name")
+    invoice.buyer_name = extracted.get("buyer_name")
+    invoice.buyer_address = extracted.get("buyer_address")
+    invoice.seller_address = extracted.get("seller_address")
+    invoice.buyer_eori = extracted.get("buyer_eori")
+    invoice.seller_eori = extracted.get("seller_eori")
+    invoice.incoterm = normalize_incoterm(extracted.get("incoterm"))
+    invoice.currency = normalize_currency(extracted.get("currency"))
+    invoice.subtotal = _normalize_decimal(extracted.get("subtotal"))
+    invoice.freight = _normalize_decimal(extracted.get("freight"))
+    invoice.insurance = _normalize_decimal(extracted.get("insurance"))
+    invoice.tax_total = _normalize_decimal(extracted.get("tax_total"))
+    invoice.total = _normalize_decimal(extracted.get("total"))
+    invoice.extracted_payload = extracted
+    invoice.extraction_version = version
+    invoice.extraction_error = None
+    invoice.extraction_available_at = None
+    invoice.status = InvoiceStatus.EXTRACTED
+
+    for item in extracted.get("items", []):
+        session.add(
+            InvoiceItem(
+                invoice_id=invoice.id,
+                description=item.get("description", ""),
+                hs_code=item.get("hs_code"),
+                origin_country=item.get("origin_country"),
+                vat_code=item.get("vat_code"),
+                pack_count=_normalize_decimal(item.get("pack_count")),
+                pack_type=item.get("pack_type"),
+                net_weight=_normalize_decimal(item.get("net_weight")),
+                gross_weight=_normalize_decimal(item.get("gross_weight")),
+                quantity=_normalize_decimal(item.get("quantity")),
+                unit_price=_normalize_decimal(item.get("unit_price")),
+                total_price=_normalize_decimal(item.get("total_price")),
+            )
+        )
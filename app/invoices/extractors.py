@@ -0,0 +1,204 @@
+"""Invoice extractor backends.
+
+A backend turns a stored document into the dict ``apply_extraction``
+consumes, or returns None when it cannot handle the document so the next
+backend in the chain is tried. Chains are configured per document type
+(``INVOICE_EXTRACTORS_PDF`` / ``INVOICE_EXTRACTORS_DOCX``):
+
+``template``
+    Local supplier templates (``INVOICE_TEMPLATES_PATH``), no network.
+``openai``
+    The remote model. With ``INVOICE_RECORDINGS_DIR`` set, every response is
+    also recorded there under the document's sha256.
+``replay``
+    Serves those recordings, for offline runs and benchmarks
+    (``python -m app.invoices.benchmark``).
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+from app.core.metrics import INVOICE_EXTRACTOR_DURATION
+from app.invoices import openai_extractor, preprocess
+
+_UNLOADED = object()
+
+
+@dataclass
+class ExtractionDocument:
+    path: Path
+    file_type: str
+    content_hash: str | None = None
+    _content: Any = field(default=_UNLOADED, repr=False)
+
+    async def content(self) -> preprocess.DocumentContent | None:
+        """The pre-processed text and tables, loaded once and shared by every backend."""
+        if self._content is _UNLOADED:
+            self._content = await asyncio.to_thread(preprocess.load_document, self.path, self.file_type)
+        return self._content
+
+    def sha256(self) -> str:
+        if self.content_hash is None:
+            digest = hashlib.sha256()
+            with open(self.path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            self.content_hash = digest.hexdigest()
+        return self.content_hash
+
+
+class InvoiceExtractor(abc.ABC):
+    name: str
+    # Remote backends are paced by the worker's provider rate limiter.
+    remote = False
+
+    @abc.abstractmethod
+    def version(self) -> str:
+        """Stored with each result; cached extractions are only reused for the same value."""
+
+    @abc.abstractmethod
+    async def extract(self, document: ExtractionDocument) -> dict[str, Any] | None:
+        """The extraction, or None to let the next backend in the chain try."""
+
+
+class TemplateExtractor(InvoiceExtractor):
+    name = "template"
+
+    def version(self) -> str:
+        fingerprint = preprocess.templates_fingerprint(get_settings().invoice_templates_path)
+        return f"template:{fingerprint}:v{preprocess.TEMPLATE_VERSION}"
+
+    async def extract(self, document: ExtractionDocument) -> dict[str, Any] | None:
+        templates = preprocess.load_templates(get_settings().invoice_templates_path)
+        if not templates:
+            return None
+        content = await document.content()
+        if content is None:
+            return None
+        return preprocess.match_template(content, templates)
+
+
+class OpenAIExtractor(InvoiceExtractor):
+    name = "openai"
+    remote = True
+
+    def version(self) -> str:
+        return openai_extractor.extraction_version()
+
+    async def extract(self, document: ExtractionDocument) -> dict[str, Any] | None:
+        content = await document.content()
+        extracted = await openai_extractor.extract_invoice(document.path, content)
+        await asyncio.to_thread(record_response, document, extracted)
+        return extracted
+
+
+class ReplayExtractor(InvoiceExtractor):
+    name = "replay"
+
+    def version(self) -> str:
+        return f"replay:{recordings_fingerprint(get_settings().invoice_recordings_dir)}"
+
+    async def extract(self, document: ExtractionDocument) -> dict[str, Any] | None:
+        directory = get_settings().invoice_recordings_dir
+        if not directory:
+            return None
+        return await asyncio.to_thread(load_recording, Path(directory), document)
+
+
+def load_recording(directory: Path, document: ExtractionDocument) -> dict[str, Any] | None:
+    path = directory / f"{document.sha256()}.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=8)
+def _recordings_fingerprint(directory: str, modified_ns: int) -> str:
+    digest = hashlib.sha256()
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if entry.name.endswith(".json"):
+            stat = entry.stat()
+            digest.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def recordings_fingerprint(directory: str | None) -> str:
+    """Short hash of the recordings, so replaced recordings don't reuse old
+    results. Recomputed only when the directory's mtime moves, which every
+    recording renamed into place by ``record_response`` does."""
+    if not directory or not os.path.isdir(directory):
+        return "none"
+    return _recordings_fingerprint(directory, os.stat(directory).st_mtime_ns)
+
+
+def record_response(document: ExtractionDocument, extracted: dict[str, Any]) -> None:
+    directory = get_settings().invoice_recordings_dir
+    if not directory:
+        return
+    target = Path(directory) / f"{document.sha256()}.json"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix(".part")
+    partial.write_text(json.dumps(extracted, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(partial, target)
+
+
+BACKENDS: dict[str, InvoiceExtractor] = {
+    backend.name: backend for backend in (TemplateExtractor(), OpenAIExtractor(), ReplayExtractor())
+}
+
+
+def extractor_chain(file_type: str) -> list[InvoiceExtractor]:
+    settings = get_settings()
+    spec = settings.invoice_extractors_pdf if file_type == "pdf" else settings.invoice_extractors_docx
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown invoice extractor(s): {', '.join(unknown)}")
+    return [BACKENDS[name] for name in names]
+
+
+def extraction_versions(file_type: str) -> list[str]:
+    """Versions whose stored results are acceptable for this document type."""
+    return [backend.version() for backend in extractor_chain(file_type)]
+
+
+async def run_backend(backend: InvoiceExtractor, document: ExtractionDocument) -> dict[str, Any] | None:
+    started = time.perf_counter()
+    result = "error"
+    try:
+        extracted = await backend.extract(document)
+        result = "miss" if extracted is None else "hit"
+        return extracted
+    finally:
+        INVOICE_EXTRACTOR_DURATION.labels(
+            backend=backend.name, file_type=document.file_type, result=result
+        ).observe(time.perf_counter() - started)
+
+
+async def extract_invoice(
+    file_path: Path,
+    file_type: str,
+    content_hash: str | None = None,
+    before_remote: Callable[[], Awaitable[None]] | None = None,
+) -> tuple[dict[str, Any], str]:
+    """Runs the document through its backend chain and returns the first
+    result with the version of the backend that produced it."""
+    document = ExtractionDocument(path=file_path, file_type=file_type, content_hash=content_hash)
+    for backend in extractor_chain(file_type):
+        if backend.remote and before_remote is not None:
+            await before_remote()
+        extracted = await run_backend(backend, document)
+        if extracted is not None:
+            return extracted, backend.version()
+    raise RuntimeError("No invoice extractor produced a result for this document")
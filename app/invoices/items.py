@@ -0,0 +1,147 @@
+"""Set-based edits of invoice line items.
+
+Changes are diffed against the stored rows so only lines that actually
+change are written: one DELETE for removed lines, one bulk UPDATE by primary
+key for edited lines and one multi-row INSERT for new ones.
+"""
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.invoice import InvoiceItem
+from app.models.passport import PassportItem
+
+ITEM_FIELDS = (
+    "passport_item_id",
+    "description",
+    "hs_code",
+    "origin_country",
+    "vat_code",
+    "pack_count",
+    "pack_type",
+    "net_weight",
+    "gross_weight",
+    "quantity",
+    "unit_price",
+    "total_price",
+)
+
+
+class InvoiceItemError(ValueError):
+    pass
+
+
+@dataclass
+class ItemChanges:
+    created: list[uuid.UUID] = field(default_factory=list)
+    updated: list[uuid.UUID] = field(default_factory=list)
+    deleted: list[uuid.UUID] = field(default_factory=list)
+
+    @property
+    def changed(self) -> list[uuid.UUID]:
+        return self.created + self.updated
+
+
+async def _load_passports(
+    session: AsyncSession, user_id: uuid.UUID, items: list[dict[str, Any]]
+) -> dict[uuid.UUID, PassportItem]:
+    ids = {item["passport_item_id"] for item in items if item.get("passport_item_id")}
+    if not ids:
+        return {}
+    result = await session.execute(select(PassportItem).where(PassportItem.user_id == user_id, PassportItem.id.in_(ids)))
+    return {passport.id: passport for passport in result.scalars()}
+
+
+def _with_passport_defaults(values: dict[str, Any], passports: dict[uuid.UUID, PassportItem]) -> dict[str, Any]:
+    passport_id = values.get("passport_item_id")
+    if passport_id:
+        passport = passports.get(passport_id)
+        if passport is None:
+            raise InvoiceItemError(f"Passport item {passport_id} not found")
+        if not values.get("description"):
+            values["description"] = passport.name
+        if not values.get("hs_code"):
+            values["hs_code"] = passport.hs_code
+    if "description" in values and values["description"] is None:
+        values["description"] = ""
+    return values
+
+
+async def apply_item_changes(
+    session: AsyncSession,
+    invoice_id: uuid.UUID,
+    user_id: uuid.UUID,
+    items: list[dict[str, Any]],
+    delete_ids: Iterable[uuid.UUID] = (),
+    replace: bool = False,
+) -> ItemChanges:
+    """Applies item edits to an invoice the caller has already authorised.
+
+    Entries with an ``id`` update that line and only the keys present are
+    changed; entries without one are inserted. With ``replace`` the entries
+    describe the whole list: omitted fields are cleared and lines not listed
+    are deleted, as a full PUT of the items would. Nothing is committed.
+    """
+    delete_ids = set(delete_ids)
+    referenced = {item["id"] for item in items if item.get("id")}
+    if referenced & delete_ids:
+        raise InvoiceItemError("An item cannot be both updated and deleted")
+
+    query = select(InvoiceItem.id, *(getattr(InvoiceItem, name) for name in ITEM_FIELDS)).where(
+        InvoiceItem.invoice_id == invoice_id
+    )
+    if not replace:
+        query = query.where(InvoiceItem.id.in_(referenced | delete_ids))
+    existing = {}
+    if replace or referenced or delete_ids:
+        existing = {row.id: row._mapping for row in (await session.execute(query))}
+    unknown = (referenced | delete_ids) - existing.keys()
+    if unknown:
+        raise InvoiceItemError(f"Unknown item id(s): {', '.join(sorted(str(i) for i in unknown))}")
+
+    passports = await _load_passports(session, user_id, items)
+    changes = ItemChanges()
+    inserts: list[dict[str, Any]] = []
+    updates: list[dict[str, Any]] = []
+    for item in items:
+        item_id = item.get("id")
+        if item_id is None:
+            values = _with_passport_defaults({name: item.get(name) for name in ITEM_FIELDS}, passports)
+            values.update(id=uuid.uuid4(), invoice_id=invoice_id)
+            inserts.append(values)
+            changes.created.append(values["id"])
+            continue
+        if replace:
+            values = {name: item.get(name) for name in ITEM_FIELDS}
+        else:
+            values = {name: item[name] for name in ITEM_FIELDS if name in item}
+        values = _with_passport_defaults(values, passports)
+        stored = existing[item_id]
+        changed = {name: value for name, value in values.items() if stored[name] != value}
+        if changed:
+            updates.append({"id": item_id, **changed})
+            changes.updated.append(item_id)
+
+    if replace:
+        delete_ids = existing.keys() - referenced
+    changes.deleted = sorted(delete_ids)
+
+    if changes.deleted:
+        await session.execute(
+            delete(InvoiceItem)
+            .where(InvoiceItem.invoice_id == invoice_id, InvoiceItem.id.in_(changes.deleted))
+            .execution_options(synchronize_session=False)
+        )
+    if updates:
+        # A list of parameter dicts with primary keys is an ORM bulk UPDATE by
+        # primary key: rows sharing the same changed columns go out as one executemany.
+        await session.execute(update(InvoiceItem), updates)
+    if inserts:
+        await session.execute(insert(InvoiceItem), inserts)
+    return changes
@@ -1,3 +1,4 @@
+"""Remote extraction through the OpenAI Responses API."""
 from __future__ import annotations
 
 import json
@@ -7,16 +8,17 @@ from pathlib import Path
 from typing import Any
 
 import httpx
-from docx import Document
 
 from app.core.config import get_settings
+from app.invoices import preprocess
 
+# Bump when the schema, prompt or pre-processing changes so cached extractions are not reused.
+SCHEMA_VERSION = 2
 
 
-
-def _docx_to_text(path: Path) -> str:
-    doc = Document(path)
-    return "\n".join([p.text for p in doc.paragraphs if p.text])
+def extraction_version() -> str:
+    """Identifies what produced an extraction; results are only reused for the same value."""
+    return f"openai:{get_settings().openai_model}:v{SCHEMA_VERSION}"
 
 
 def _normalize_decimal(value: Any) -> Decimal | None:
@@ -37,153 +39,134 @@ def _parse_date(value: Any) -> date | None:
         return None
 
 
-async def extract_invoice(file_path: Path, file_type: str) -> dict[str, Any]:
-    settings = get_settings()
-    if not settings.openai_api_key:
-        raise RuntimeError("OPENAI_API_KEY is not configured")
-
-    headers = {
-        "Authorization": f"Bearer {settings.openai_api_key}",
-        "Content-Type": "application/json",
-    }
-
-    schema = {
-        "type": "object",
-        "properties": {
-            "invoice_number": {"type": ["string", "null"]},
-            "invoice_date": {"type": ["string", "null"], "description": "ISO date"},
-            "supplier_name": {"type": ["string", "null"]},
-            "buyer_name": {"type": ["string", "null"]},
-            "buyer_address": {"type": ["string", "null"]},
-            "seller_address": {"type": ["string", "null"]},
-            "buyer_eori": {"type": ["string", "null"]},
-            "seller_eori": {"type": ["string", "null"]},
-            "incoterm": {"type": ["string", "null"]},
-            "currency": {"type": ["string", "null"]},
-            "subtotal": {"type": ["number", "string", "null"]},
-            "freight": {"type": ["number", "string", "null"]},
-            "insurance": {"type": ["number", "string", "null"]},
-            "tax_total": {"type": ["number", "string", "null"]},
-            "total": {"type": ["number", "string", "null"]},
+INVOICE_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "invoice_number": {"type": ["string", "null"]},
+        "invoice_date": {"type": ["string", "null"], "description": "ISO date"},
+        "supplier_name": {"type": ["string", "null"]},
+        "buyer_name": {"type": ["string", "null"]},
+        "buyer_address": {"type": ["string", "null"]},
+        "seller_address": {"type": ["string", "null"]},
+        "buyer_eori": {"type": ["string", "null"]},
+        "seller_eori": {"type": ["string", "null"]},
+        "incoterm": {"type": ["string", "null"]},
+        "currency": {"type": ["string", "null"]},
+        "subtotal": {"type": ["number", "string", "null"]},
+        "freight": {"type": ["number", "string", "null"]},
+        "insurance": {"type": ["number", "string", "null"]},
+        "tax_total": {"type": ["number", "string", "null"]},
+        "total": {"type": ["number", "string", "null"]},
+        "items": {
+            "type": "array",
             "items": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "description": {"type": "string"},
-                        "hs_code": {"type": ["string", "null"]},
-                        "origin_country": {"type": ["string", "null"]},
-                        "vat_code": {"type": ["string", "null"]},
-                        "pack_count": {"type": ["number", "string", "null"]},
-                        "pack_type": {"type": ["string", "null"]},
-                        "net_weight": {"type": ["number", "string", "null"]},
-                        "gross_weight": {"type": ["number", "string", "null"]},
-                        "quantity": {"type": ["number", "string", "null"]},
-                        "unit_price": {"type": ["number", "string", "null"]},
-                        "total_price": {"type": ["number", "string", "null"]},
-                    },
-                    "required": [
-                        "description",
-                        "hs_code",
-                        "origin_country",
-                        "vat_code",
-                        "pack_count",
-                        "pack_type",
-                        "net_weight",
-                        "gross_weight",
-                        "quantity",
-                        "unit_price",
-                        "total_price",
-                    ],
-                    "additionalProperties": False,
+                "type": "object",
+                "properties": {
+                    "description": {"type": "string"},
+                    "hs_code": {"type": ["string", "null"]},
+                    "origin_country": {"type": ["string", "null"]},
+                    "vat_code": {"type": ["string", "null"]},
+                    "pack_count": {"type": ["number", "string", "null"]},
+                    "pack_type": {"type": ["string", "null"]},
+                    "net_weight": {"type": ["number", "string", "null"]},
+                    "gross_weight": {"type": ["number", "string", "null"]},
+                    "quantity": {"type": ["number", "string", "null"]},
+                    "unit_price": {"type": ["number", "string", "null"]},
+                    "total_price": {"type": ["number", "string", "null"]},
                 },
+                "required": [
+                    "description",
+                    "hs_code",
+                    "origin_country",
+                    "vat_code",
+                    "pack_count",
+                    "pack_type",
+                    "net_weight",
+                    "gross_weight",
+                    "quantity",
+                    "unit_price",
+                    "total_price",
+                ],
+                "additionalProperties": False,
             },
         },
-        "required": [
-            "invoice_number",
-            "invoice_date",
-            "supplier_name",
-            "buyer_name",
-            "buyer_address",
-            "seller_address",
-            "buyer_eori",
-            "seller_eori",
-            "incoterm",
-            "currency",
-            "subtotal",
-            "freight",
-            "insurance",
-            "tax_total",
-            "total",
-            "items",
+    },
+    "required": [
+        "invoice_number",
+        "invoice_date",
+        "supplier_name",
+        "buyer_name",
+        "buyer_address",
+        "seller_address",
+        "buyer_eori",
+        "seller_eori",
+        "incoterm",
+        "currency",
+        "subtotal",
+        "freight",
+        "insurance",
+        "tax_total",
+        "total",
+        "items",
+    ],
+    "additionalProperties": False,
+}
+
+PROMPT = (
+    "Extract invoice data from the provided document. The invoice may be in any language. "
+    "Return JSON matching the provided schema. Use ISO dates and numbers. "
+    "If a field is missing, return null. JSON only."
+)
+
+
+def _payload(model: str, document_part: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "model": model,
+        "input": [
+            {
+                "role": "user",
+                "content": [{"type": "input_text", "text": PROMPT}, document_part],
+            }
         ],
-        "additionalProperties": False,
+        "text": {
+            "format": {
+                "type": "json_schema",
+                "name": "invoice_extract",
+                "schema": INVOICE_SCHEMA,
+                "strict": True,
+            }
+        },
     }
 
-    prompt = (
-        "Extract invoice data from the provided document. The invoice may be in any language. "
-        "Return JSON matching the provided schema. Use ISO dates and numbers. "
-        "If a field is missing, return null. JSON only."
-    )
 
+async def extract_invoice(file_path: Path, content: preprocess.DocumentContent | None) -> dict[str, Any]:
+    """Extracts with the remote model. ``content`` is the locally pre-processed
+    document; when it is None (scanned PDFs) the file itself is uploaded."""
+    settings = get_settings()
+    if not settings.openai_api_key:
+        raise RuntimeError("OPENAI_API_KEY is not configured")
+
+    base_url = settings.openai_api_base.rstrip("/")
+    headers = {"Authorization": f"Bearer {settings.openai_api_key}"}
     async with httpx.AsyncClient(timeout=60) as client:
-        if file_type == "pdf":
+        if content is None:
+            # No text layer (scanned PDF): the model has to read the file itself.
             with open(file_path, "rb") as f:
                 upload_resp = await client.post(
-                    "https://api.openai.com/v1/files",
-                    headers={"Authorization": f"Bearer {settings.openai_api_key}"},
+                    f"{base_url}/files",
+                    headers=headers,
                     files={"file": (file_path.name, f, "application/pdf")},
                     data={"purpose": "user_data"},
                 )
             upload_resp.raise_for_status()
-            file_id = upload_resp.json()["id"]
-            payload = {
-                "model": settings.openai_model,
-                "input": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "input_text", "text": prompt},
-                            {"type": "input_file", "file_id": file_id},
-                        ],
-                    }
-                ],
-                "text": {
-                    "format": {
-                        "type": "json_schema",
-                        "name": "invoice_extract",
-                        "schema": schema,
-                        "strict": True,
-                    }
-                },
-            }
+            document_part = {"type": "input_file", "file_id": upload_resp.json()["id"]}
         else:
-            text = _docx_to_text(file_path)
-            payload = {
-                "model": settings.openai_model,
-                "input": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "input_text", "text": prompt},
-                            {"type": "input_text", "text": text},
-                        ],
-                    }
-                ],
-                "text": {
-                    "format": {
-                        "type": "json_schema",
-                        "name": "invoice_extract",
-                        "schema": schema,
-                        "strict": True,
-                    }
-                },
-            }
+            document_part = {"type": "input_text", "text": preprocess.compact_text(content)}
 
         response = await client.post(
-            "https://api.openai.com/v1/responses",
+            f"{base_url}/responses",
             headers=headers,
-            json=payload,
+            json=_payload(settings.openai_model, document_part),
         )
         try:
             response.raise_for_status()
@@ -191,8 +174,7 @@ async def extract_invoice(file_path: Path, file_type: str) -> dict[str, Any]:
             raise RuntimeError(f"OpenAI error {response.status_code}: {response.text}") from exc
         data = response.json()
         output_text = _extract_output_text(data)
-        extracted = json.loads(output_text)
-        return extracted
+        return json.loads(output_text)
 
 
 def _extract_output_text(data: dict) -> str:
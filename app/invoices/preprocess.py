@@ -0,0 +1,337 @@
+"""Local pre-processing of invoice documents before extraction.
+
+Text and tables are pulled out of the document here so the remote extractor
+gets a compact plain-text rendering instead of the whole file, with the
+line-item table kept as tab-separated rows. Documents from suppliers with a
+registered template (``INVOICE_TEMPLATES_PATH``) are extracted entirely
+locally and never reach the remote API.
+
+A template file is a JSON list of objects like::
+
+    {
+      "name": "acme",
+      "match": ["ACME Trading GmbH", "DE123456789"],
+      "fields": {"invoice_number": "Invoice No\\.?\\s*(\\S+)", "invoice_date": "Date:\\s*(\\d{4}-\\d{2}-\\d{2})"},
+      "values": {"supplier_name": "ACME Trading GmbH", "currency": "EUR", "incoterm": "FCA"},
+      "columns": {"art_description": "description"}
+    }
+
+``match`` patterns must all be found in the document, tables included;
+``fields`` are regexes whose first group is the value; ``columns`` adds header
+aliases for the item table. Amounts are read with the decimal separator the
+document uses, unless the template sets ``"decimal": ","`` or ``"."``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from docx import Document
+from pypdf import PdfReader
+
+# Header spellings seen on invoice line-item tables, mapped to item fields.
+ITEM_COLUMN_ALIASES = {
+    "description": "description",
+    "goods_description": "description",
+    "item": "description",
+    "product": "description",
+    "article": "description",
+    "hs": "hs_code",
+    "hs_code": "hs_code",
+    "commodity_code": "hs_code",
+    "tariff_code": "hs_code",
+    "origin": "origin_country",
+    "origin_country": "origin_country",
+    "country_of_origin": "origin_country",
+    "coo": "origin_country",
+    "vat": "vat_code",
+    "vat_code": "vat_code",
+    "packages": "pack_count",
+    "pack_count": "pack_count",
+    "pack_type": "pack_type",
+    "net_weight": "net_weight",
+    "net_weight_kg": "net_weight",
+    "gross_weight": "gross_weight",
+    "gross_weight_kg": "gross_weight",
+    "qty": "quantity",
+    "quantity": "quantity",
+    "price": "unit_price",
+    "unit_price": "unit_price",
+    "amount": "total_price",
+    "total": "total_price",
+    "total_price": "total_price",
+    "line_total": "total_price",
+}
+ITEM_FIELDS = (
+    "description",
+    "hs_code",
+    "origin_country",
+    "vat_code",
+    "pack_count",
+    "pack_type",
+    "net_weight",
+    "gross_weight",
+    "quantity",
+    "unit_price",
+    "total_price",
+)
+INVOICE_FIELDS = (
+    "invoice_number",
+    "invoice_date",
+    "supplier_name",
+    "buyer_name",
+    "buyer_address",
+    "seller_address",
+    "buyer_eori",
+    "seller_eori",
+    "incoterm",
+    "currency",
+    "subtotal",
+    "freight",
+    "insurance",
+    "tax_total",
+    "total",
+)
+NUMERIC_FIELDS = {
+    "subtotal",
+    "freight",
+    "insurance",
+    "tax_total",
+    "total",
+    "pack_count",
+    "net_weight",
+    "gross_weight",
+    "quantity",
+    "unit_price",
+    "total_price",
+}
+# Bumped when template extraction reads documents differently.
+TEMPLATE_VERSION = 2
+# A PDF with less extractable text than this is treated as a scan.
+_MIN_TEXT_CHARS = 40
+_LAYOUT_SPLIT = re.compile(r"\s{2,}|\t")
+_AMOUNT = re.compile(r"\d[\d.,]*[.,]\d+")
+_SUMMARY_ROW = re.compile(r"^(sub\s*-?\s*)?total|^(vat|tax|freight|shipping|insurance|discount)\b", re.IGNORECASE)
+
+
+@dataclass
+class DocumentContent:
+    lines: list[str]
+    tables: list[list[list[str]]] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    @property
+    def full_text(self) -> str:
+        """Free text followed by every table row, tab-separated."""
+        rows = ["\t".join(row) for table in self.tables for row in table]
+        return "\n".join(self.lines + rows)
+
+
+@dataclass
+class ItemTable:
+    columns: list[str | None]
+    rows: list[list[str]]
+
+
+def _clean(value: str | None) -> str:
+    return " ".join((value or "").split())
+
+
+def decimal_separator(text: str) -> str | None:
+    """Guesses the document's decimal separator from the amounts printed in
+    it: the last separator of "1.234,50" or "1,234.50", or a separator
+    followed by one or two digits. None when nothing in it is decisive."""
+    votes: Counter[str] = Counter()
+    for token in _AMOUNT.findall(text):
+        if "," in token and "." in token:
+            votes["," if token.rfind(",") > token.rfind(".") else "."] += 1
+        elif match := re.search(r"([.,])\d{1,2}$", token):
+            votes[match.group(1)] += 1
+    return votes.most_common(1)[0][0] if votes else None
+
+
+def _number(value: str, decimal: str | None = None) -> str | None:
+    """Normalises printed amounts ("1.234,50 €", "$1,234.50") to "1234.50".
+    With a known decimal separator the other one is a thousands separator,
+    so "1.000" reads as 1000 in a document that writes "1.234,50"."""
+    digits = re.sub(r"[^0-9,.\-]", "", value)
+    if decimal is not None:
+        digits = digits.replace("." if decimal == "," else ",", "").replace(decimal, ".")
+    elif "," in digits and "." in digits:
+        decimal = "," if digits.rfind(",") > digits.rfind(".") else "."
+        digits = digits.replace("." if decimal == "," else ",", "").replace(",", ".")
+    elif re.search(r",\d{1,2}$", digits):
+        digits = digits.replace(",", ".")
+    else:
+        digits = digits.replace(",", "")
+    return digits if re.fullmatch(r"-?\d+(\.\d+)?", digits) else None
+
+
+def _normalize_header(value: str, aliases: dict[str, str]) -> str | None:
+    name = re.sub(r"[^a-z0-9]+", "_", value.strip().lower()).strip("_")
+    return aliases.get(name)
+
+
+def _docx_content(path: Path) -> DocumentContent:
+    doc = Document(path)
+    lines = [_clean(p.text) for p in doc.paragraphs]
+    tables = []
+    for table in doc.tables:
+        rows = []
+        for row in table.rows:
+            cells = [_clean(cell.text) for cell in row.cells]
+            # Merged cells repeat the same text across the span.
+            deduped = [c for i, c in enumerate(cells) if i == 0 or row.cells[i]._tc is not row.cells[i - 1]._tc]
+            if any(deduped):
+                rows.append(deduped)
+        if rows:
+            tables.append(rows)
+    return DocumentContent(lines=[line for line in lines if line], tables=tables)
+
+
+def _layout_tables(lines: list[str]) -> tuple[list[str], list[list[list[str]]]]:
+    """Splits layout-preserved PDF text into free text and column-aligned blocks."""
+    text, tables, block = [], [], []
+    for line in lines + [""]:
+        cells = [c for c in _LAYOUT_SPLIT.split(line.strip()) if c]
+        if len(cells) >= 3:
+            block.append(cells)
+            continue
+        if len(block) >= 2:
+            tables.append(block)
+        else:
+            text.extend(" ".join(row) for row in block)
+        block = []
+        if line.strip():
+            text.append(_clean(line))
+    return text, tables
+
+
+def _pdf_content(path: Path) -> DocumentContent | None:
+    try:
+        reader = PdfReader(path)
+        pages = [page.extract_text(extraction_mode="layout") or "" for page in reader.pages]
+    except Exception:
+        return None
+    raw_lines = [line for page in pages for line in page.splitlines()]
+    if sum(len(line.strip()) for line in raw_lines) < _MIN_TEXT_CHARS:
+        return None
+    lines, tables = _layout_tables(raw_lines)
+    return DocumentContent(lines=lines, tables=tables)
+
+
+def load_document(path: Path, file_type: str) -> DocumentContent | None:
+    """Returns the document's text and tables, or None when it has no usable
+    text layer (scanned PDFs) and has to be sent to the extractor as a file."""
+    if file_type == "docx":
+        return _docx_content(path)
+    if file_type == "pdf":
+        return _pdf_content(path)
+    return None
+
+
+def find_item_table(
+    tables: list[list[list[str]]], extra_aliases: dict[str, str] | None = None
+) -> tuple[int, ItemTable] | None:
+    """Picks the table that looks most like invoice line items: a description
+    column plus at least one quantity or price column."""
+    aliases = {**ITEM_COLUMN_ALIASES, **(extra_aliases or {})}
+    best: tuple[int, int, ItemTable] | None = None
+    for index, table in enumerate(tables):
+        columns = [_normalize_header(cell, aliases) for cell in table[0]]
+        known = set(columns) - {None}
+        if "description" not in known or not known & {"quantity", "unit_price", "total_price"}:
+            continue
+        if best is None or len(known) > best[0]:
+            best = (len(known), index, ItemTable(columns=columns, rows=table[1:]))
+    return (best[1], best[2]) if best else None
+
+
+def compact_text(content: DocumentContent) -> str:
+    """Renders the document for the remote extractor: free text once, the
+    item table and other tables as tab-separated rows."""
+    seen: set[str] = set()
+    parts = []
+    for line in content.lines:
+        if line not in seen:
+            seen.add(line)
+            parts.append(line)
+    found = find_item_table(content.tables)
+    for index, table in enumerate(content.tables):
+        title = "Line items:" if found and found[0] == index else "Table:"
+        parts.append(title)
+        parts.extend("\t".join(row) for row in table)
+    return "\n".join(parts)
+
+
+@lru_cache
+def templates_fingerprint(path: str | None) -> str:
+    """Short hash of the template file, so edited templates don't reuse old results."""
+    if not path:
+        return "none"
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+@lru_cache
+def load_templates(path: str | None) -> tuple[dict[str, Any], ...]:
+    if not path:
+        return ()
+    with open(path, encoding="utf-8") as f:
+        templates = json.load(f)
+    for template in templates:
+        template["_match"] = [re.compile(p, re.IGNORECASE) for p in template.get("match", [])]
+        template["_fields"] = {k: re.compile(p, re.IGNORECASE) for k, p in template.get("fields", {}).items()}
+    return tuple(templates)
+
+
+def _template_items(content: DocumentContent, template: dict[str, Any], decimal: str | None) -> list[dict[str, Any]]:
+    extra = {re.sub(r"[^a-z0-9]+", "_", k.lower()).strip("_"): v for k, v in template.get("columns", {}).items()}
+    found = find_item_table(content.tables, extra)
+    if found is None:
+        return []
+    table = found[1]
+    items = []
+    for row in table.rows:
+        item: dict[str, Any] = dict.fromkeys(ITEM_FIELDS)
+        for column, value in zip(table.columns, row):
+            if column and value:
+                item[column] = _number(value, decimal) if column in NUMERIC_FIELDS else value
+        # Totals, tax and freight rows sit in the same table as the goods.
+        if not item["description"] or _SUMMARY_ROW.match(item["description"]):
+            continue
+        if any(item[k] for k in ("quantity", "unit_price", "total_price")):
+            items.append(item)
+    return items
+
+
+def match_template(content: DocumentContent, templates: tuple[dict[str, Any], ...]) -> dict[str, Any] | None:
+    """Extracts the invoice locally with the first template whose ``match``
+    patterns all occur in the document. Returns None when no template
+    applies or the result lacks an invoice number or items."""
+    text = content.full_text
+    detected = decimal_separator(text)
+    for template in templates:
+        if not template["_match"] or not all(p.search(text) for p in template["_match"]):
+            continue
+        decimal = template.get("decimal") or detected
+        extracted: dict[str, Any] = dict.fromkeys(INVOICE_FIELDS)
+        extracted.update({k: v for k, v in template.get("values", {}).items() if k in INVOICE_FIELDS})
+        for name, pattern in template["_fields"].items():
+            match = pattern.search(text)
+            if match and name in INVOICE_FIELDS:
+                value = _clean(match.group(1) if pattern.groups else match.group(0))
+                extracted[name] = _number(value, decimal) if name in NUMERIC_FIELDS else value
+        extracted["items"] = _template_items(content, template, decimal)
+        if extracted["invoice_number"] and extracted["items"]:
+            return extracted
+    return None
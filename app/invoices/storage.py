@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import os
+import uuid
+from pathlib import Path
+from typing import IO
+
+from fastapi import UploadFile
+
+from app.core.uploads import save_stream
+
+
+async def store_document(
+    source: IO[bytes], name: str, upload_dir: Path, suffix: str, max_bytes: int | None = None
+) -> tuple[Path, str]:
+    """Writes the document under its SHA-256, hashing it while it is copied.
+
+    Identical documents share one file; returns the stored path and the hash.
+    """
+    saved = await save_stream(source, upload_dir / f".{uuid.uuid4().hex}.part", max_bytes, name)
+    stored_path = upload_dir / f"{saved.sha256}{suffix}"
+    if stored_path.exists():
+        saved.path.unlink()
+    else:
+        os.replace(saved.path, stored_path)
+    return stored_path, saved.sha256
+
+
+async def store_upload(
+    file: UploadFile, upload_dir: Path, suffix: str, max_bytes: int | None = None
+) -> tuple[Path, str]:
+    await file.seek(0)
+    return await store_document(file.file, file.filename or "", upload_dir, suffix, max_bytes)
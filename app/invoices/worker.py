@@ -0,0 +1,266 @@
+"""Background invoice extraction.
+
+Uploads are stored with status UPLOADED and picked up here. The job state
+lives on the invoice row itself: workers claim the oldest available invoice
+with ``FOR UPDATE SKIP LOCKED``, bump ``extraction_attempts`` and push
+``extraction_available_at`` out by a lease, so several API processes can run
+workers side by side and a job held by a crashed process becomes claimable
+again once its lease runs out. Failures are retried with exponential backoff
+until ``max_attempts``, after which the invoice is marked FAILED.
+
+The pool size caps how many extractions run at once in a process; calls to
+the provider are additionally paced by a Redis sliding-window limiter shared
+by every process, so large batches queue instead of tripping provider 429s.
+A job queued behind the limiter keeps renewing its lease, and the time spent
+queued doesn't count against the extraction timeout.
+"""
+from __future__ import annotations
+
+import asyncio
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import func, or_, select, update
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.metrics import INVOICE_EXTRACTIONS
+from app.core.rate_limit import RateLimiter, RateLimitPolicy
+from app.db import session as db_session
+from app.invoices import extractors
+from app.invoices.extraction import apply_extraction, find_cached_extraction
+from app.models.invoice import Invoice, InvoiceStatus
+
+logger = get_logger()
+
+
+class LeaseLost(RuntimeError):
+    """Another worker claimed the job after this one's lease ran out."""
+
+
+@dataclass(frozen=True)
+class ExtractionJob:
+    invoice_id: uuid.UUID
+    user_id: uuid.UUID
+    file_path: str
+    file_type: str
+    content_hash: str | None
+    attempt: int
+
+
+class InvoiceExtractionWorker:
+    def __init__(
+        self,
+        concurrency: int,
+        max_attempts: int,
+        timeout_seconds: float,
+        retry_seconds: float,
+        poll_seconds: float,
+        provider_limiter: RateLimiter | None = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.timeout_seconds = timeout_seconds
+        self.retry_seconds = retry_seconds
+        self.poll_seconds = poll_seconds
+        self.provider_limiter = provider_limiter
+        self.lease_seconds = timeout_seconds + 30
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def notify(self) -> None:
+        """Wakes idle workers in this process; other processes find the job on their next poll."""
+        self._wakeup.set()
+
+    def retry_delay(self, attempt: int) -> float:
+        return self.retry_seconds * 2 ** (attempt - 1)
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("invoice_extraction_claim_failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("invoice_extraction_failed", invoice_id=str(job.invoice_id))
+
+    async def _claim(self) -> ExtractionJob | None:
+        candidate = (
+            select(Invoice.id)
+            .where(
+                Invoice.status == InvoiceStatus.UPLOADED,
+                or_(Invoice.extraction_available_at.is_(None), Invoice.extraction_available_at <= func.now()),
+            )
+            .order_by(Invoice.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with db_session.SessionLocal() as session:
+            result = await session.execute(
+                update(Invoice)
+                .where(Invoice.id == candidate)
+                .values(
+                    extraction_attempts=Invoice.extraction_attempts + 1,
+                    extraction_available_at=func.now() + timedelta(seconds=self.lease_seconds),
+                )
+                .returning(
+                    Invoice.id,
+                    Invoice.user_id,
+                    Invoice.file_path,
+                    Invoice.file_type,
+                    Invoice.content_hash,
+                    Invoice.extraction_attempts,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            row = result.one_or_none()
+            await session.commit()
+        if row is None:
+            return None
+        return ExtractionJob(
+            invoice_id=row[0], user_id=row[1], file_path=row[2], file_type=row[3], content_hash=row[4], attempt=row[5]
+        )
+
+    async def _process(self, job: ExtractionJob) -> None:
+        # An identical upload queued at the same time may have finished first.
+        if job.content_hash:
+            async with db_session.SessionLocal() as session:
+                cached = await find_cached_extraction(
+                    session, job.user_id, job.content_hash, extractors.extraction_versions(job.file_type)
+                )
+            if cached is not None:
+                await self._complete(job, *cached, outcome="cached")
+                return
+        loop = asyncio.get_running_loop()
+        try:
+            async with asyncio.timeout(self.timeout_seconds) as timer:
+
+                async def before_remote() -> None:
+                    if await self._wait_for_provider(job):
+                        timer.reschedule(loop.time() + self.timeout_seconds)
+
+                extracted, version = await extractors.extract_invoice(
+                    Path(job.file_path), job.file_type, job.content_hash, before_remote=before_remote
+                )
+        except asyncio.CancelledError:
+            raise
+        except LeaseLost:
+            logger.warning("invoice_extraction_lease_lost", invoice_id=str(job.invoice_id), attempt=job.attempt)
+            return
+        except Exception as exc:
+            await self._record_failure(job, exc)
+            return
+        await self._complete(job, extracted, version)
+
+    async def _wait_for_provider(self, job: ExtractionJob) -> bool:
+        """Waits for a provider slot; returns whether it had to wait. While
+        waiting, and once more before the call, the job's lease is renewed."""
+        if self.provider_limiter is None:
+            return False
+        loop = asyncio.get_running_loop()
+        waited = False
+        renewed_at = loop.time()
+        while True:
+            allowed, retry_after = await self.provider_limiter.hit("openai")
+            if allowed:
+                break
+            waited = True
+            await asyncio.sleep(max(retry_after, 0.05))
+            if loop.time() - renewed_at > self.lease_seconds / 2:
+                await self._renew_lease(job)
+                renewed_at = loop.time()
+        if waited:
+            await self._renew_lease(job)
+        return waited
+
+    async def _renew_lease(self, job: ExtractionJob) -> None:
+        async with db_session.SessionLocal() as session:
+            result = await session.execute(
+                update(Invoice)
+                .where(
+                    Invoice.id == job.invoice_id,
+                    Invoice.status == InvoiceStatus.UPLOADED,
+                    Invoice.extraction_attempts == job.attempt,
+                )
+                .values(extraction_available_at=func.now() + timedelta(seconds=self.lease_seconds))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        if not result.rowcount:
+            raise LeaseLost(f"Lease on invoice {job.invoice_id} lost")
+
+    async def _complete(self, job: ExtractionJob, extracted: dict, version: str, outcome: str = "extracted") -> None:
+        async with db_session.SessionLocal() as session:
+            invoice = await session.get(Invoice, job.invoice_id, with_for_update=True)
+            # The invoice may have been deleted or edited by hand meanwhile.
+            if invoice is None or invoice.status != InvoiceStatus.UPLOADED:
+                return
+            apply_extraction(session, invoice, extracted, version)
+            await session.commit()
+        INVOICE_EXTRACTIONS.labels(outcome=outcome).inc()
+        logger.info("invoice_extracted", invoice_id=str(job.invoice_id), attempt=job.attempt)
+
+    async def _record_failure(self, job: ExtractionJob, exc: Exception) -> None:
+        error = str(exc) or type(exc).__name__
+        values: dict = {"extraction_error": error[:2000]}
+        if job.attempt >= self.max_attempts:
+            values["status"] = InvoiceStatus.FAILED
+            values["extraction_available_at"] = None
+            outcome = "failed"
+        else:
+            delay = timedelta(seconds=self.retry_delay(job.attempt))
+            values["extraction_available_at"] = func.now() + delay
+            outcome = "retry"
+        async with db_session.SessionLocal() as session:
+            await session.execute(
+                update(Invoice)
+                .where(Invoice.id == job.invoice_id, Invoice.status == InvoiceStatus.UPLOADED)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        INVOICE_EXTRACTIONS.labels(outcome=outcome).inc()
+        logger.warning("invoice_extraction_error", invoice_id=str(job.invoice_id), attempt=job.attempt, error=error)
+
+
+_settings = get_settings()
+extraction_worker = InvoiceExtractionWorker(
+    concurrency=_settings.invoice_extraction_workers,
+    max_attempts=_settings.invoice_extraction_max_attempts,
+    timeout_seconds=_settings.invoice_extraction_timeout_seconds,
+    retry_seconds=_settings.invoice_extraction_retry_seconds,
+    poll_seconds=_settings.invoice_extraction_poll_seconds,
+    provider_limiter=RateLimiter(
+        RateLimitPolicy.parse("extraction_provider", _settings.rate_limit_extraction_provider)
+    ),
+)
@@ -0,0 +1,246 @@
+"""Open-loop load generator for the API.
+
+Registers throwaway users, seeds shipments with items and costs spread across
+them, then issues requests at a fixed arrival rate (independent of response
+times) and reports throughput and latency percentiles per endpoint::
+
+    python -m app.loadtest --base-url http://localhost:8000 --rps 50 --duration 60 \
+        --users 50 --shipments 50 --items 10 --out results.json
+
+Calculations are rate limited per user (``RATE_LIMIT_CALCULATE``, 60/60 by
+default), so each request goes out as the owner of a random shipment; at
+50 rps of mostly calculate, use ~50 users or raise the limit on the server
+under test. Registration is limited per client IP (``RATE_LIMIT_AUTH``); the
+harness waits out its 429s while seeding. Responses that are 429 are reported
+as ``throttled`` rather than errors, so a run that mostly measured the limiter
+is easy to spot.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.core.config import get_settings
+
+# (name, method, path template, weight)
+SCENARIOS: dict[str, list[tuple[str, str, str, int]]] = {
+    "calculate": [
+        ("calculate", "POST", "/shipments/{shipment_id}/calculate", 1),
+    ],
+    "mixed": [
+        ("calculate", "POST", "/shipments/{shipment_id}/calculate", 4),
+        ("shipment_detail", "GET", "/shipments/{shipment_id}", 3),
+        ("shipment_list", "GET", "/shipments", 1),
+        ("fx_rate", "GET", "/rates/fx?base=USD&quote=GBP", 1),
+        ("vat_rate", "GET", "/rates/vat?country=GB", 1),
+    ],
+}
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    throttled: int = 0
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        ordered = sorted(self.latencies_ms)
+        return {
+            "requests": len(ordered),
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": _percentile(ordered, 50),
+            "p90_ms": _percentile(ordered, 90),
+            "p95_ms": _percentile(ordered, 95),
+            "p99_ms": _percentile(ordered, 99),
+            "max_ms": round(ordered[-1], 2) if ordered else None,
+        }
+
+
+def _percentile(ordered: list[float], pct: float) -> float | None:
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return round(ordered[rank - 1], 2)
+
+
+async def _register(client: httpx.AsyncClient) -> dict[str, str]:
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    while True:
+        response = await client.post("/auth/register", json={"email": email, "password": uuid.uuid4().hex})
+        if response.status_code != 429:
+            break
+        await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _seed(
+    client: httpx.AsyncClient, users: int, shipments: int, items: int, direction: str
+) -> list[tuple[dict[str, str], str]]:
+    """Returns (owner's auth headers, shipment id) pairs, shipments dealt round-robin to the users."""
+    owners = [await _register(client) for _ in range(max(1, users))]
+    seeded = []
+    for n in range(shipments):
+        headers = owners[n % len(owners)]
+        response = await client.post(
+            "/shipments",
+            headers=headers,
+            json={
+                "direction": direction,
+                "destination_country": "DE" if direction == "IMPORT_EU" else None,
+                "origin_country_default": "CN",
+                "incoterm": "CIF",
+                "currency": "USD",
+            },
+        )
+        response.raise_for_status()
+        shipment_id = response.json()["id"]
+        await client.put(
+            f"/shipments/{shipment_id}/costs",
+            headers=headers,
+            json={"freight_amount": "100", "insurance_amount": "10"},
+        )
+        for index in range(items):
+            await client.post(
+                f"/shipments/{shipment_id}/items",
+                headers=headers,
+                json={
+                    "description": f"Item {index}",
+                    "hs_code": random.choice(["8471300000", "6109100010", "9403200000", "8517130000"]),
+                    "origin_country": "CN",
+                    "quantity": str(random.randint(1, 100)),
+                    "unit_price": str(random.randint(1, 500)),
+                    "weight_net_kg": "1.5",
+                },
+            )
+        seeded.append((headers, shipment_id))
+    return seeded
+
+
+async def run_load(
+    base_url: str,
+    rps: float,
+    duration: float,
+    scenario: str,
+    users: int,
+    shipments: int,
+    items: int,
+    direction: str,
+    max_in_flight: int,
+) -> dict[str, Any]:
+    routes = SCENARIOS[scenario]
+    weights = [route[3] for route in routes]
+    stats: dict[str, EndpointStats] = {route[0]: EndpointStats() for route in routes}
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        seeded = await _seed(client, users, shipments, items, direction)
+        in_flight = asyncio.Semaphore(max_in_flight)
+        dropped = 0
+
+        async def fire(name: str, method: str, path: str, headers: dict[str, str]) -> None:
+            started = time.perf_counter()
+            status_code = None
+            try:
+                response = await client.request(method, path, headers=headers)
+                status_code = response.status_code
+            except httpx.HTTPError:
+                pass
+            finally:
+                in_flight.release()
+            stats[name].latencies_ms.append((time.perf_counter() - started) * 1000)
+            if status_code == 429:
+                stats[name].throttled += 1
+            elif status_code is None or status_code >= 400:
+                stats[name].errors += 1
+
+        tasks: list[asyncio.Task] = []
+        interval = 1.0 / rps
+        started = time.perf_counter()
+        next_at = started
+        while next_at - started < duration:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            next_at += interval
+            if in_flight.locked():
+                dropped += 1
+                continue
+            await in_flight.acquire()
+            name, method, template, _ = random.choices(routes, weights=weights)[0]
+            headers, shipment_id = random.choice(seeded)
+            path = template.format(shipment_id=shipment_id)
+            tasks.append(asyncio.create_task(fire(name, method, path, headers)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": scenario,
+        "target_rps": rps,
+        "duration_s": round(elapsed, 2),
+        "users": users,
+        "shipments": shipments,
+        "items_per_shipment": items,
+        "dropped": dropped,
+        "endpoints": {name: s.summary(elapsed) for name, s in stats.items()},
+    }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(
+        f"scenario={report['scenario']} target_rps={report['target_rps']} "
+        f"duration={report['duration_s']}s dropped={report['dropped']}"
+    )
+    header = f"{'endpoint':<18}{'reqs':>7}{'errs':>6}{'429s':>6}{'rps':>8}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    for name, row in report["endpoints"].items():
+        print(
+            f"{name:<18}{row['requests']:>7}{row['errors']:>6}{row['throttled']:>6}{row['throughput_rps']:>8}"
+            + "".join(f"{(row[k] if row[k] is not None else '-'):>9}" for k in ("p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms"))
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.loadtest")
+    parser.add_argument("--base-url", default=f"http://localhost:8000{get_settings().api_prefix}")
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--shipments", type=int, default=10)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--direction", choices=["IMPORT_UK", "IMPORT_EU"], default="IMPORT_UK")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        run_load(
+            base_url=args.base_url,
+            rps=args.rps,
+            duration=args.duration,
+            scenario=args.scenario,
+            users=args.users,
+            shipments=args.shipments,
+            items=args.items,
+            direction=args.direction,
+            max_in_flight=args.max_in_flight,
+        )
+    )
+    _print_report(report)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
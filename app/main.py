@@ -1,20 +1,50 @@
 from __future__ import annotations
 
+import time
 import uuid
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
 from app.core.logging import configure_logging, get_logger
+from app.core.metrics import REQUEST_LATENCY, mark_process_dead, render_latest
+from app.core.principal import PrincipalRevocationListener, principal_cache
+from app.core.tracing import configure_exporter, finish_trace, start_trace
+from app.invoices.worker import extraction_worker
 from app.routers import auth, calculation, countries, invoices, licenses, passport, rates, shipments, taric
+from app.services.providers.http_client import circuit_breaker
+from app.services.providers.vat import VatTableRefresher
 
 settings = get_settings()
 
 configure_logging()
 logger = get_logger()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    vat_refresher = VatTableRefresher(settings.vat_table_refresh_seconds)
+    await vat_refresher.start()
+    revocation_listener = PrincipalRevocationListener(principal_cache)
+    await revocation_listener.start()
+    trace_exporter = configure_exporter()
+    if trace_exporter is not None:
+        await trace_exporter.start()
+    await extraction_worker.start()
+    yield
+    await extraction_worker.stop()
+    if trace_exporter is not None:
+        await trace_exporter.stop()
+    await revocation_listener.stop()
+    await vat_refresher.stop()
+    mark_process_dead()
+
+
 app = FastAPI(
     title=settings.app_name,
+    lifespan=lifespan,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
@@ -31,6 +61,7 @@ app.add_middleware(
 app.include_router(auth.router, prefix=settings.api_prefix)
 app.include_router(shipments.router, prefix=settings.api_prefix)
 app.include_router(rates.router, prefix=settings.api_prefix)
+app.include_router(rates.admin_router, prefix=settings.api_prefix)
 app.include_router(calculation.router, prefix=settings.api_prefix)
 app.include_router(taric.router, prefix=settings.api_prefix)
 app.include_router(taric.admin_router, prefix=settings.api_prefix)
@@ -45,11 +76,35 @@ async def root():
     return {"service": settings.app_name}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    await circuit_breaker.export_state()
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
     request_id = str(uuid.uuid4())
     request.state.request_id = request_id
-    response = await call_next(request)
-    logger.info("request", path=str(request.url.path), method=request.method, request_id=request_id)
+    started = time.perf_counter()
+    trace = start_trace(request_id, f"{request.method} {request.url.path}", method=request.method, path=request.url.path)
+    try:
+        response = await call_next(request)
+    finally:
+        if trace is not None:
+            finish_trace(trace)
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=str(response.status_code),
+    ).observe(time.perf_counter() - started)
+    timing: dict = {}
+    if trace is not None:
+        timing = {name: round(total, 2) for name, (_, total) in trace.totals().items()}
+        timing["duration_ms"] = round(trace.root.duration_ms, 2)
+        response.headers["Server-Timing"] = trace.server_timing()
+    logger.info("request", path=str(request.url.path), method=request.method, request_id=request_id, **timing)
     response.headers["X-Request-ID"] = request_id
     return response
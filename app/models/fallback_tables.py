@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 from decimal import Decimal
-from sqlalchemy import Date, DateTime, Numeric, String, func
+from sqlalchemy import Date, DateTime, Index, Numeric, String, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -20,6 +20,17 @@ class TariffRateOverride(Base):
     duty_rate: Mapped[Decimal] = mapped_column(Numeric(8, 4), nullable=False)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index(
+            "ix_tariff_rate_overrides_lookup",
+            "destination_region",
+            "commodity_code",
+            "origin_country",
+            "preference_flag",
+            postgresql_include=["duty_rate"],
+        ),
+    )
+
 
 class VatRate(Base):
     __tablename__ = "vat_rates"
@@ -27,9 +38,20 @@ class VatRate(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     country: Mapped[str] = mapped_column(String(2), nullable=False)
     rate_type: Mapped[str] = mapped_column(String(32), nullable=False, default="standard")
+    hs_prefix: Mapped[str | None] = mapped_column(String(10))
     rate: Mapped[Decimal] = mapped_column(Numeric(8, 4), nullable=False)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_vat_rates_country_type", "country", "rate_type"),
+        Index(
+            "ix_vat_rates_standard",
+            "country",
+            postgresql_include=["rate"],
+            postgresql_where=text("rate_type = 'standard' AND hs_prefix IS NULL"),
+        ),
+    )
+
 
 class EuTaricRate(Base):
     __tablename__ = "eu_taric_rates"
@@ -41,6 +63,12 @@ class EuTaricRate(Base):
     duty_rate: Mapped[Decimal] = mapped_column(Numeric(8, 4), nullable=False)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index(
+            "ix_eu_taric_rates_lookup", "hs_code", "origin_country", "preference_flag", postgresql_include=["duty_rate"]
+        ),
+    )
+
 
 class FxRateDaily(Base):
     __tablename__ = "fx_rates_daily"
@@ -51,3 +79,5 @@ class FxRateDaily(Base):
     rate: Mapped[Decimal] = mapped_column(Numeric(18, 8), nullable=False)
     rate_date: Mapped[Date] = mapped_column(Date, nullable=False)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_fx_rates_daily_pair_date", "base", "quote", "rate_date", postgresql_include=["rate"]),)
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import uuid
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum
 
-from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, Numeric, String, Text, func
+from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, Index, Integer, Numeric, String, Text, func, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -17,6 +17,7 @@ class InvoiceStatus(str, Enum):
     EXTRACTED = "EXTRACTED"
     REVIEWED = "REVIEWED"
     CONFIRMED = "CONFIRMED"
+    FAILED = "FAILED"
 
 
 class Invoice(Base):
@@ -25,9 +26,12 @@ class Invoice(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     shipment_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("shipments.id"))
+    batch_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
 
     file_path: Mapped[str] = mapped_column(Text, nullable=False)
     file_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    source_filename: Mapped[str | None] = mapped_column(String(255))
+    content_hash: Mapped[str | None] = mapped_column(String(64))
 
     invoice_number: Mapped[str | None] = mapped_column(String(64))
     invoice_date: Mapped[date | None] = mapped_column(Date)
@@ -47,13 +51,24 @@ class Invoice(Base):
     total: Mapped[Decimal | None] = mapped_column(Numeric(18, 4))
 
     extracted_payload: Mapped[dict | None] = mapped_column(JSONB)
+    extraction_version: Mapped[str | None] = mapped_column(String(128))
     status: Mapped[InvoiceStatus] = mapped_column(SAEnum(InvoiceStatus), default=InvoiceStatus.UPLOADED, nullable=False)
+    extraction_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    extraction_error: Mapped[str | None] = mapped_column(Text)
+    extraction_available_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    __table_args__ = (
+        Index("ix_invoices_user_created", "user_id", "created_at", "id"),
+        Index("ix_invoices_extraction_queue", "created_at", postgresql_where=text("status = 'UPLOADED'")),
+        Index("ix_invoices_user_content_hash", "user_id", "content_hash", "extraction_version"),
+        Index("ix_invoices_batch", "batch_id", postgresql_where=text("batch_id IS NOT NULL")),
+    )
+
     items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan")
 
 
@@ -78,3 +93,5 @@ class InvoiceItem(Base):
 
     invoice = relationship("Invoice", back_populates="items")
     passport_item = relationship("PassportItem", back_populates="invoice_items")
+
+    __table_args__ = (Index("ix_invoice_items_invoice", "invoice_id"),)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import uuid
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, func
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -20,3 +20,8 @@ class RateSnapshot(Base):
     response_payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
     fetched_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     ttl_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_rate_snapshots_lookup", "shipment_id", "provider", fetched_at.desc()),
+        Index("ix_rate_snapshots_request_key", "request_key", postgresql_using="hash"),
+    )
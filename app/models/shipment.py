@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import uuid
-from sqlalchemy import Date, DateTime, Enum, ForeignKey, String, func
+from sqlalchemy import Date, DateTime, Enum, ForeignKey, Index, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -31,6 +31,8 @@ class Shipment(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    __table_args__ = (Index("ix_shipments_user_created", "user_id", "created_at", "id"),)
+
     user = relationship("User", back_populates="shipments")
     costs = relationship("ShipmentCosts", back_populates="shipment", uselist=False)
     items = relationship("ShipmentItem", back_populates="shipment")
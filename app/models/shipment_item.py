@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 from decimal import Decimal
-from sqlalchemy import DateTime, ForeignKey, Numeric, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -33,3 +33,5 @@ class ShipmentItem(Base):
 
     shipment = relationship("Shipment", back_populates="items")
     passport_item = relationship("PassportItem", back_populates="shipment_items")
+
+    __table_args__ = (Index("ix_shipment_items_shipment", "shipment_id", "hs_code"),)
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import uuid
-from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, String, Text, func
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import Computed, Date, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -34,9 +34,14 @@ class GoodsNomenclature(Base):
     valid_from: Mapped[Date | None] = mapped_column(Date)
     valid_to: Mapped[Date | None] = mapped_column(Date)
     source_record_id: Mapped[str | None] = mapped_column(String(64))
+    # Materialised ancestry, root first: "0100000000.0101000000.0101210000".
+    # Rebuilt from parent_goods_code after every import (see app/taric/hierarchy.py).
+    path: Mapped[str | None] = mapped_column(Text)
 
     __table_args__ = (
         Index("ix_goods_nomenclature_code_valid", "goods_code", "valid_from", "valid_to"),
+        Index("ix_goods_nomenclature_parent", "parent_goods_code"),
+        Index("ix_goods_nomenclature_path", "path", postgresql_ops={"path": "text_pattern_ops"}),
     )
 
 
@@ -49,9 +54,19 @@ class GoodsDescription(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     valid_from: Mapped[Date | None] = mapped_column(Date)
     valid_to: Mapped[Date | None] = mapped_column(Date)
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, Computed("to_tsvector('english', description)", persisted=True), deferred=True
+    )
 
     __table_args__ = (
         Index("ix_goods_description_code_valid", "goods_code", "valid_from", "valid_to"),
+        Index("ix_goods_description_search", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_goods_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
     )
 
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import date
-from sqlalchemy import select
+from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.fallback_tables import EuTaricRate, FxRateDaily, TariffRateOverride, VatRate
@@ -35,10 +35,16 @@ class VatRateRepository:
 
     async def get_standard_rate(self, country: str) -> VatRate | None:
         result = await self.session.execute(
-            select(VatRate).where(VatRate.country == country, VatRate.rate_type == "standard")
+            select(VatRate).where(
+                VatRate.country == country, VatRate.rate_type == "standard", VatRate.hs_prefix.is_(None)
+            )
         )
         return result.scalar_one_or_none()
 
+    async def list_all(self) -> list[VatRate]:
+        result = await self.session.execute(select(VatRate))
+        return list(result.scalars().all())
+
 
 class EuTaricRepository:
     def __init__(self, session: AsyncSession) -> None:
@@ -69,6 +75,31 @@ class FxRateRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_latest_rate(self, base: str, quote: str, rate_date: date, earliest: date) -> FxRateDaily | None:
+        result = await self.session.execute(
+            select(FxRateDaily)
+            .where(
+                FxRateDaily.base == base,
+                FxRateDaily.quote == quote,
+                FxRateDaily.rate_date <= rate_date,
+                FxRateDaily.rate_date >= earliest,
+            )
+            .order_by(FxRateDaily.rate_date.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_rates_for_pairs(self, pairs: set[tuple[str, str]], start: date, end: date) -> list[FxRateDaily]:
+        if not pairs:
+            return []
+        filters = [and_(FxRateDaily.base == base, FxRateDaily.quote == quote) for base, quote in pairs]
+        result = await self.session.execute(
+            select(FxRateDaily)
+            .where(or_(*filters), FxRateDaily.rate_date >= start, FxRateDaily.rate_date <= end)
+            .order_by(FxRateDaily.rate_date)
+        )
+        return list(result.scalars().all())
+
     async def upsert(self, rate: FxRateDaily) -> FxRateDaily:
         self.session.add(rate)
         await self.session.commit()
@@ -21,6 +21,7 @@ class RateSnapshotRepository:
                 RateSnapshot.request_key == request_key,
             )
             .order_by(RateSnapshot.fetched_at.desc())
+            .limit(1)
         )
         snapshot = result.scalar_one_or_none()
         if not snapshot:
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import uuid
-from sqlalchemy import select
+from sqlalchemy import delete, exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
+from app.core.pagination import PageParams, keyset_page
+from app.models.enums import Direction, ShipmentStatus
 from app.models.shipment import Shipment
 from app.models.shipment_costs import ShipmentCosts
 from app.models.shipment_item import ShipmentItem
@@ -20,17 +22,53 @@ class ShipmentRepository:
         await self.session.refresh(shipment)
         return shipment
 
-    async def get(self, shipment_id: str | uuid.UUID, user_id: uuid.UUID) -> Shipment | None:
-        value = uuid.UUID(str(shipment_id))
+    async def get(
+        self, shipment_id: str | uuid.UUID, user_id: uuid.UUID, with_items: bool = True
+    ) -> Shipment | None:
+        """Loads the shipment with its costs, and items unless ``with_items`` is
+        False, in a single joined query."""
+        value = _as_uuid(shipment_id)
+        if value is None:
+            return None
+        options = [joinedload(Shipment.costs)]
+        if with_items:
+            options.append(joinedload(Shipment.items))
+        result = await self.session.execute(
+            select(Shipment).where(Shipment.id == value, Shipment.user_id == user_id).options(*options)
+        )
+        return result.unique().scalar_one_or_none()
+
+    async def get_many(self, shipment_ids: list[str | uuid.UUID], user_id: uuid.UUID) -> list[Shipment]:
+        values = [uuid.UUID(str(shipment_id)) for shipment_id in shipment_ids]
+        if not values:
+            return []
         result = await self.session.execute(
             select(Shipment)
-            .where(Shipment.id == value, Shipment.user_id == user_id)
+            .where(Shipment.id.in_(values), Shipment.user_id == user_id)
             .options(selectinload(Shipment.items), selectinload(Shipment.costs))
         )
-        return result.scalar_one_or_none()
+        return list(result.scalars().all())
 
-    async def list(self, user_id: uuid.UUID) -> list[Shipment]:
-        result = await self.session.execute(select(Shipment).where(Shipment.user_id == user_id))
+    async def list(
+        self,
+        user_id: uuid.UUID,
+        page: PageParams,
+        status: ShipmentStatus | None = None,
+        direction: Direction | None = None,
+        hs_code: str | None = None,
+    ) -> list[Shipment]:
+        stmt = select(Shipment).where(Shipment.user_id == user_id)
+        if status:
+            stmt = stmt.where(Shipment.status == status)
+        if direction:
+            stmt = stmt.where(Shipment.direction == direction)
+        if hs_code:
+            stmt = stmt.where(
+                exists().where(
+                    ShipmentItem.shipment_id == Shipment.id, ShipmentItem.hs_code.startswith(hs_code, autoescape=True)
+                )
+            )
+        result = await self.session.execute(keyset_page(stmt, Shipment, page, page.fields))
         return list(result.scalars().all())
 
     async def delete(self, shipment: Shipment) -> None:
@@ -43,6 +81,17 @@ class ShipmentRepository:
         await self.session.refresh(shipment)
         return shipment
 
+    async def get_costs(self, shipment_id: str | uuid.UUID, user_id: uuid.UUID) -> ShipmentCosts | None:
+        value = _as_uuid(shipment_id)
+        if value is None:
+            return None
+        result = await self.session.execute(
+            select(ShipmentCosts)
+            .join(Shipment, Shipment.id == ShipmentCosts.shipment_id)
+            .where(ShipmentCosts.shipment_id == value, Shipment.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
     async def upsert_costs(self, shipment_id: uuid.UUID, costs: ShipmentCosts) -> ShipmentCosts:
         self.session.add(costs)
         await self.session.commit()
@@ -55,12 +104,50 @@ class ShipmentRepository:
         await self.session.refresh(item)
         return item
 
+    async def get_item(
+        self, shipment_id: str | uuid.UUID, item_id: str | uuid.UUID, user_id: uuid.UUID
+    ) -> ShipmentItem | None:
+        """Fetches one item, checking shipment ownership in the same statement."""
+        shipment_value, item_value = _as_uuid(shipment_id), _as_uuid(item_id)
+        if shipment_value is None or item_value is None:
+            return None
+        result = await self.session.execute(
+            select(ShipmentItem)
+            .join(Shipment, Shipment.id == ShipmentItem.shipment_id)
+            .where(
+                ShipmentItem.id == item_value,
+                ShipmentItem.shipment_id == shipment_value,
+                Shipment.user_id == user_id,
+            )
+        )
+        return result.scalar_one_or_none()
+
     async def update_item(self, item: ShipmentItem) -> ShipmentItem:
         self.session.add(item)
         await self.session.commit()
         await self.session.refresh(item)
         return item
 
-    async def delete_item(self, item: ShipmentItem) -> None:
-        await self.session.delete(item)
+    async def delete_item(
+        self, shipment_id: str | uuid.UUID, item_id: str | uuid.UUID, user_id: uuid.UUID
+    ) -> bool:
+        """Deletes one item if the shipment belongs to the user; returns whether a row went."""
+        shipment_value, item_value = _as_uuid(shipment_id), _as_uuid(item_id)
+        if shipment_value is None or item_value is None:
+            return False
+        result = await self.session.execute(
+            delete(ShipmentItem).where(
+                ShipmentItem.id == item_value,
+                ShipmentItem.shipment_id == shipment_value,
+                exists().where(Shipment.id == ShipmentItem.shipment_id, Shipment.user_id == user_id),
+            )
+        )
         await self.session.commit()
+        return result.rowcount > 0
+
+
+def _as_uuid(value: str | uuid.UUID) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from datetime import date
-from sqlalchemy import and_, or_, select
+
+from sqlalchemy import and_, any_, func, literal, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.models.taric import (
     AdditionalCode,
@@ -19,26 +21,29 @@ from app.models.taric import (
     TaricResolvedCache,
     TaricSnapshot,
 )
+from app.taric.hierarchy import PATH_SEPARATOR
 
 
 class TaricRepository:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: AsyncSession, read_session: AsyncSession | None = None) -> None:
         self.session = session
+        # Lookups may run against a replica; cache writes always use ``session``.
+        self.reader = read_session or session
 
     async def get_latest_snapshot_date(self) -> date | None:
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(TaricSnapshot.snapshot_date).order_by(TaricSnapshot.snapshot_date.desc()).limit(1)
         )
         return result.scalar_one_or_none()
 
     async def get_snapshot(self, snapshot_date: date) -> TaricSnapshot | None:
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(TaricSnapshot).where(TaricSnapshot.snapshot_date == snapshot_date)
         )
         return result.scalar_one_or_none()
 
     async def get_goods_candidates(self, codes: list[str], as_of: date) -> list[GoodsNomenclature]:
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(GoodsNomenclature).where(
                 GoodsNomenclature.goods_code.in_(codes),
                 self._valid_on(GoodsNomenclature.valid_from, GoodsNomenclature.valid_to, as_of),
@@ -46,8 +51,66 @@ class TaricRepository:
         )
         return list(result.scalars().all())
 
+    async def get_ancestry(self, codes: list[str], as_of: date) -> list[GoodsNomenclature]:
+        """The most specific of ``codes`` that exists, followed by its real
+        ancestors up to the root, in one query over the materialised path.
+        Empty when none of the codes exists or paths haven't been built."""
+        anchor = aliased(GoodsNomenclature)
+        path = (
+            select(anchor.path)
+            .where(anchor.goods_code.in_(codes), self._valid_on(anchor.valid_from, anchor.valid_to, as_of))
+            .order_by(func.length(anchor.goods_code).desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = await self.reader.execute(
+            select(GoodsNomenclature)
+            .where(
+                GoodsNomenclature.goods_code == any_(func.string_to_array(path, PATH_SEPARATOR)),
+                self._valid_on(GoodsNomenclature.valid_from, GoodsNomenclature.valid_to, as_of),
+            )
+            .order_by(func.length(GoodsNomenclature.path).desc())
+        )
+        return list(result.scalars().all())
+
+    async def get_children(
+        self, goods_code: str, as_of: date, lang: str = "EN"
+    ) -> list[tuple[GoodsNomenclature, str | None]]:
+        result = await self.reader.execute(
+            self._with_description(as_of, lang)
+            .where(
+                GoodsNomenclature.parent_goods_code == goods_code,
+                GoodsNomenclature.goods_code != goods_code,
+                self._valid_on(GoodsNomenclature.valid_from, GoodsNomenclature.valid_to, as_of),
+            )
+            .order_by(GoodsNomenclature.goods_code, GoodsNomenclature.suffix)
+        )
+        return [(row[0], row[1]) for row in result]
+
+    async def get_subtree(
+        self, path: str, as_of: date, limit: int, lang: str = "EN"
+    ) -> list[tuple[GoodsNomenclature, str | None]]:
+        """Descendants of the node at ``path``, depth-first in path order. The
+        prefix is matched as a byte-wise range (``~>=~`` / ``~<~``, the
+        ``text_pattern_ops`` operators) rather than a LIKE: range bounds stay
+        usable by the index when they are bind parameters, and no character
+        in the path can act as a wildcard."""
+        prefix = f"{path}{PATH_SEPARATOR}"
+        upper = prefix[:-1] + chr(ord(PATH_SEPARATOR) + 1)
+        result = await self.reader.execute(
+            self._with_description(as_of, lang)
+            .where(
+                GoodsNomenclature.path.op("~>=~", is_comparison=True)(prefix),
+                GoodsNomenclature.path.op("~<~", is_comparison=True)(upper),
+                self._valid_on(GoodsNomenclature.valid_from, GoodsNomenclature.valid_to, as_of),
+            )
+            .order_by(GoodsNomenclature.path)
+            .limit(limit)
+        )
+        return [(row[0], row[1]) for row in result]
+
     async def get_goods_description(self, goods_code: str, as_of: date, lang: str = "EN") -> GoodsDescription | None:
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(GoodsDescription).where(
                 GoodsDescription.goods_code == goods_code,
                 GoodsDescription.lang == lang,
@@ -56,8 +119,44 @@ class TaricRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_goods_descriptions(self, goods_codes: list[str], as_of: date, lang: str = "EN") -> dict[str, str]:
+        result = await self.reader.execute(
+            select(GoodsDescription.goods_code, GoodsDescription.description).where(
+                GoodsDescription.goods_code.in_(goods_codes),
+                GoodsDescription.lang == lang,
+                self._valid_on(GoodsDescription.valid_from, GoodsDescription.valid_to, as_of),
+            )
+        )
+        return {row.goods_code: row.description for row in result}
+
+    async def search_goods(
+        self, query: str, as_of: date, limit: int, lang: str = "EN"
+    ) -> list[tuple[str, str, float]]:
+        """Ranks descriptions by full-text match plus trigram word similarity,
+        so both whole words and partial or misspelt ones find candidates.
+        Both predicates are served by GIN indexes on ``goods_description``."""
+        tsquery = func.plainto_tsquery("english", query)
+        score = (
+            func.ts_rank_cd(GoodsDescription.search_vector, tsquery)
+            + func.word_similarity(query, GoodsDescription.description)
+        ).label("score")
+        result = await self.reader.execute(
+            select(GoodsDescription.goods_code, GoodsDescription.description, score)
+            .where(
+                GoodsDescription.lang == lang,
+                self._valid_on(GoodsDescription.valid_from, GoodsDescription.valid_to, as_of),
+                or_(
+                    GoodsDescription.search_vector.op("@@")(tsquery),
+                    literal(query).op("<%")(GoodsDescription.description),
+                ),
+            )
+            .order_by(score.desc(), GoodsDescription.goods_code)
+            .limit(limit)
+        )
+        return [(row.goods_code, row.description, float(row.score)) for row in result]
+
     async def get_measures(self, goods_codes: list[str], as_of: date) -> list[Measure]:
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(Measure).where(
                 Measure.goods_code.in_(goods_codes),
                 self._valid_on(Measure.valid_from, Measure.valid_to, as_of),
@@ -68,7 +167,7 @@ class TaricRepository:
     async def geo_applies(self, geo_code: str, origin: str, as_of: date) -> bool:
         if geo_code == origin or geo_code == "ERGA_OMNES":
             return True
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(GeoAreaMember).where(
                 GeoAreaMember.group_geo_code == geo_code,
                 GeoAreaMember.member_geo_code == origin,
@@ -80,7 +179,7 @@ class TaricRepository:
     async def get_measure_duty_expressions(self, measure_uids: list[str]) -> list[MeasureDutyExpression]:
         if not measure_uids:
             return []
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(MeasureDutyExpression).where(MeasureDutyExpression.measure_uid.in_(measure_uids))
         )
         return list(result.scalars().all())
@@ -88,13 +187,13 @@ class TaricRepository:
     async def get_duty_expressions(self, expression_ids: list[str]) -> list[DutyExpression]:
         if not expression_ids:
             return []
-        result = await self.session.execute(select(DutyExpression).where(DutyExpression.id.in_(expression_ids)))
+        result = await self.reader.execute(select(DutyExpression).where(DutyExpression.id.in_(expression_ids)))
         return list(result.scalars().all())
 
     async def get_measure_additional_codes(self, measure_uids: list[str]) -> list[MeasureAdditionalCode]:
         if not measure_uids:
             return []
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(MeasureAdditionalCode).where(MeasureAdditionalCode.measure_uid.in_(measure_uids))
         )
         return list(result.scalars().all())
@@ -106,7 +205,7 @@ class TaricRepository:
             and_(AdditionalCode.code_type == code_type, AdditionalCode.code == code)
             for code_type, code in codes
         ]
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(AdditionalCode).where(or_(*filters), self._valid_on(AdditionalCode.valid_from, AdditionalCode.valid_to, as_of))
         )
         return list(result.scalars().all())
@@ -114,7 +213,7 @@ class TaricRepository:
     async def get_measure_conditions(self, measure_uids: list[str]) -> list[MeasureCondition]:
         if not measure_uids:
             return []
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(MeasureCondition).where(MeasureCondition.measure_uid.in_(measure_uids))
         )
         return list(result.scalars().all())
@@ -122,11 +221,11 @@ class TaricRepository:
     async def get_regulations(self, refs: list[str]) -> list[Regulation]:
         if not refs:
             return []
-        result = await self.session.execute(select(Regulation).where(Regulation.regulation_ref.in_(refs)))
+        result = await self.reader.execute(select(Regulation).where(Regulation.regulation_ref.in_(refs)))
         return list(result.scalars().all())
 
     async def get_cached(self, snapshot_date: date, goods_code: str, origin: str, as_of: date, additional_code: str | None):
-        result = await self.session.execute(
+        result = await self.reader.execute(
             select(TaricResolvedCache).where(
                 TaricResolvedCache.snapshot_date == snapshot_date,
                 TaricResolvedCache.goods_code == goods_code,
@@ -143,6 +242,16 @@ class TaricRepository:
         await self.session.refresh(cache)
         return cache
 
+    def _with_description(self, as_of: date, lang: str):
+        return select(GoodsNomenclature, GoodsDescription.description).outerjoin(
+            GoodsDescription,
+            and_(
+                GoodsDescription.goods_code == GoodsNomenclature.goods_code,
+                GoodsDescription.lang == lang,
+                self._valid_on(GoodsDescription.valid_from, GoodsDescription.valid_to, as_of),
+            ),
+        )
+
     def _valid_on(self, from_col, to_col, as_of: date):
         return and_(
             or_(from_col.is_(None), from_col <= as_of),
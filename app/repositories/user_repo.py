@@ -4,6 +4,7 @@ import uuid
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.principal import principal_cache
 from app.models.user import User
 
 
@@ -26,3 +27,14 @@ class UserRepository:
         await self.session.commit()
         await self.session.refresh(user)
         return user
+
+    async def update(self, user: User) -> User:
+        await self.session.commit()
+        await self.session.refresh(user)
+        await principal_cache.revoke(str(user.id))
+        return user
+
+    async def delete(self, user: User) -> None:
+        await self.session.delete(user)
+        await self.session.commit()
+        await principal_cache.revoke(str(user.id))
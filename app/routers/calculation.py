@@ -2,17 +2,47 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends
 
-from app.core.deps import get_current_user, get_db_session
-from app.schemas.calculation import CalculationResponse
-from app.services.calculator import CalculatorService
+from app.core.deps import get_current_user, get_db_session, get_read_db_session
+from app.core.rate_limit import rate_limit
+from app.schemas.calculation import CalculationBatchRequest, CalculationBatchResponse, CalculationResponse
+from app.services.calculator import CalculationResult, CalculatorService
 
 router = APIRouter(prefix="/shipments", tags=["calculation"])
 
 
-@router.post("/{shipment_id}/calculate", response_model=CalculationResponse)
-async def calculate(shipment_id: str, user=Depends(get_current_user), session=Depends(get_db_session)):
-    service = CalculatorService(session)
+@router.post(
+    "/{shipment_id}/calculate",
+    response_model=CalculationResponse,
+    dependencies=[Depends(rate_limit("calculate"))],
+)
+async def calculate(
+    shipment_id: str,
+    user=Depends(get_current_user),
+    session=Depends(get_db_session),
+    read_session=Depends(get_read_db_session),
+):
+    service = CalculatorService(session, read_session=read_session)
     result = await service.calculate(shipment_id, user.id)
+    return _to_response(result)
+
+
+@router.post(
+    "/calculate",
+    response_model=CalculationBatchResponse,
+    dependencies=[Depends(rate_limit("calculate"))],
+)
+async def calculate_batch(
+    payload: CalculationBatchRequest,
+    user=Depends(get_current_user),
+    session=Depends(get_db_session),
+    read_session=Depends(get_read_db_session),
+):
+    service = CalculatorService(session, read_session=read_session)
+    results = await service.calculate_many(payload.shipment_ids, user.id)
+    return CalculationBatchResponse(results={key: _to_response(result) for key, result in results.items()})
+
+
+def _to_response(result: CalculationResult) -> CalculationResponse:
     return CalculationResponse(
         status=result.status,
         required_fields=result.required_fields,
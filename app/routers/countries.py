@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_db_session
+from app.core.deps import get_read_db_session
 from app.models.country import Country
 from app.schemas.country import CountryList
 
@@ -12,6 +12,6 @@ router = APIRouter(prefix="/countries", tags=["countries"])
 
 
 @router.get("", response_model=CountryList)
-async def list_countries(session: AsyncSession = Depends(get_db_session)):
+async def list_countries(session: AsyncSession = Depends(get_read_db_session)):
     result = await session.execute(select(Country).order_by(Country.region, Country.name))
     return CountryList(countries=list(result.scalars().all()))
@@ -1,137 +1,272 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
+import zipfile
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import exists, select
 from sqlalchemy.orm import selectinload
 
 from app.core.config import get_settings
-from app.core.deps import get_current_user, get_db_session
-from app.invoices.openai_extractor import extract_invoice, _normalize_decimal, _parse_date
+from app.core.deps import get_current_user, get_db_session, get_read_db_session
+from app.core.metrics import INVOICE_EXTRACTIONS
+from app.core.pagination import PageParams, check_fields, keyset_page, page_params, render_page
+from app.core.rate_limit import rate_limit
+from app.invoices import extractors
+from app.invoices.batch import SUPPORTED_SUFFIXES, declared_size, iter_documents
+from app.invoices.conversion import InvoiceConversionError, convert_invoice
+from app.invoices.extraction import apply_extraction, find_cached_extraction, normalize_currency, normalize_incoterm
+from app.invoices.items import InvoiceItemError, apply_item_changes
+from app.invoices.openai_extractor import _normalize_decimal
+from app.invoices.storage import store_document, store_upload
+from app.invoices.worker import extraction_worker
 from app.models.invoice import Invoice, InvoiceItem, InvoiceStatus
-from app.schemas.invoice import InvoiceRead, InvoiceAssignRequest, InvoiceReviewUpdate, InvoiceUpdate
+from app.schemas.invoice import (
+    InvoiceAssignRequest,
+    InvoiceBatchFile,
+    InvoiceBatchRead,
+    InvoiceExtractionStatus,
+    InvoiceItemChanges,
+    InvoiceItemRead,
+    InvoiceItemsPatch,
+    InvoiceRead,
+    InvoiceReviewUpdate,
+    InvoiceShipmentCreate,
+    InvoiceShipmentRead,
+    InvoiceUpdate,
+)
+from app.schemas.calculation import CalculationResponse
+from app.schemas.shipment import ShipmentItemImportError, ShipmentRead
+from app.schemas.taric import HsSuggestionList
+from app.services.calculator import CalculatorService
+from app.services.hs_search import suggest_codes
+from app.services.item_import import ItemImportError
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
+MAX_STATUS_WAIT_SECONDS = 30
+STATUS_POLL_SECONDS = 1.0
 
-@router.post("/upload", response_model=InvoiceRead)
+
+@router.post(
+    "/upload",
+    response_model=InvoiceRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("invoice_upload"))],
+)
 async def upload_invoice(
+    response: Response,
     file: UploadFile = File(...),
     user=Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session),
 ):
+    """Stores the file and queues it for extraction. The invoice is returned
+    as UPLOADED; poll ``GET /invoices/{id}/status`` until it is EXTRACTED.
+
+    A document already extracted by the current extractor version is not sent
+    again: the stored result is copied and the invoice comes back EXTRACTED
+    with a 200."""
     settings = get_settings()
     suffix = Path(file.filename).suffix.lower()
-    if suffix not in {".pdf", ".docx"}:
+    if suffix not in SUPPORTED_SUFFIXES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only PDF or DOCX allowed")
 
+    stored_path, content_hash = await store_upload(file, Path(settings.upload_dir), suffix, settings.max_upload_bytes)
+    invoice = await _register_upload(session, user.id, stored_path, content_hash, file.filename)
+    await session.commit()
+    if invoice.status == InvoiceStatus.UPLOADED:
+        extraction_worker.notify()
+        return invoice
+
+    response.status_code = status.HTTP_200_OK
+    result = await session.execute(
+        select(Invoice).where(Invoice.id == invoice.id).options(selectinload(Invoice.items))
+    )
+    return result.scalar_one()
+
+
+@router.post(
+    "/upload/batch",
+    response_model=InvoiceBatchRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("invoice_upload"))],
+)
+async def upload_invoice_batch(
+    files: list[UploadFile] = File(...),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """Queues many invoices at once. Accepts PDF/DOCX files and ZIP archives
+    of them; every document is reported with its invoice id or the reason it
+    was rejected. Follow progress with ``GET /invoices/batches/{batch_id}``."""
+    settings = get_settings()
+    if declared_size(files, settings.max_upload_bytes) > settings.invoice_batch_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch expands beyond the {settings.invoice_batch_max_bytes} byte limit",
+        )
+    batch_id = uuid.uuid4()
     upload_dir = Path(settings.upload_dir)
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    file_id = uuid.uuid4()
-    stored_path = upload_dir / f"{file_id}{suffix}"
-    stored_path.write_bytes(await file.read())
+    entries: list[InvoiceBatchFile] = []
+    # Declared sizes can lie; the copies are held to what is left of the limit.
+    remaining = settings.invoice_batch_max_bytes
+    documents = iter_documents(files, settings.invoice_batch_max_files, settings.max_upload_bytes)
+    for document in documents:
+        if document.error is not None:
+            entries.append(InvoiceBatchFile(filename=document.filename, error=document.error))
+            continue
+        try:
+            stored_path, content_hash = await store_document(
+                document.source,
+                document.filename,
+                upload_dir,
+                document.suffix,
+                min(settings.max_upload_bytes, remaining),
+            )
+        except HTTPException as exc:
+            entries.append(InvoiceBatchFile(filename=document.filename, error=str(exc.detail)))
+            continue
+        except (OSError, zipfile.BadZipFile):
+            entries.append(InvoiceBatchFile(filename=document.filename, error="Unreadable file"))
+            continue
+        remaining -= stored_path.stat().st_size
+        invoice = await _register_upload(session, user.id, stored_path, content_hash, document.filename, batch_id)
+        entries.append(InvoiceBatchFile(filename=document.filename, invoice_id=invoice.id, status=invoice.status))
+    await session.commit()
+    if any(entry.status == InvoiceStatus.UPLOADED for entry in entries):
+        extraction_worker.notify()
+    return InvoiceBatchRead.build(batch_id, entries)
 
-    try:
-        extracted = await extract_invoice(stored_path, "pdf" if suffix == ".pdf" else "docx")
-    except RuntimeError as exc:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
 
-    currency = _normalize_currency(extracted.get("currency"))
-    incoterm = _normalize_incoterm(extracted.get("incoterm"))
+@router.get("/batches/{batch_id}", response_model=InvoiceBatchRead)
+async def get_invoice_batch(
+    batch_id: uuid.UUID,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    result = await session.execute(
+        select(Invoice.id, Invoice.source_filename, Invoice.status, Invoice.extraction_error)
+        .where(Invoice.batch_id == batch_id, Invoice.user_id == user.id)
+        .order_by(Invoice.created_at, Invoice.id)
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    entries = [
+        InvoiceBatchFile(
+            filename=row.source_filename or "", invoice_id=row.id, status=row.status, error=row.extraction_error
+        )
+        for row in rows
+    ]
+    return InvoiceBatchRead.build(batch_id, entries)
+
+
+async def _register_upload(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    stored_path: Path,
+    content_hash: str,
+    filename: str | None,
+    batch_id: uuid.UUID | None = None,
+) -> Invoice:
+    """Adds the invoice for a stored document, filled in straight away from a
+    cached extraction when one exists, otherwise left UPLOADED for the worker."""
+    file_type = stored_path.suffix.lstrip(".")
+    cached = await find_cached_extraction(session, user_id, content_hash, extractors.extraction_versions(file_type))
     invoice = Invoice(
-        user_id=user.id,
+        user_id=user_id,
         file_path=str(stored_path),
-        file_type=suffix.replace(".", ""),
-        invoice_number=extracted.get("invoice_number"),
-        invoice_date=_parse_date(extracted.get("invoice_date")),
-        supplier_name=extracted.get("supplier_name"),
-        buyer_name=extracted.get("buyer_name"),
-        buyer_address=extracted.get("buyer_address"),
-        seller_address=extracted.get("seller_address"),
-        buyer_eori=extracted.get("buyer_eori"),
-        seller_eori=extracted.get("seller_eori"),
-        incoterm=incoterm,
-        currency=currency,
-        subtotal=_normalize_decimal(extracted.get("subtotal")),
-        freight=_normalize_decimal(extracted.get("freight")),
-        insurance=_normalize_decimal(extracted.get("insurance")),
-        tax_total=_normalize_decimal(extracted.get("tax_total")),
-        total=_normalize_decimal(extracted.get("total")),
-        extracted_payload=extracted,
-        status=InvoiceStatus.EXTRACTED,
+        file_type=file_type,
+        source_filename=(filename or "")[:255] or None,
+        content_hash=content_hash,
+        batch_id=batch_id,
+        status=InvoiceStatus.UPLOADED,
+        items=[],
     )
     session.add(invoice)
-    await session.flush()
-
-    for item in extracted.get("items", []):
-        session.add(
-            InvoiceItem(
-                invoice_id=invoice.id,
-                description=item.get("description", ""),
-                hs_code=item.get("hs_code"),
-                origin_country=item.get("origin_country"),
-                vat_code=item.get("vat_code"),
-                pack_count=_normalize_decimal(item.get("pack_count")),
-                pack_type=item.get("pack_type"),
-                net_weight=_normalize_decimal(item.get("net_weight")),
-                gross_weight=_normalize_decimal(item.get("gross_weight")),
-                quantity=_normalize_decimal(item.get("quantity")),
-                unit_price=_normalize_decimal(item.get("unit_price")),
-                total_price=_normalize_decimal(item.get("total_price")),
-            )
-        )
+    if cached is not None:
+        await session.flush()
+        apply_extraction(session, invoice, *cached)
+        INVOICE_EXTRACTIONS.labels(outcome="cached").inc()
+    return invoice
 
-    await session.commit()
+
+@router.get("/{invoice_id}/status", response_model=InvoiceExtractionStatus)
+async def get_extraction_status(
+    invoice_id: uuid.UUID,
+    wait: float = Query(default=0, ge=0, le=MAX_STATUS_WAIT_SECONDS, description="Long-poll up to this many seconds"),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    stmt = select(Invoice.id, Invoice.status, Invoice.extraction_attempts, Invoice.extraction_error).where(
+        Invoice.id == invoice_id, Invoice.user_id == user.id
+    )
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        row = (await session.execute(stmt)).one_or_none()
+        # End the read transaction so the connection goes back to the pool while waiting.
+        await session.rollback()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
+        remaining = deadline - loop.time()
+        if row.status != InvoiceStatus.UPLOADED or remaining <= 0:
+            return InvoiceExtractionStatus.model_validate(row)
+        await asyncio.sleep(min(STATUS_POLL_SECONDS, remaining))
+
+
+@router.post("/{invoice_id}/extract", response_model=InvoiceRead, status_code=status.HTTP_202_ACCEPTED)
+async def retry_extraction(
+    invoice_id: uuid.UUID,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """Re-queues an invoice whose extraction FAILED."""
     result = await session.execute(
-        select(Invoice).where(Invoice.id == invoice.id).options(selectinload(Invoice.items))
+        select(Invoice).where(Invoice.id == invoice_id, Invoice.user_id == user.id).options(selectinload(Invoice.items))
     )
-    return result.scalar_one()
-
-
-def _normalize_currency(value: str | None) -> str | None:
-    if not value:
-        return None
-    val = value.strip().upper()
-    symbols = {
-        "£": "GBP",
-        "€": "EUR",
-        "$": "USD",
-    }
-    if val in symbols:
-        return symbols[val]
-    if val in {"GBP", "EUR", "USD"}:
-        return val
-    for symbol, code in symbols.items():
-        if symbol in val:
-            return code
-    alpha = "".join(ch for ch in val if ch.isalpha())
-    if len(alpha) >= 3:
-        return alpha[:3]
-    return None
-
-
-def _normalize_incoterm(value: str | None) -> str | None:
-    if not value:
-        return None
-    val = value.strip().upper()
-    known = {"EXW", "FOB", "CIF", "DDP", "FCA", "CPT", "CIP", "DAP"}
-    for term in known:
-        if term in val:
-            return term
-    # fallback to first 3-4 chars
-    alpha = "".join(ch for ch in val if ch.isalpha())
-    return alpha[:4] if len(alpha) >= 4 else (alpha or None)
+    invoice = result.scalar_one_or_none()
+    if not invoice:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
+    if invoice.status != InvoiceStatus.FAILED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only failed extractions can be retried")
+    invoice.status = InvoiceStatus.UPLOADED
+    invoice.extraction_attempts = 0
+    invoice.extraction_error = None
+    invoice.extraction_available_at = None
+    await session.commit()
+    extraction_worker.notify()
+    return invoice
 
 
 @router.get("", response_model=list[InvoiceRead])
-async def list_invoices(user=Depends(get_current_user), session: AsyncSession = Depends(get_db_session)):
-    result = await session.execute(
-        select(Invoice).where(Invoice.user_id == user.id).options(selectinload(Invoice.items))
-    )
-    return list(result.scalars().all())
+async def list_invoices(
+    status_filter: InvoiceStatus | None = Query(default=None, alias="status"),
+    shipment_id: uuid.UUID | None = None,
+    hs_code: str | None = None,
+    page: PageParams = Depends(page_params),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_db_session),
+):
+    check_fields(page, InvoiceRead)
+    stmt = select(Invoice).where(Invoice.user_id == user.id)
+    if status_filter:
+        stmt = stmt.where(Invoice.status == status_filter)
+    if shipment_id:
+        stmt = stmt.where(Invoice.shipment_id == shipment_id)
+    if hs_code:
+        stmt = stmt.where(
+            exists().where(InvoiceItem.invoice_id == Invoice.id, InvoiceItem.hs_code.startswith(hs_code, autoescape=True))
+        )
+    # Items are only loaded when they will be returned.
+    if page.fields is None or "items" in page.fields:
+        stmt = stmt.options(selectinload(Invoice.items))
+    result = await session.execute(keyset_page(stmt, Invoice, page, page.fields))
+    return render_page(result.scalars().all(), InvoiceRead, page)
 
 
 @router.get("/{invoice_id}", response_model=InvoiceRead)
@@ -171,9 +306,7 @@ async def update_invoice(
     user=Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session),
 ):
-    result = await session.execute(
-        select(Invoice).where(Invoice.id == invoice_id, Invoice.user_id == user.id).options(selectinload(Invoice.items))
-    )
+    result = await session.execute(select(Invoice).where(Invoice.id == invoice_id, Invoice.user_id == user.id))
     invoice = result.scalar_one_or_none()
     if not invoice:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
@@ -183,51 +316,76 @@ async def update_invoice(
 
     for key, value in data.items():
         if key == "currency":
-            value = _normalize_currency(value)
+            value = normalize_currency(value)
         if key == "incoterm":
-            value = _normalize_incoterm(value)
+            value = normalize_incoterm(value)
         setattr(invoice, key, value)
 
     if items is not None:
-        # replace items list
-        for existing in list(invoice.items):
-            await session.delete(existing)
-        passport_map = {}
-        from app.models.passport import PassportItem
-        passport_ids = [i.get("passport_item_id") for i in items if i.get("passport_item_id")]
-        if passport_ids:
-            result = await session.execute(
-                select(PassportItem).where(PassportItem.user_id == user.id, PassportItem.id.in_(passport_ids))
-            )
-            passport_map = {str(p.id): p for p in result.scalars().all()}
-
-        for item in items:
-            passport_item = passport_map.get(str(item.get("passport_item_id"))) if item.get("passport_item_id") else None
-            session.add(
-                InvoiceItem(
-                    invoice_id=invoice.id,
-                    description=item.get("description") or (passport_item.name if passport_item else ""),
-                    hs_code=item.get("hs_code") or (passport_item.hs_code if passport_item else None),
-                    origin_country=item.get("origin_country"),
-                    vat_code=item.get("vat_code"),
-                    passport_item_id=item.get("passport_item_id"),
-                    pack_count=_normalize_decimal(item.get("pack_count")),
-                    pack_type=item.get("pack_type"),
-                    net_weight=_normalize_decimal(item.get("net_weight")),
-                    gross_weight=_normalize_decimal(item.get("gross_weight")),
-                    quantity=_normalize_decimal(item.get("quantity")),
-                    unit_price=_normalize_decimal(item.get("unit_price")),
-                    total_price=_normalize_decimal(item.get("total_price")),
-                )
-            )
+        try:
+            await apply_item_changes(session, invoice.id, user.id, items, replace=True)
+        except InvoiceItemError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
 
     await session.commit()
     result = await session.execute(
-        select(Invoice).where(Invoice.id == invoice.id).options(selectinload(Invoice.items))
+        select(Invoice)
+        .where(Invoice.id == invoice.id)
+        .options(selectinload(Invoice.items))
+        .execution_options(populate_existing=True)
     )
     return result.scalar_one()
 
 
+@router.patch("/{invoice_id}/items", response_model=InvoiceItemChanges)
+async def patch_invoice_items(
+    invoice_id: uuid.UUID,
+    payload: InvoiceItemsPatch,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """Edits individual lines without resending the whole list and returns
+    only the lines that were created, changed or deleted."""
+    owned = await session.scalar(select(exists().where(Invoice.id == invoice_id, Invoice.user_id == user.id)))
+    if not owned:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
+    items = [item.model_dump(exclude_unset=True) for item in payload.items]
+    try:
+        changes = await apply_item_changes(session, invoice_id, user.id, items, payload.delete)
+    except InvoiceItemError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    await session.commit()
+
+    rows: dict[uuid.UUID, InvoiceItem] = {}
+    if changes.changed:
+        result = await session.execute(select(InvoiceItem).where(InvoiceItem.id.in_(changes.changed)))
+        rows = {item.id: item for item in result.scalars()}
+    return InvoiceItemChanges(
+        created=[InvoiceItemRead.model_validate(rows[i]) for i in changes.created],
+        updated=[InvoiceItemRead.model_validate(rows[i]) for i in changes.updated],
+        deleted=changes.deleted,
+    )
+
+
+@router.get("/{invoice_id}/items/{item_id}/hs-suggestions", response_model=HsSuggestionList)
+async def suggest_item_hs_codes(
+    invoice_id: uuid.UUID,
+    item_id: uuid.UUID,
+    limit: int = Query(default=10, ge=1, le=50),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_db_session),
+):
+    result = await session.execute(
+        select(InvoiceItem.description)
+        .join(Invoice, Invoice.id == InvoiceItem.invoice_id)
+        .where(InvoiceItem.id == item_id, InvoiceItem.invoice_id == invoice_id, Invoice.user_id == user.id)
+    )
+    description = result.scalar_one_or_none()
+    if description is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice item not found")
+    return await suggest_codes(session, description, limit)
+
+
 @router.post("/assign", response_model=InvoiceRead)
 async def assign_invoice_to_shipment(
     shipment_id: uuid.UUID,
@@ -247,6 +405,63 @@ async def assign_invoice_to_shipment(
     return result.scalar_one()
 
 
+@router.post("/{invoice_id}/shipment", response_model=InvoiceShipmentRead, status_code=status.HTTP_201_CREATED)
+async def create_shipment_from_invoice(
+    invoice_id: uuid.UUID,
+    payload: InvoiceShipmentCreate,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+    read_session: AsyncSession = Depends(get_read_db_session),
+):
+    """Creates a shipment from the invoice in one transaction: header and
+    costs (freight, insurance) from the invoice, every line as an item, and
+    the invoice linked to it. With ``calculate`` the new shipment is also
+    calculated. Invalid lines are reported by line number; unless
+    ``skip_invalid`` is set nothing is created when any line fails."""
+    result = await session.execute(
+        select(Invoice).where(Invoice.id == invoice_id, Invoice.user_id == user.id).options(selectinload(Invoice.items))
+    )
+    invoice = result.scalar_one_or_none()
+    if not invoice:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
+    if invoice.shipment_id is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Invoice is already assigned to a shipment")
+
+    try:
+        conversion = await convert_invoice(
+            session,
+            invoice,
+            user.id,
+            payload.direction,
+            get_settings().shipment_item_import_max_rows,
+            destination_country=payload.destination_country,
+            origin_country_default=payload.origin_country_default,
+            incoterm=payload.incoterm,
+            currency=payload.currency,
+            import_date=payload.import_date,
+            skip_invalid=payload.skip_invalid,
+        )
+    except (InvoiceConversionError, ItemImportError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    response = InvoiceShipmentRead(
+        shipment=ShipmentRead.model_validate(conversion.shipment),
+        imported=conversion.items.imported,
+        item_ids=conversion.items.item_ids,
+        errors=[ShipmentItemImportError.model_validate(e, from_attributes=True) for e in conversion.items.errors],
+    )
+    if conversion.items.errors and not payload.skip_invalid:
+        await session.rollback()
+        return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content=response.model_dump(mode="json"))
+    await session.commit()
+
+    if payload.calculate:
+        service = CalculatorService(session, read_session=read_session)
+        calculation = await service.calculate(conversion.shipment.id, user.id)
+        response.calculation = CalculationResponse.model_validate(calculation, from_attributes=True)
+        response.shipment = ShipmentRead.model_validate(conversion.shipment)
+    return response
+
+
 @router.post("/{invoice_id}/items/from-passport", response_model=InvoiceRead)
 async def add_invoice_item_from_passport(
     invoice_id: uuid.UUID,
@@ -9,7 +9,9 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.core.deps import get_current_user, get_db_session
+from app.core.deps import get_current_user, get_db_session, get_read_db_session
+from app.core.pagination import PageParams, check_fields, keyset_page, page_params, render_page
+from app.core.uploads import save_upload
 from app.models.license import License, ShipmentLicense
 from app.schemas.license import LicenseRead, LicenseAssignRequest, LicenseBulkAssignRequest
 
@@ -32,11 +34,8 @@ async def upload_license(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type")
 
     settings = get_settings()
-    upload_dir = Path(settings.upload_dir) / "licenses"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    file_id = uuid.uuid4()
-    stored_path = upload_dir / f"{file_id}{suffix}"
-    stored_path.write_bytes(await file.read())
+    stored_path = Path(settings.upload_dir) / "licenses" / f"{uuid.uuid4()}{suffix}"
+    await save_upload(file, stored_path, settings.max_upload_bytes)
 
     parsed_date = date.fromisoformat(expires_on) if expires_on else None
 
@@ -57,9 +56,18 @@ async def upload_license(
 
 
 @router.get("", response_model=list[LicenseRead])
-async def list_licenses(user=Depends(get_current_user), session: AsyncSession = Depends(get_db_session)):
-    result = await session.execute(select(License).where(License.user_id == user.id))
-    return list(result.scalars().all())
+async def list_licenses(
+    license_type: str | None = None,
+    page: PageParams = Depends(page_params),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_db_session),
+):
+    check_fields(page, LicenseRead)
+    stmt = select(License).where(License.user_id == user.id)
+    if license_type:
+        stmt = stmt.where(License.license_type == license_type)
+    result = await session.execute(keyset_page(stmt, License, page, page.fields))
+    return render_page(result.scalars().all(), LicenseRead, page)
 
 
 @router.post("/assign", response_model=LicenseRead)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_current_user, get_db_session
+from app.core.deps import get_current_user, get_db_session, get_read_db_session
+from app.core.pagination import PageParams, check_fields, keyset_page, page_params, render_page
 from app.models.passport import PassportItem
 from app.schemas.passport import PassportItemCreate, PassportItemRead, PassportItemUpdate
+from app.schemas.taric import HsSuggestionList
+from app.services.hs_search import suggest_codes
 
 router = APIRouter(prefix="/passport", tags=["passport"])
 
@@ -26,9 +29,21 @@ async def create_item(
 
 
 @router.get("", response_model=list[PassportItemRead])
-async def list_items(user=Depends(get_current_user), session: AsyncSession = Depends(get_db_session)):
-    result = await session.execute(select(PassportItem).where(PassportItem.user_id == user.id))
-    return list(result.scalars().all())
+async def list_items(
+    hs_code: str | None = None,
+    supplier: str | None = None,
+    page: PageParams = Depends(page_params),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_db_session),
+):
+    check_fields(page, PassportItemRead)
+    stmt = select(PassportItem).where(PassportItem.user_id == user.id)
+    if hs_code:
+        stmt = stmt.where(PassportItem.hs_code.startswith(hs_code, autoescape=True))
+    if supplier:
+        stmt = stmt.where(PassportItem.supplier == supplier)
+    result = await session.execute(keyset_page(stmt, PassportItem, page, page.fields))
+    return render_page(result.scalars().all(), PassportItemRead, page)
 
 
 @router.get("/{item_id}", response_model=PassportItemRead)
@@ -42,6 +57,22 @@ async def get_item(item_id: uuid.UUID, user=Depends(get_current_user), session:
     return item
 
 
+@router.get("/{item_id}/hs-suggestions", response_model=HsSuggestionList)
+async def suggest_hs_codes(
+    item_id: uuid.UUID,
+    limit: int = Query(default=10, ge=1, le=50),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_db_session),
+):
+    result = await session.execute(
+        select(PassportItem.name).where(PassportItem.id == item_id, PassportItem.user_id == user.id)
+    )
+    name = result.scalar_one_or_none()
+    if name is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Passport item not found")
+    return await suggest_codes(session, name, limit)
+
+
 @router.patch("/{item_id}", response_model=PassportItemRead)
 async def update_item(
     item_id: uuid.UUID,
@@ -1,40 +1,51 @@
 from __future__ import annotations
 
+from datetime import date
+
 from fastapi import APIRouter, Depends
 
-from app.core.deps import get_db_session
+from app.core.deps import get_db_session, get_read_db_session
 from app.schemas.rates import FxRateResponse, TariffRateResponse, VatRateResponse
 from app.services.providers.eu_taric import EuTaricProvider
 from app.services.providers.fx_ecb import FxProvider
 from app.services.providers.uk_tariff import UkTariffProvider
 from app.services.providers.uk_tariff_search import UkTariffSearchProvider
-from app.services.providers.vat import VatRateProvider
+from app.services.providers.vat import VatRateProvider, load_vat_table, publish_vat_refresh
 
 router = APIRouter(prefix="/rates", tags=["rates"])
+admin_router = APIRouter(prefix="/admin/vat", tags=["vat-admin"])
 
 
 @router.get("/fx", response_model=FxRateResponse)
-async def fx_rate(base: str, quote: str, session=Depends(get_db_session)):
+async def fx_rate(base: str, quote: str, as_of: date | None = None, session=Depends(get_db_session)):
+    # Stays on the primary: a fresh ECB fetch is persisted to fx_rates_daily.
     provider = FxProvider(session)
-    result = await provider.get_rate(base, quote)
-    return FxRateResponse(base=base, quote=quote, rate=result.rate, source=result.source)
+    result = await provider.get_rate(base, quote, as_of=as_of)
+    return FxRateResponse(base=base, quote=quote, rate=result.rate, source=result.source, rate_date=result.rate_date)
 
 
 @router.get("/vat", response_model=VatRateResponse)
-async def vat_rate(country: str, session=Depends(get_db_session)):
+async def vat_rate(country: str, session=Depends(get_read_db_session)):
     provider = VatRateProvider(session)
     result = await provider.get_standard_rate(country)
     return VatRateResponse(country=country, rate=result.rate, source=result.source)
 
 
+@admin_router.post("/refresh")
+async def refresh_vat_table():
+    table = await load_vat_table()
+    await publish_vat_refresh()
+    return {"status": "ok", "countries": len(table.countries), "loaded_at": table.loaded_at.isoformat()}
+
+
 @router.get("/tariff/uk", response_model=TariffRateResponse)
-async def uk_tariff(commodity_code: str, session=Depends(get_db_session)):
+async def uk_tariff(commodity_code: str, session=Depends(get_read_db_session)):
     provider = UkTariffProvider(session)
     result = await provider.get_duty_rate(None, commodity_code, None, False)
     return TariffRateResponse(code=commodity_code, rate=result.rate, source=result.source, is_estimated=result.is_estimated)
 
 @router.get("/tariff/uk/commodity")
-async def uk_tariff_commodity(commodity_code: str, session=Depends(get_db_session)):
+async def uk_tariff_commodity(commodity_code: str, session=Depends(get_read_db_session)):
     provider = UkTariffProvider(session)
     payload = await provider.get_commodity_details(commodity_code)
     return payload
@@ -48,7 +59,7 @@ async def uk_tariff_search(description: str):
 
 
 @router.get("/tariff/eu", response_model=TariffRateResponse)
-async def eu_tariff(hs_code: str, origin: str | None = None, session=Depends(get_db_session)):
+async def eu_tariff(hs_code: str, origin: str | None = None, session=Depends(get_read_db_session)):
     provider = EuTaricProvider(session)
     result = await provider.get_duty_rate(hs_code, origin, False)
     return TariffRateResponse(code=hs_code, rate=result.rate, source=result.source, is_estimated=result.is_estimated)
@@ -2,18 +2,26 @@ from __future__ import annotations
 
 import uuid
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
+from itertools import islice
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from sqlalchemy import select
 
-from app.core.deps import get_current_user, get_db_session
+from app.core.config import get_settings
+from app.core.deps import get_current_user, get_db_session, get_read_db_session
+from app.core.pagination import PageParams, check_fields, page_params, render_page
+from app.models.enums import Direction, ShipmentStatus
 from app.models.shipment import Shipment
 from app.models.shipment_costs import ShipmentCosts
 from app.models.shipment_item import ShipmentItem
 from app.repositories.shipment_repo import ShipmentRepository
+from app.services.item_import import ItemImportError, import_items, iter_json, iter_upload
 from app.schemas.shipment import (
     ShipmentCreate,
     ShipmentDetail,
     ShipmentItemCreate,
+    ShipmentItemImportResult,
     ShipmentItemRead,
     ShipmentItemUpdate,
     ShipmentList,
@@ -46,10 +54,18 @@ async def create_shipment(
 
 
 @router.get("", response_model=ShipmentList)
-async def list_shipments(user=Depends(get_current_user), session=Depends(get_db_session)):
+async def list_shipments(
+    status_filter: ShipmentStatus | None = Query(default=None, alias="status"),
+    direction: Direction | None = None,
+    hs_code: str | None = None,
+    page: PageParams = Depends(page_params),
+    user=Depends(get_current_user),
+    session=Depends(get_read_db_session),
+):
+    check_fields(page, ShipmentRead)
     repo = ShipmentRepository(session)
-    shipments = await repo.list(user.id)
-    return ShipmentList(shipments=shipments)
+    shipments = await repo.list(user.id, page, status=status_filter, direction=direction, hs_code=hs_code)
+    return render_page(shipments, ShipmentRead, page, wrap="shipments")
 
 
 @router.get("/{shipment_id}", response_model=ShipmentDetail)
@@ -69,7 +85,7 @@ async def update_shipment(
     session=Depends(get_db_session),
 ):
     repo = ShipmentRepository(session)
-    shipment = await repo.get(shipment_id, user.id)
+    shipment = await repo.get(shipment_id, user.id, with_items=False)
     if not shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
 
@@ -78,6 +94,10 @@ async def update_shipment(
         if key == "import_date":
             value = _parse_date(value)
         setattr(shipment, key, value)
+    if {"currency", "import_date"} & data.keys():
+        # Pinned rates were resolved for the old currency/date.
+        shipment.fx_rate_to_gbp = None
+        shipment.fx_rate_to_eur = None
     return await repo.update(shipment)
 
 
@@ -99,7 +119,7 @@ async def upsert_costs(
     session=Depends(get_db_session),
 ):
     repo = ShipmentRepository(session)
-    shipment = await repo.get(shipment_id, user.id)
+    shipment = await repo.get(shipment_id, user.id, with_items=False)
     if not shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
 
@@ -113,11 +133,10 @@ async def upsert_costs(
 
 @router.get("/{shipment_id}/costs", response_model=ShipmentCostsRead)
 async def get_costs(shipment_id: str, user=Depends(get_current_user), session=Depends(get_db_session)):
-    repo = ShipmentRepository(session)
-    shipment = await repo.get(shipment_id, user.id)
-    if not shipment or not shipment.costs:
+    costs = await ShipmentRepository(session).get_costs(shipment_id, user.id)
+    if not costs:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Costs not found")
-    return shipment.costs
+    return costs
 
 
 @router.post("/{shipment_id}/items", response_model=ShipmentItemRead)
@@ -128,7 +147,7 @@ async def add_item(
     session=Depends(get_db_session),
 ):
     repo = ShipmentRepository(session)
-    shipment = await repo.get(shipment_id, user.id)
+    shipment = await repo.get(shipment_id, user.id, with_items=False)
     if not shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
 
@@ -170,7 +189,7 @@ async def add_item_from_passport(
     session=Depends(get_db_session),
 ):
     repo = ShipmentRepository(session)
-    shipment = await repo.get(shipment_id, user.id)
+    shipment = await repo.get(shipment_id, user.id, with_items=False)
     if not shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
 
@@ -195,6 +214,51 @@ async def add_item_from_passport(
     return await repo.add_item(item)
 
 
+@router.post("/{shipment_id}/items/import", response_model=ShipmentItemImportResult)
+async def import_items_bulk(
+    shipment_id: str,
+    request: Request,
+    skip_invalid: bool = False,
+    user=Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    """Adds many items at once from a CSV/XLSX upload (multipart ``file``) or a
+    JSON array body. Invalid rows are reported by row number; unless
+    ``skip_invalid`` is set, nothing is imported when any row fails."""
+    repo = ShipmentRepository(session)
+    shipment = await repo.get(shipment_id, user.id, with_items=False)
+    if not shipment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
+
+    max_rows = get_settings().shipment_item_import_max_rows
+    try:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            try:
+                payload = await request.json()
+            except ValueError as exc:
+                raise ItemImportError("Invalid JSON body") from exc
+            rows = list(islice(iter_json(payload), max_rows + 1))
+        else:
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise ItemImportError("Expected a CSV/XLSX file or a JSON array")
+            # Parsing is blocking file IO; stop one row past the limit so an
+            # oversized sheet is rejected without reading all of it.
+            rows = await run_in_threadpool(
+                lambda: list(islice(iter_upload(upload.filename, upload.file), max_rows + 1))
+            )
+        result = await import_items(session, shipment, user.id, rows, max_rows, skip_invalid=skip_invalid)
+    except ItemImportError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if result.errors and not skip_invalid:
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content=ShipmentItemImportResult.model_validate(result, from_attributes=True).model_dump(mode="json"),
+        )
+    return result
+
+
 def _parse_date(value: str | None):
     if not value:
         return None
@@ -212,10 +276,7 @@ async def update_item(
     session=Depends(get_db_session),
 ):
     repo = ShipmentRepository(session)
-    shipment = await repo.get(shipment_id, user.id)
-    if not shipment:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
-    item = next((i for i in shipment.items if str(i.id) == item_id), None)
+    item = await repo.get_item(shipment_id, item_id, user.id)
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
 
@@ -251,12 +312,6 @@ async def delete_item(
     user=Depends(get_current_user),
     session=Depends(get_db_session),
 ):
-    repo = ShipmentRepository(session)
-    shipment = await repo.get(shipment_id, user.id)
-    if not shipment:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
-    item = next((i for i in shipment.items if str(i.id) == item_id), None)
-    if not item:
+    if not await ShipmentRepository(session).delete_item(shipment_id, item_id, user.id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
-    await repo.delete_item(item)
     return {"status": "ok"}
@@ -4,11 +4,15 @@ import tempfile
 from datetime import date
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 
-from app.core.deps import get_db_session
+from app.core.config import get_settings
+from app.core.deps import get_db_session, get_read_db_session
+from app.core.rate_limit import rate_limit
+from app.core.uploads import save_upload
 from app.repositories.taric_repo import TaricRepository
-from app.schemas.taric import TaricGoodsResponse, TaricResolveResponse
+from app.schemas.taric import HsSuggestionList, TaricGoodsResponse, TaricNode, TaricResolveResponse, TaricSubtree
+from app.services.hs_search import hs_suggestion_cache, suggest_codes
 from app.services.taric_resolver import TaricResolver
 from app.taric.importer import import_taric_files
 
@@ -16,7 +20,7 @@ router = APIRouter(prefix="/taric", tags=["taric"])
 admin_router = APIRouter(prefix="/admin/taric", tags=["taric-admin"])
 
 
-@admin_router.post("/import")
+@admin_router.post("/import", dependencies=[Depends(rate_limit("taric_import"))])
 async def import_taric(
     snapshot_date: str | None = Form(default=None),
     goods_file: UploadFile = File(...),
@@ -34,27 +38,28 @@ async def import_taric(
             ) from exc
     else:
         snap = date.today()
+    max_bytes = get_settings().taric_max_upload_bytes
     with tempfile.TemporaryDirectory() as tmpdir:
-        goods_path = Path(tmpdir) / goods_file.filename
-        measures_path = Path(tmpdir) / measures_file.filename
-        add_path = Path(tmpdir) / add_codes_file.filename
-        goods_path.write_bytes(await goods_file.read())
-        measures_path.write_bytes(await measures_file.read())
-        add_path.write_bytes(await add_codes_file.read())
-
+        saved = [
+            await save_upload(upload, Path(tmpdir) / f"{index}-{Path(upload.filename or '').name}", max_bytes)
+            for index, upload in enumerate((goods_file, measures_file, add_codes_file))
+        ]
+        goods, measures, add_codes = saved
         result = await import_taric_files(
-            goods_file=goods_path,
-            measures_file=measures_path,
-            add_codes_file=add_path,
+            goods_file=goods.path,
+            measures_file=measures.path,
+            add_codes_file=add_codes.path,
             snapshot_date=snap,
             source_label="taric_excel",
             force=force,
+            file_hashes=(goods.sha256, measures.sha256, add_codes.sha256),
         )
+    hs_suggestion_cache.clear()
     return result
 
 
 @router.get("/goods/{goods_code}", response_model=TaricGoodsResponse)
-async def goods_lookup(goods_code: str, as_of: str | None = None, session=Depends(get_db_session)):
+async def goods_lookup(goods_code: str, as_of: str | None = None, session=Depends(get_read_db_session)):
     repo = TaricRepository(session)
     as_of_date = date.fromisoformat(as_of) if as_of else date.today()
     candidates = await repo.get_goods_candidates([goods_code], as_of_date)
@@ -68,6 +73,64 @@ async def goods_lookup(goods_code: str, as_of: str | None = None, session=Depend
     )
 
 
+async def _goods_node(repo: TaricRepository, goods_code: str, as_of: date):
+    candidates = await repo.get_goods_candidates([goods_code], as_of)
+    if not candidates:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goods code not found")
+    return candidates[0]
+
+
+@router.get("/goods/{goods_code}/ancestors", response_model=list[TaricNode])
+async def goods_ancestors(goods_code: str, as_of: date | None = None, session=Depends(get_read_db_session)):
+    """The goods line and its parents up to the chapter, nearest first."""
+    repo = TaricRepository(session)
+    as_of_date = as_of or date.today()
+    ancestry = await repo.get_ancestry([goods_code], as_of_date)
+    if not ancestry or ancestry[0].goods_code != goods_code:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goods code not found")
+    descriptions = await repo.get_goods_descriptions([node.goods_code for node in ancestry], as_of_date)
+    return [TaricNode.build(node, descriptions.get(node.goods_code)) for node in ancestry]
+
+
+@router.get("/goods/{goods_code}/children", response_model=list[TaricNode])
+async def goods_children(goods_code: str, as_of: date | None = None, session=Depends(get_read_db_session)):
+    repo = TaricRepository(session)
+    as_of_date = as_of or date.today()
+    await _goods_node(repo, goods_code, as_of_date)
+    return [TaricNode.build(node, description) for node, description in await repo.get_children(goods_code, as_of_date)]
+
+
+@router.get("/goods/{goods_code}/subtree", response_model=TaricSubtree)
+async def goods_subtree(
+    goods_code: str,
+    as_of: date | None = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+    session=Depends(get_read_db_session),
+):
+    """All descendants of a goods line in tree order, ``limit`` at most."""
+    repo = TaricRepository(session)
+    as_of_date = as_of or date.today()
+    node = await _goods_node(repo, goods_code, as_of_date)
+    rows = await repo.get_subtree(node.path, as_of_date, limit + 1) if node.path else []
+    return TaricSubtree(
+        goods_code=goods_code,
+        nodes=[TaricNode.build(child, description) for child, description in rows[:limit]],
+        truncated=len(rows) > limit,
+    )
+
+
+@router.get("/suggest", response_model=HsSuggestionList)
+async def suggest_goods_codes(
+    q: str = Query(min_length=1, max_length=500),
+    limit: int = Query(default=10, ge=1, le=50),
+    as_of: date | None = None,
+    session=Depends(get_read_db_session),
+):
+    """HS code candidates for a goods description, searched in the imported
+    nomenclature text without calling any external service."""
+    return await suggest_codes(session, q, limit, as_of)
+
+
 @router.get("/resolve", response_model=TaricResolveResponse)
 async def resolve_taric(
     goods_code: str,
@@ -75,8 +138,9 @@ async def resolve_taric(
     as_of: str | None = None,
     additional_code: str | None = None,
     session=Depends(get_db_session),
+    read_session=Depends(get_read_db_session),
 ):
-    repo = TaricRepository(session)
+    repo = TaricRepository(session, read_session)
     resolver = TaricResolver(repo)
     as_of_date = date.fromisoformat(as_of) if as_of else date.today()
     result = await resolver.resolve_taric(
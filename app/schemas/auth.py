@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import uuid
+
 from pydantic import BaseModel, EmailStr
 
 
@@ -21,3 +23,18 @@ class LoginRequest(BaseModel):
 
 class RefreshRequest(BaseModel):
     refresh_token: str
+
+
+class AccountUpdate(BaseModel):
+    current_password: str
+    email: EmailStr | None = None
+    password: str | None = None
+
+
+class AccountDelete(BaseModel):
+    password: str
+
+
+class AccountRead(BaseModel):
+    id: uuid.UUID
+    email: EmailStr
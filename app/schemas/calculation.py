@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import uuid
 from typing import Any
 from pydantic import BaseModel, Field
 
@@ -12,3 +13,11 @@ class CalculationResponse(BaseModel):
     per_item: list[dict[str, Any]] | None = None
     assumptions: list[str] = Field(default_factory=list)
     warnings: list[str] = Field(default_factory=list)
+
+
+class CalculationBatchRequest(BaseModel):
+    shipment_ids: list[uuid.UUID] = Field(min_length=1, max_length=100)
+
+
+class CalculationBatchResponse(BaseModel):
+    results: dict[str, CalculationResponse]
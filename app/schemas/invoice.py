@@ -3,10 +3,13 @@ from __future__ import annotations
 import uuid
 from datetime import date
 from decimal import Decimal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
+from app.schemas.calculation import CalculationResponse
 from app.schemas.common import BaseSchema
+from app.schemas.shipment import ShipmentItemImportError, ShipmentRead
 
+from app.models.enums import Direction, Incoterm
 from app.models.invoice import InvoiceStatus
 
 
@@ -47,13 +50,69 @@ class InvoiceRead(BaseSchema):
     tax_total: Decimal | None
     total: Decimal | None
     status: InvoiceStatus
+    extraction_error: str | None = None
     items: list[InvoiceItemRead] = Field(default_factory=list)
 
 
+class InvoiceExtractionStatus(BaseSchema):
+    id: uuid.UUID
+    status: InvoiceStatus
+    extraction_attempts: int
+    extraction_error: str | None
+
+
+class InvoiceBatchFile(BaseModel):
+    filename: str
+    invoice_id: uuid.UUID | None = None
+    status: InvoiceStatus | None = None
+    error: str | None = None
+
+
+class InvoiceBatchRead(BaseModel):
+    batch_id: uuid.UUID
+    counts: dict[str, int]
+    files: list[InvoiceBatchFile]
+
+    @classmethod
+    def build(cls, batch_id: uuid.UUID, files: list[InvoiceBatchFile]) -> "InvoiceBatchRead":
+        counts: dict[str, int] = {}
+        for entry in files:
+            key = entry.status.value if entry.status else "REJECTED"
+            counts[key] = counts.get(key, 0) + 1
+        return cls(batch_id=batch_id, counts=counts, files=files)
+
+
 class InvoiceAssignRequest(BaseModel):
     invoice_id: uuid.UUID
 
 
+class InvoiceShipmentCreate(BaseModel):
+    """Header values left out are taken from the invoice; the default origin
+    falls back to the most common origin on its lines."""
+
+    direction: Direction
+    destination_country: str | None = Field(default=None, pattern=r"^[A-Z]{2}$")
+    origin_country_default: str | None = Field(default=None, pattern=r"^[A-Z]{2}$")
+    incoterm: Incoterm | None = None
+    currency: str | None = Field(default=None, min_length=3, max_length=3)
+    import_date: date | None = None
+    skip_invalid: bool = False
+    calculate: bool = False
+
+    @field_validator("destination_country", "origin_country_default", "currency", mode="before")
+    @classmethod
+    def normalize_code(cls, value: str | None):
+        return value.upper() if isinstance(value, str) else value
+
+
+class InvoiceShipmentRead(BaseModel):
+    shipment: ShipmentRead
+    imported: int
+    item_ids: list[uuid.UUID]
+    errors: list[ShipmentItemImportError]
+    calculation: CalculationResponse | None = None
+
+
 class InvoiceReviewUpdate(BaseModel):
     status: InvoiceStatus
 
@@ -74,6 +133,20 @@ class InvoiceItemUpdate(BaseModel):
     total_price: Decimal | None = None
 
 
+class InvoiceItemsPatch(BaseModel):
+    """Lines with an ``id`` are updated (only the fields sent), lines without
+    one are added, and ``delete`` lists lines to remove."""
+
+    items: list[InvoiceItemUpdate] = Field(default_factory=list)
+    delete: list[uuid.UUID] = Field(default_factory=list)
+
+
+class InvoiceItemChanges(BaseModel):
+    created: list[InvoiceItemRead]
+    updated: list[InvoiceItemRead]
+    deleted: list[uuid.UUID]
+
+
 class InvoiceUpdate(BaseModel):
     invoice_number: str | None = None
     invoice_date: date | None = None
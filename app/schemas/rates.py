@@ -9,6 +9,7 @@ class FxRateResponse(BaseModel):
     quote: str
     rate: Decimal | None
     source: str
+    rate_date: str | None = None
 
 
 class VatRateResponse(BaseModel):
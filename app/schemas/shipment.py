@@ -152,6 +152,17 @@ class ShipmentItemRead(BaseSchema):
     weight_net_kg: Decimal | None
 
 
+class ShipmentItemImportError(BaseModel):
+    row: int
+    errors: list[str]
+
+
+class ShipmentItemImportResult(BaseSchema):
+    imported: int
+    item_ids: list[uuid.UUID]
+    errors: list[ShipmentItemImportError]
+
+
 class ShipmentDetail(BaseSchema):
     id: uuid.UUID
     items: list[ShipmentItemRead] = Field(default_factory=list)
@@ -6,7 +6,9 @@ from typing import Any
 
 from pydantic import BaseModel
 
+from app.models.taric import GoodsNomenclature
 from app.services.taric_resolver import ResolvedTaricResult
+from app.taric.hierarchy import PATH_SEPARATOR
 
 
 class TaricGoodsResponse(BaseModel):
@@ -17,6 +19,43 @@ class TaricGoodsResponse(BaseModel):
     valid_to: date | None = None
 
 
+class TaricNode(BaseModel):
+    goods_code: str
+    suffix: str | None = None
+    level: int | None = None
+    parent_goods_code: str | None = None
+    depth: int | None = None
+    description: str | None = None
+
+    @classmethod
+    def build(cls, node: GoodsNomenclature, description: str | None) -> "TaricNode":
+        return cls(
+            goods_code=node.goods_code,
+            suffix=node.suffix,
+            level=node.level,
+            parent_goods_code=node.parent_goods_code,
+            depth=node.path.count(PATH_SEPARATOR) if node.path else None,
+            description=description,
+        )
+
+
+class TaricSubtree(BaseModel):
+    goods_code: str
+    nodes: list[TaricNode]
+    truncated: bool
+
+
+class HsSuggestionRead(BaseModel):
+    goods_code: str
+    description: str
+    score: float
+
+
+class HsSuggestionList(BaseModel):
+    query: str
+    suggestions: list[HsSuggestionRead]
+
+
 class TaricDutyComponent(BaseModel):
     measure_uid: str
     measure_type_code: str
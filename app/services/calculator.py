@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
@@ -7,11 +8,15 @@ from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
+from app.core.metrics import CALCULATION_DURATION, items_bucket, record_provider_source
+from app.core.tracing import span
 from app.models.calculation import Calculation
 from app.models.enums import Direction, Incoterm, ShipmentStatus
 from app.models.shipment_costs import ShipmentCosts
 from app.repositories.shipment_repo import ShipmentRepository
 from app.repositories.taric_repo import TaricRepository
+from app.services.providers.deadline import Deadline
 from app.services.providers.eu_taric import EuTaricProvider
 from app.services.providers.fx_ecb import FxProvider
 from app.services.providers.types import DutyRateResult, FxRateResult, VatRateResult
@@ -34,28 +39,63 @@ class CalculationResult:
 
 
 class CalculatorService:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        budget_seconds: float | None = None,
+        read_session: AsyncSession | None = None,
+    ) -> None:
         self.session = session
+        self.budget_seconds = budget_seconds or get_settings().calculation_upstream_budget_seconds
         self.shipment_repo = ShipmentRepository(session)
         self.uk_provider = UkTariffProvider(session)
         self.eu_provider = EuTaricProvider(session)
         self.vat_provider = VatRateProvider(session)
         self.fx_provider = FxProvider(session)
-        self.taric_resolver = TaricResolver(TaricRepository(session))
+        self._start_deadline()
+        self.taric_resolver = TaricResolver(TaricRepository(session, read_session))
+
+    def _start_deadline(self) -> None:
+        """Gives the providers a fresh upstream budget; each shipment gets its own."""
+        self.deadline = Deadline(self.budget_seconds)
+        for provider in (self.uk_provider, self.eu_provider, self.vat_provider, self.fx_provider):
+            provider.deadline = self.deadline
 
     async def calculate(self, shipment_id, user_id) -> CalculationResult:
         shipment = await self.shipment_repo.get(shipment_id, user_id)
         if not shipment:
-            return CalculationResult(
-                status="not_found",
-                required_fields=[],
-                message="Shipment not found",
-                breakdown=None,
-                per_item=None,
-                assumptions=[],
-                warnings=[],
-            )
+            return self._not_found()
+        return await self._calculate_shipment(shipment)
+
+    async def calculate_many(self, shipment_ids, user_id) -> dict[str, CalculationResult]:
+        shipments = await self.shipment_repo.get_many(shipment_ids, user_id)
+        await self.fx_provider.prefetch(
+            (shipment.currency, self._fx_quote(shipment), shipment.import_date)
+            for shipment in shipments
+            if self._pinned_fx_rate(shipment) is None
+        )
+
+        results: dict[str, CalculationResult] = {}
+        for shipment in shipments:
+            results[str(shipment.id)] = await self._calculate_shipment(shipment)
+        for shipment_id in shipment_ids:
+            results.setdefault(str(shipment_id), self._not_found())
+        return results
+
+    def _not_found(self) -> CalculationResult:
+        return CalculationResult(
+            status="not_found",
+            required_fields=[],
+            message="Shipment not found",
+            breakdown=None,
+            per_item=None,
+            assumptions=[],
+            warnings=[],
+        )
 
+    async def _calculate_shipment(self, shipment) -> CalculationResult:
+        started = time.perf_counter()
+        self._start_deadline()
         costs = shipment.costs or ShipmentCosts(shipment_id=shipment.id)
         items = shipment.items
 
@@ -95,7 +135,9 @@ class CalculatorService:
                 shipment.costs = costs
             self.session.add(costs)
 
-        fx_result = await self._ensure_fx_rate(shipment)
+        with span("calc.fx", currency=shipment.currency):
+            fx_result = await self._ensure_fx_rate(shipment)
+        record_provider_source("fx", fx_result.source)
         fx_rate = fx_result.rate if fx_result.rate is not None else Decimal("1")
         if fx_result.rate is None:
             warnings.append("FX rate unavailable; calculation uses 1.0.")
@@ -107,6 +149,7 @@ class CalculatorService:
         customs_value = total_goods_value + freight + insurance
 
         per_item_results: list[dict[str, Any]] = []
+        item_vat_bases: list[tuple[Any, Decimal, Decimal]] = []
         total_duty = Decimal("0")
 
         for item in items:
@@ -119,12 +162,13 @@ class CalculatorService:
 
             if shipment.direction == Direction.IMPORT_EU:
                 as_of_date = shipment.import_date or date.today()
-                taric_result = await self.taric_resolver.resolve_taric(
-                    goods_code=item.hs_code,
-                    origin_country_code=item.origin_country,
-                    as_of=as_of_date,
-                    additional_code=getattr(item, "additional_code", None),
-                )
+                with span("calc.duty", hs_code=item.hs_code):
+                    taric_result = await self.taric_resolver.resolve_taric(
+                        goods_code=item.hs_code,
+                        origin_country_code=item.origin_country,
+                        as_of=as_of_date,
+                        additional_code=getattr(item, "additional_code", None),
+                    )
                 if taric_result.effective_duty_rate is None:
                     warnings.append(f"No TARIC duty rate found for HS {item.hs_code}; treated as 0.")
                 else:
@@ -170,7 +214,10 @@ class CalculatorService:
                             )
 
             else:
-                duty_result = await self._get_duty_rate(shipment.direction, shipment.id, item.hs_code, item.origin_country)
+                with span("calc.duty", hs_code=item.hs_code):
+                    duty_result = await self._get_duty_rate(
+                        shipment.direction, shipment.id, item.hs_code, item.origin_country
+                    )
                 if duty_result.missing or duty_result.rate is None:
                     warnings.append(f"Missing duty rate for HS {item.hs_code}; treated as 0.")
                     duty_rate = Decimal("0")
@@ -183,6 +230,7 @@ class CalculatorService:
                 duty_components.append({"type": "ad_valorem", "rate": str(duty_rate), "amount": str(item_duty)})
 
             total_duty += item_duty
+            item_vat_bases.append((item, allocation_ratio, item_customs_value + item_duty))
 
             per_item_results.append(
                 {
@@ -205,15 +253,19 @@ class CalculatorService:
             ]
         )
 
-        vat_rate_result = await self._get_vat_rate(shipment)
-        if vat_rate_result.rate is None:
-            warnings.append("Missing VAT rate; treated as 0.")
-            vat_rate = Decimal("0")
-        else:
-            vat_rate = vat_rate_result.rate
+        with span("calc.vat"):
+            vat_rate_result = await self._get_vat_rate(shipment)
+            record_provider_source("vat", vat_rate_result.source)
+            if vat_rate_result.rate is None:
+                warnings.append("Missing VAT rate; treated as 0.")
+                vat_rate = Decimal("0")
+            else:
+                vat_rate = vat_rate_result.rate
 
-        vat_base = customs_value + total_duty + other_duties + incidental
-        vat_total = (vat_base * vat_rate).quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
+            vat_base = customs_value + total_duty + other_duties + incidental
+            vat_total = self._compute_vat_total(
+                shipment, vat_rate, vat_base, incidental, item_vat_bases, per_item_results
+            )
 
         authorities_total = total_duty + vat_total + other_duties
         landed_cost_total = total_goods_value + freight + insurance + incidental + authorities_total
@@ -223,6 +275,9 @@ class CalculatorService:
             warnings.append("Total quantity is zero; per-unit cost uses 1 as divisor.")
         landed_cost_per_unit = (landed_cost_total / total_units).quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
 
+        for component in self.deadline.degraded_components():
+            warnings.append(f"Upstream {component} degraded; cached or fallback data used.")
+
         calculation = Calculation(
             shipment_id=shipment.id,
             customs_value=customs_value,
@@ -237,9 +292,10 @@ class CalculatorService:
             warnings=warnings,
             engine_version=ENGINE_VERSION,
         )
-        await self.session.merge(calculation)
-        shipment.status = ShipmentStatus.CALCULATED
-        await self.session.commit()
+        with span("calc.persist"):
+            await self.session.merge(calculation)
+            shipment.status = ShipmentStatus.CALCULATED
+            await self.session.commit()
 
         breakdown = {
             "customs_value": str(customs_value),
@@ -251,6 +307,9 @@ class CalculatorService:
             "landed_cost_total": str(landed_cost_total),
             "landed_cost_per_unit": str(landed_cost_per_unit),
         }
+        CALCULATION_DURATION.labels(direction=shipment.direction.value, items=items_bucket(len(items))).observe(
+            time.perf_counter() - started
+        )
 
         return CalculationResult(
             status="ok",
@@ -270,9 +329,13 @@ class CalculatorService:
         origin_country: str | None,
     ) -> DutyRateResult:
         if direction == Direction.IMPORT_UK:
-            return await self.uk_provider.get_duty_rate(shipment_id, hs_code, origin_country, False)
+            result = await self.uk_provider.get_duty_rate(shipment_id, hs_code, origin_country, False)
+            record_provider_source("uk_tariff", result.source)
+            return result
         if direction == Direction.IMPORT_EU:
-            return await self.eu_provider.get_duty_rate(hs_code, origin_country, False, shipment_id=shipment_id)
+            result = await self.eu_provider.get_duty_rate(hs_code, origin_country, False, shipment_id=shipment_id)
+            record_provider_source("eu_taric", result.source)
+            return result
         return DutyRateResult(rate=Decimal("0"), source="export", is_estimated=True, missing=False)
 
     async def _get_vat_rate(self, shipment) -> VatRateResult:
@@ -284,19 +347,58 @@ class CalculatorService:
             return await self.vat_provider.get_standard_rate(shipment.destination_country, shipment_id=shipment.id)
         return VatRateResult(rate=Decimal("0"), source="export")
 
+    def _compute_vat_total(
+        self,
+        shipment,
+        standard_rate: Decimal,
+        vat_base: Decimal,
+        incidental: Decimal,
+        item_vat_bases: list[tuple[Any, Decimal, Decimal]],
+        per_item_results: list[dict[str, Any]],
+    ) -> Decimal:
+        country = self._vat_country(shipment)
+        base_by_rate: dict[Decimal, Decimal] = {}
+        allocated = Decimal("0")
+        for (item, allocation_ratio, item_base), item_result in zip(item_vat_bases, per_item_results):
+            rate = standard_rate
+            if country:
+                item_rate = self.vat_provider.get_item_rate(country, item.hs_code)
+                if item_rate and item_rate.rate is not None:
+                    rate = item_rate.rate
+            item_base += incidental * allocation_ratio
+            allocated += item_base
+            base_by_rate[rate] = base_by_rate.get(rate, Decimal("0")) + item_base
+            item_result["vat_rate"] = str(rate)
+
+        # Whatever could not be allocated to items (e.g. no goods value) is taxed at the standard rate.
+        remainder = vat_base - allocated
+        if remainder:
+            base_by_rate[standard_rate] = base_by_rate.get(standard_rate, Decimal("0")) + remainder
+
+        return sum(
+            (
+                (base * rate).quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
+                for rate, base in base_by_rate.items()
+            ),
+            Decimal("0"),
+        )
+
+    def _vat_country(self, shipment) -> str | None:
+        if shipment.direction == Direction.IMPORT_UK:
+            return "GB"
+        if shipment.direction == Direction.IMPORT_EU:
+            return shipment.destination_country
+        return None
+
     async def _ensure_fx_rate(self, shipment) -> FxRateResult:
         base = shipment.currency
-        if shipment.direction == Direction.IMPORT_UK:
-            quote = "GBP"
-        else:
-            quote = "EUR"
+        quote = self._fx_quote(shipment)
 
-        if quote == "GBP" and shipment.fx_rate_to_gbp:
-            return FxRateResult(rate=Decimal(str(shipment.fx_rate_to_gbp)), source="shipment", rate_date=None)
-        if quote == "EUR" and shipment.fx_rate_to_eur:
-            return FxRateResult(rate=Decimal(str(shipment.fx_rate_to_eur)), source="shipment", rate_date=None)
+        pinned = self._pinned_fx_rate(shipment)
+        if pinned is not None:
+            return FxRateResult(rate=Decimal(str(pinned)), source="shipment", rate_date=None)
 
-        result = await self.fx_provider.get_rate(base, quote, shipment_id=shipment.id)
+        result = await self.fx_provider.get_rate(base, quote, shipment_id=shipment.id, as_of=shipment.import_date)
         if result.rate is None:
             return result
 
@@ -307,6 +409,14 @@ class CalculatorService:
         await self.shipment_repo.update(shipment)
         return result
 
+    def _fx_quote(self, shipment) -> str:
+        return "GBP" if shipment.direction == Direction.IMPORT_UK else "EUR"
+
+    def _pinned_fx_rate(self, shipment) -> str | None:
+        if self._fx_quote(shipment) == "GBP":
+            return shipment.fx_rate_to_gbp or None
+        return shipment.fx_rate_to_eur or None
+
     def _sum_goods_value(self, items) -> Decimal:
         total = Decimal("0")
         for item in items:
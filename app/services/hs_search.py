@@ -0,0 +1,101 @@
+"""HS code suggestions from the locally imported nomenclature descriptions.
+
+Queries are normalised (case, punctuation, repeated words) before both the
+search and the cache lookup, so "Steel  BOLTS," and "steel bolts" share one
+entry. Results sit in a small in-process LRU, which keeps repeat lookups for
+the same goods off the full-text search. Entries are keyed on the latest
+TARIC snapshot date, so an import made through any process retires them.
+"""
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.repositories.taric_repo import TaricRepository
+from app.schemas.taric import HsSuggestionList, HsSuggestionRead
+
+_WORD = re.compile(r"[^\W_]+")
+MAX_QUERY_CHARS = 200
+
+
+def normalize_query(text: str | None) -> str:
+    words = dict.fromkeys(_WORD.findall((text or "").casefold()))
+    return " ".join(words)[:MAX_QUERY_CHARS].strip()
+
+
+@dataclass(frozen=True)
+class HsSuggestion:
+    goods_code: str
+    description: str
+    score: float
+
+
+class HsSuggestionCache:
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, list[HsSuggestion]]] = OrderedDict()
+
+    def get(self, key: tuple) -> list[HsSuggestion] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, suggestions = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return suggestions
+
+    def put(self, key: tuple, suggestions: list[HsSuggestion]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, suggestions)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Called after a TARIC import to drop entries keyed on the old snapshot."""
+        self._entries.clear()
+
+
+class HsSearchService:
+    def __init__(self, repo: TaricRepository, cache: HsSuggestionCache | None = None) -> None:
+        self.repo = repo
+        self.cache = cache or hs_suggestion_cache
+
+    async def suggest(self, text: str | None, limit: int = 10, as_of: date | None = None) -> list[HsSuggestion]:
+        query = normalize_query(text)
+        if not query:
+            return []
+        as_of = as_of or date.today()
+        key = (await self.repo.get_latest_snapshot_date(), query, limit, as_of)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        rows = await self.repo.search_goods(query, as_of, limit)
+        suggestions = [
+            HsSuggestion(goods_code=code, description=description, score=round(score, 4))
+            for code, description, score in rows
+        ]
+        self.cache.put(key, suggestions)
+        return suggestions
+
+
+async def suggest_codes(
+    session: AsyncSession, text: str | None, limit: int, as_of: date | None = None
+) -> HsSuggestionList:
+    suggestions = await HsSearchService(TaricRepository(session)).suggest(text, limit, as_of)
+    return HsSuggestionList(
+        query=normalize_query(text),
+        suggestions=[HsSuggestionRead.model_validate(s, from_attributes=True) for s in suggestions],
+    )
+
+
+_settings = get_settings()
+hs_suggestion_cache = HsSuggestionCache(_settings.hs_suggest_cache_ttl_seconds, _settings.hs_suggest_cache_max_entries)
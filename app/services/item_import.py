@@ -0,0 +1,250 @@
+"""Bulk import of shipment items from CSV, XLSX or a JSON array.
+
+Rows are read one at a time from the upload (csv reader / openpyxl read-only
+mode), validated against ``ShipmentItemCreate``, passport references are
+resolved with one query, and the surviving rows go in as batched multi-row
+INSERTs inside a single transaction.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator
+from zipfile import BadZipFile
+
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.passport import PassportItem
+from app.models.shipment import Shipment
+from app.models.shipment_item import ShipmentItem
+from app.schemas.shipment import ShipmentItemCreate
+
+# Header spellings seen on packing lists, mapped to ShipmentItemCreate fields.
+COLUMN_ALIASES = {
+    "hs": "hs_code",
+    "commodity_code": "hs_code",
+    "tariff_code": "hs_code",
+    "origin": "origin_country",
+    "country_of_origin": "origin_country",
+    "qty": "quantity",
+    "price": "unit_price",
+    "value": "goods_value",
+    "net_weight": "weight_net_kg",
+    "net_weight_kg": "weight_net_kg",
+    "passport_item": "passport_item_id",
+}
+_CODE_COLUMNS = {"hs_code"}
+
+
+class ItemImportError(ValueError):
+    pass
+
+
+@dataclass
+class RowError:
+    row: int
+    errors: list[str]
+
+
+@dataclass
+class ItemImportResult:
+    imported: int = 0
+    item_ids: list[uuid.UUID] = field(default_factory=list)
+    errors: list[RowError] = field(default_factory=list)
+
+
+def _normalize_header(value: Any) -> str:
+    name = str(value or "").strip().lower().replace(" ", "_").replace("-", "_").replace("/", "_")
+    return COLUMN_ALIASES.get(name, name)
+
+
+def _cell(value: Any) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _code_text(value: int | float, number_format: str | None) -> str:
+    """HS codes typed into Excel become numbers and lose the leading zero of
+    chapters 01-09. Restore it from a zero-padded number format, or else pad
+    to the even length every HS/CN code has."""
+    text = str(int(value))
+    zeros = len(number_format) if number_format and set(number_format) == {"0"} else 0
+    return text.zfill(max(zeros, len(text) + len(text) % 2))
+
+
+def _xlsx_values(columns: list[str], cells: Iterable[Any]) -> list[Any]:
+    values = []
+    for column, cell in zip(columns, cells):
+        value = cell.value
+        numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if column in _CODE_COLUMNS and numeric and float(value).is_integer():
+            value = _code_text(value, getattr(cell, "number_format", None))
+        values.append(value)
+    return values
+
+
+def _rows_from_table(header: Iterable[Any], rows: Iterable[Iterable[Any]]) -> Iterator[dict[str, Any]]:
+    columns = [_normalize_header(h) for h in header]
+    for values in rows:
+        row = {col: _cell(v) for col, v in zip(columns, values) if col}
+        if any(v is not None for v in row.values()):
+            yield row
+
+
+def iter_csv(stream: IO[bytes]) -> Iterator[dict[str, Any]]:
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+        yield from _rows_from_table(header, reader)
+    except UnicodeDecodeError as exc:
+        raise ItemImportError("CSV must be UTF-8 encoded") from exc
+    except csv.Error as exc:
+        raise ItemImportError(f"Malformed CSV: {exc}") from exc
+
+
+def iter_xlsx(stream: IO[bytes]) -> Iterator[dict[str, Any]]:
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError) as exc:
+        raise ItemImportError("Unreadable XLSX file") from exc
+    try:
+        # Cells rather than bare values: the number format is needed for HS codes.
+        rows = workbook.active.iter_rows()
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_normalize_header(cell.value) for cell in header]
+        yield from _rows_from_table([cell.value for cell in header], (_xlsx_values(columns, cells) for cells in rows))
+    finally:
+        workbook.close()
+
+
+def iter_json(payload: Any) -> Iterator[dict[str, Any]]:
+    if not isinstance(payload, list):
+        raise ItemImportError("Expected a JSON array of items")
+    for entry in payload:
+        if not isinstance(entry, dict):
+            yield {}
+            continue
+        yield {_normalize_header(k): (v.strip() or None) if isinstance(v, str) else v for k, v in entry.items()}
+
+
+def iter_upload(filename: str, stream: IO[bytes]) -> Iterator[dict[str, Any]]:
+    suffix = Path(filename or "").suffix.lower()
+    if suffix == ".csv":
+        return iter_csv(stream)
+    if suffix == ".xlsx":
+        return iter_xlsx(stream)
+    raise ItemImportError("Only CSV or XLSX allowed")
+
+
+def _error_messages(exc: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()]
+
+
+async def import_items(
+    session: AsyncSession,
+    shipment: Shipment,
+    user_id: uuid.UUID,
+    rows: Iterable[dict[str, Any]],
+    max_rows: int,
+    skip_invalid: bool = False,
+    commit: bool = True,
+) -> ItemImportResult:
+    """Validates and inserts ``rows`` for ``shipment``.
+
+    Row numbers in errors are 1-based data rows (the header is not counted).
+    Unless ``skip_invalid`` is set nothing is inserted when any row fails.
+    With ``commit=False`` the insert joins the caller's transaction.
+    """
+    result = ItemImportResult()
+    parsed: list[tuple[int, ShipmentItemCreate]] = []
+    for number, raw in enumerate(rows, start=1):
+        if number > max_rows:
+            raise ItemImportError(f"Too many rows (max {max_rows})")
+        raw = {k: v for k, v in raw.items() if v is not None}
+        raw.setdefault("origin_country", shipment.origin_country_default)
+        raw.setdefault("description", "")
+        raw.setdefault("hs_code", "")
+        try:
+            parsed.append((number, ShipmentItemCreate.model_validate(raw)))
+        except ValidationError as exc:
+            result.errors.append(RowError(row=number, errors=_error_messages(exc)))
+
+    passports = await _load_passports(session, user_id, [payload.passport_item_id for _, payload in parsed])
+
+    values: list[dict[str, Any]] = []
+    for number, payload in parsed:
+        passport_item = None
+        if payload.passport_item_id:
+            passport_item = passports.get(payload.passport_item_id)
+            if passport_item is None:
+                result.errors.append(RowError(row=number, errors=["passport_item_id: Passport item not found"]))
+                continue
+        description = payload.description or (passport_item.name if passport_item else "")
+        hs_code = payload.hs_code or (passport_item.hs_code if passport_item else "") or ""
+        missing = [name for name, value in (("description", description), ("hs_code", hs_code)) if not value]
+        if missing:
+            messages = [f"{name}: Field required unless passport_item_id is given" for name in missing]
+            result.errors.append(RowError(row=number, errors=messages))
+            continue
+        values.append(
+            {
+                "id": uuid.uuid4(),
+                "shipment_id": shipment.id,
+                "passport_item_id": passport_item.id if passport_item else None,
+                "description": description,
+                "hs_code": hs_code,
+                "origin_country": payload.origin_country,
+                "additional_code": payload.additional_code,
+                "quantity": payload.quantity,
+                "unit_price": payload.unit_price,
+                "goods_value": payload.goods_value,
+                "weight_net_kg": payload.weight_net_kg or (passport_item.weight_per_unit if passport_item else None),
+            }
+        )
+
+    result.errors.sort(key=lambda error: error.row)
+    if result.errors and not skip_invalid:
+        return result
+    if values:
+        # executemany on an insert() is batched by SQLAlchemy into multi-row
+        # INSERT ... VALUES statements, so a 2,000-line list is a few round trips.
+        await session.execute(insert(ShipmentItem), values)
+        if commit:
+            await session.commit()
+    result.imported = len(values)
+    result.item_ids = [row["id"] for row in values]
+    return result
+
+
+async def _load_passports(
+    session: AsyncSession, user_id: uuid.UUID, references: Iterable[str | None]
+) -> dict[str, PassportItem]:
+    ids: dict[uuid.UUID, str] = {}
+    for reference in references:
+        if not reference:
+            continue
+        try:
+            ids[uuid.UUID(reference)] = reference
+        except ValueError:
+            continue
+    if not ids:
+        return {}
+    rows = await session.execute(
+        select(PassportItem).where(PassportItem.id.in_(ids.keys()), PassportItem.user_id == user_id)
+    )
+    return {ids[item.id]: item for item in rows.scalars()}
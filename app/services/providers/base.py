@@ -4,14 +4,19 @@ import json
 from typing import Any
 
 from app.core.redis import redis_client
+from app.core.tracing import SPAN_KIND_CLIENT, span
 
 
 async def redis_get_json(key: str) -> dict[str, Any] | None:
-    value = await redis_client.client.get(key)
+    with span("redis.get", SPAN_KIND_CLIENT, key=key) as current:
+        value = await redis_client.client.get(key)
+        if current is not None:
+            current.attributes["hit"] = bool(value)
     if not value:
         return None
     return json.loads(value)
 
 
 async def redis_set_json(key: str, payload: dict[str, Any], ttl_seconds: int) -> None:
-    await redis_client.client.set(key, json.dumps(payload), ex=ttl_seconds)
+    with span("redis.set", SPAN_KIND_CLIENT, key=key):
+        await redis_client.client.set(key, json.dumps(payload), ex=ttl_seconds)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Raised instead of issuing an upstream call once the request budget is spent."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+
+@dataclass
+class Deadline:
+    """Upstream time budget shared by every provider call made for one calculation."""
+
+    budget_seconds: float
+    started: float = field(default_factory=time.monotonic)
+    degraded: list[str] = field(default_factory=list)
+
+    def remaining(self) -> float:
+        return self.budget_seconds - (time.monotonic() - self.started)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        return max(0.0, min(cap, self.remaining()))
+
+    def mark_degraded(self, component: str) -> None:
+        self.degraded.append(component)
+
+    def degraded_components(self) -> list[str]:
+        return sorted(set(self.degraded))
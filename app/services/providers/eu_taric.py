@@ -8,17 +8,19 @@ from app.models.rate_snapshot import RateSnapshot
 from app.repositories.fallback_repo import EuTaricRepository
 from app.repositories.rate_snapshot_repo import RateSnapshotRepository
 from app.services.providers.base import redis_get_json, redis_set_json
-from app.services.providers.http_client import CircuitBreaker, get_json
+from app.services.providers.deadline import Deadline
+from app.services.providers.http_client import get_json
 from app.services.providers.types import DutyRateResult
 
 TTL_SECONDS = 86400
-_cb = CircuitBreaker()
+COMPONENT = "eu_taric"
 
 
 class EuTaricProvider:
-    def __init__(self, session) -> None:
+    def __init__(self, session, deadline: Deadline | None = None) -> None:
         self.session = session
         self.settings = get_settings()
+        self.deadline = deadline
         self.repo = EuTaricRepository(session)
         self.snapshot_repo = RateSnapshotRepository(session)
 
@@ -41,13 +43,14 @@ class EuTaricProvider:
             await redis_set_json(cache_key, {"rate": str(db_rate.duty_rate)}, TTL_SECONDS)
             return DutyRateResult(rate=Decimal(db_rate.duty_rate), source="db", is_estimated=True, missing=False)
 
-        if self.settings.eu_taric_api_base and self.settings.eu_taric_api_key and _cb.allow():
+        if self.settings.eu_taric_api_base and self.settings.eu_taric_api_key:
             try:
                 url = f"{self.settings.eu_taric_api_base}/taric"
                 payload = await get_json(
                     url,
                     headers={"Authorization": f"Bearer {self.settings.eu_taric_api_key}"},
                     params={"hs_code": hs_code, "origin": origin_country, "preference": str(preference_flag).lower()},
+                    deadline=self.deadline,
                 )
                 rate = Decimal(str(payload.get("duty_rate")))
                 await redis_set_json(cache_key, {"rate": str(rate)}, TTL_SECONDS)
@@ -60,9 +63,9 @@ class EuTaricProvider:
                         ttl_seconds=TTL_SECONDS,
                     )
                     await self.snapshot_repo.create(snapshot)
-                _cb.record_success()
                 return DutyRateResult(rate=rate, source="api", is_estimated=False, missing=False, raw_payload=payload)
             except Exception:
-                _cb.record_failure()
+                if self.deadline is not None:
+                    self.deadline.mark_degraded(COMPONENT)
 
         return DutyRateResult(rate=None, source="missing", is_estimated=True, missing=True)
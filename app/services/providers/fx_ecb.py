@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from datetime import date
+from collections.abc import Iterable
+from datetime import date, timedelta
 from decimal import Decimal
 
 from app.core.config import get_settings
@@ -10,68 +11,120 @@ from app.services.providers.base import redis_get_json, redis_set_json
 from app.models.enums import ProviderType
 from app.models.rate_snapshot import RateSnapshot
 from app.repositories.rate_snapshot_repo import RateSnapshotRepository
-from app.services.providers.http_client import CircuitBreaker, get_json
+from app.services.providers.deadline import Deadline
+from app.services.providers.http_client import CircuitOpenError, get_json
 from app.services.providers.types import FxRateResult
 
 TTL_SECONDS = 86400
-_cb = CircuitBreaker()
+HISTORIC_TTL_SECONDS = 30 * 86400
+# ECB publishes no reference rates on weekends and TARGET holidays, so a
+# date resolves to the latest observation within this many days before it.
+LOOKBACK_DAYS = 7
+COMPONENT = "fx"
 
 
 class FxProvider:
-    def __init__(self, session) -> None:
+    def __init__(self, session, deadline: Deadline | None = None) -> None:
         self.session = session
         self.settings = get_settings()
+        self.deadline = deadline
         self.repo = FxRateRepository(session)
         self.snapshot_repo = RateSnapshotRepository(session)
+        self._resolved: dict[tuple[str, str, date], FxRateResult] = {}
 
-    async def get_rate(self, base: str, quote: str, shipment_id=None) -> FxRateResult:
+    async def prefetch(self, requests: Iterable[tuple[str, str, date | None]]) -> None:
+        wanted = {(base, quote, self._effective_date(as_of)) for base, quote, as_of in requests if base != quote}
+        wanted -= self._resolved.keys()
+        if not wanted:
+            return
+
+        pairs = {(base, quote) for base, quote, _ in wanted}
+        dates = [as_of for _, _, as_of in wanted]
+        rows = await self.repo.get_rates_for_pairs(pairs, min(dates) - timedelta(days=LOOKBACK_DAYS), max(dates))
+
+        by_pair: dict[tuple[str, str], list[FxRateDaily]] = {}
+        for row in rows:
+            by_pair.setdefault((row.base, row.quote), []).append(row)
+
+        for base, quote, as_of in wanted:
+            earliest = as_of - timedelta(days=LOOKBACK_DAYS)
+            match = None
+            for row in by_pair.get((base, quote), []):
+                if earliest <= row.rate_date <= as_of:
+                    match = row
+            if match:
+                self._resolved[(base, quote, as_of)] = FxRateResult(
+                    rate=Decimal(match.rate), source="db", rate_date=str(match.rate_date)
+                )
+
+    async def get_rate(self, base: str, quote: str, shipment_id=None, as_of: date | None = None) -> FxRateResult:
+        rate_date = self._effective_date(as_of)
         if base == quote:
-            return FxRateResult(rate=Decimal("1"), source="identity", rate_date=str(date.today()))
+            return FxRateResult(rate=Decimal("1"), source="identity", rate_date=str(rate_date))
 
-        cache_key = f"fx:{base}:{quote}"
+        resolved = self._resolved.get((base, quote, rate_date))
+        if resolved:
+            return resolved
+
+        cache_key = f"fx:{base}:{quote}:{rate_date.isoformat()}"
         cached = await redis_get_json(cache_key)
         if cached:
             return FxRateResult(rate=Decimal(str(cached["rate"])), source="redis", rate_date=cached.get("rate_date"))
 
-        rate_date = date.today()
-        db_rate = await self.repo.get_rate(base, quote, rate_date)
+        earliest = rate_date - timedelta(days=LOOKBACK_DAYS)
+        db_rate = await self.repo.get_latest_rate(base, quote, rate_date, earliest)
         if db_rate:
             return FxRateResult(rate=Decimal(db_rate.rate), source="db", rate_date=str(db_rate.rate_date))
 
-        if not _cb.allow():
-            return FxRateResult(rate=None, source="unavailable", rate_date=None)
-
         url = f"{self.settings.ecb_api_base}/D.{base}.{quote}.SP00.A"
-        params = {"format": "jsondata"}
+        params = {"format": "jsondata", "startPeriod": earliest.isoformat(), "endPeriod": rate_date.isoformat()}
         try:
-            payload = await get_json(url, params=params)
-            rate, rate_date = self._extract_rate(payload)
+            payload = await get_json(url, params=params, deadline=self.deadline)
+            rate, observed_date = self._extract_rate(payload)
             if rate is None:
-                return FxRateResult(rate=None, source="ecb_missing", rate_date=rate_date, raw_payload=payload)
-            await redis_set_json(cache_key, {"rate": str(rate), "rate_date": rate_date}, TTL_SECONDS)
-            if rate_date:
-                fx = FxRateDaily(base=base, quote=quote, rate=rate, rate_date=date.fromisoformat(rate_date))
+                return FxRateResult(rate=None, source="ecb_missing", rate_date=observed_date, raw_payload=payload)
+            ttl = HISTORIC_TTL_SECONDS if rate_date < date.today() else TTL_SECONDS
+            await redis_set_json(cache_key, {"rate": str(rate), "rate_date": observed_date}, ttl)
+            if observed_date:
+                fx = FxRateDaily(base=base, quote=quote, rate=rate, rate_date=date.fromisoformat(observed_date))
                 await self.repo.upsert(fx)
             if shipment_id is not None:
                 snapshot = RateSnapshot(
                     shipment_id=shipment_id,
                     provider=ProviderType.FX,
-                    request_key={"base": base, "quote": quote},
+                    request_key={"base": base, "quote": quote, "as_of": rate_date.isoformat()},
                     response_payload=payload,
-                    ttl_seconds=TTL_SECONDS,
+                    ttl_seconds=ttl,
                 )
                 await self.snapshot_repo.create(snapshot)
-            _cb.record_success()
-            return FxRateResult(rate=rate, source="ecb", rate_date=rate_date, raw_payload=payload)
+            result = FxRateResult(rate=rate, source="ecb", rate_date=observed_date, raw_payload=payload)
+            self._resolved[(base, quote, rate_date)] = result
+            return result
+        except CircuitOpenError:
+            return await self._stale_fallback(base, quote, rate_date, "unavailable")
         except Exception:
-            _cb.record_failure()
-            return FxRateResult(rate=None, source="ecb_error", rate_date=None)
+            return await self._stale_fallback(base, quote, rate_date, "ecb_error")
+
+    async def _stale_fallback(self, base: str, quote: str, rate_date: date, source: str) -> FxRateResult:
+        if self.deadline is not None:
+            self.deadline.mark_degraded(COMPONENT)
+        stale = await self.repo.get_latest_rate(base, quote, rate_date, date.min)
+        if stale:
+            return FxRateResult(rate=Decimal(stale.rate), source="db_stale", rate_date=str(stale.rate_date))
+        return FxRateResult(rate=None, source=source, rate_date=None)
+
+    def _effective_date(self, as_of: date | None) -> date:
+        # Future-dated shipments are priced at the latest published rate.
+        today = date.today()
+        if as_of is None or as_of > today:
+            return today
+        return as_of
 
     def _extract_rate(self, payload: dict) -> tuple[Decimal | None, str | None]:
         try:
             series = payload["dataSets"][0]["series"]
             observations = next(iter(series.values()))["observations"]
-            last_key = sorted(observations.keys())[-1]
+            last_key = sorted(observations.keys(), key=int)[-1]
             last_value = observations[last_key][0]
             dates = payload["structure"]["dimensions"]["observation"][0]["values"]
             rate_date = dates[int(last_key)]["id"]
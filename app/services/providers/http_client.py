@@ -1,50 +1,284 @@
 from __future__ import annotations
 
+import asyncio
 import time
-from dataclasses import dataclass
+import uuid
 from typing import Any
 
 import httpx
-from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.metrics import CIRCUIT_STATE, UPSTREAM_LATENCY
+from app.core.redis import redis_client
+from app.core.tracing import SPAN_KIND_CLIENT, Span, span
+from app.services.providers.deadline import Deadline, DeadlineExceeded
+
+logger = get_logger()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Records one call outcome in the current window and trips the breaker when
+# the failure ratio (slow calls count as failures) crosses the threshold.
+# Both counts live in one hash per window, so they always cover the same calls.
+# KEYS: state hash, window hash, hosts set
+# ARGV: failed (0/1), now, window_seconds, min_calls, failure_ratio, host
+_RECORD_SCRIPT = """
+redis.call('SADD', KEYS[3], ARGV[6])
+local calls = redis.call('HINCRBY', KEYS[2], 'calls', 1)
+local failures = redis.call('HINCRBY', KEYS[2], 'failures', tonumber(ARGV[1]))
+if calls == 1 then redis.call('EXPIRE', KEYS[2], ARGV[3]) end
+if calls >= tonumber(ARGV[4]) and failures / calls >= tonumber(ARGV[5]) then
+  if redis.call('HGET', KEYS[1], 'state') ~= 'open' then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', ARGV[2])
+    return 1
+  end
+end
+return 0
+"""
+
+# Releases the half-open probe only for the caller holding its token.
+# KEYS: probe key
+# ARGV: token
+_RELEASE_PROBE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Counts a first attempt, or grants a retry if retries stay within the budget.
+# KEYS: requests counter, retries counter
+# ARGV: is_retry (0/1), window_seconds, ratio, min_retries
+_BUDGET_SCRIPT = """
+if ARGV[1] == '0' then
+  local n = redis.call('INCR', KEYS[1])
+  if n == 1 then redis.call('EXPIRE', KEYS[1], ARGV[2]) end
+  return 1
+end
+local requests = tonumber(redis.call('GET', KEYS[1]) or '0')
+local retries = tonumber(redis.call('GET', KEYS[2]) or '0')
+local allowed = math.max(tonumber(ARGV[4]), requests * tonumber(ARGV[3]))
+if retries >= allowed then return 0 end
+local r = redis.call('INCR', KEYS[2])
+if r == 1 then redis.call('EXPIRE', KEYS[2], ARGV[2]) end
+return 1
+"""
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised without touching the network while a host's breaker is open."""
 
 
-@dataclass
 class CircuitBreaker:
-    max_failures: int = 3
-    reset_seconds: int = 30
-    failures: int = 0
-    last_failure_ts: float | None = None
+    """Per-host breaker whose state lives in Redis so that every worker sees
+    the same picture of an upstream. After ``open_seconds`` a single worker
+    wins the half-open probe; its outcome closes or re-opens the circuit.
+    If Redis itself is unavailable the breaker fails open (allows calls).
 
-    def allow(self) -> bool:
-        if self.failures < self.max_failures:
-            return True
-        if self.last_failure_ts is None:
+    ``allow`` returns the probe token when the caller won the probe; only a
+    ``record`` carrying that token can close or re-open the circuit."""
+
+    HOSTS_KEY = "cb:hosts"
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.window_seconds = settings.cb_window_seconds
+        self.min_calls = settings.cb_min_calls
+        self.failure_ratio = settings.cb_failure_ratio
+        self.open_seconds = settings.cb_open_seconds
+        self.slow_call_seconds = settings.cb_slow_call_seconds
+
+    def _keys(self, host: str) -> tuple[str, str]:
+        return f"cb:{host}", f"cb:{host}:probe"
+
+    def _window_key(self, host: str, now: float) -> str:
+        return f"cb:{host}:w:{int(now // self.window_seconds)}"
+
+    async def state(self, host: str) -> str:
+        state_key = self._keys(host)[0]
+        try:
+            data = await redis_client.client.hgetall(state_key)
+        except Exception:
+            return CLOSED
+        if data.get("state") != OPEN:
+            return CLOSED
+        if time.time() - float(data.get("opened_at", 0)) < self.open_seconds:
+            return OPEN
+        return HALF_OPEN
+
+    async def hosts(self) -> list[str]:
+        return sorted(await redis_client.client.smembers(self.HOSTS_KEY))
+
+    async def export_state(self) -> None:
+        try:
+            hosts = await self.hosts()
+        except Exception:
+            return
+        for host in hosts:
+            current = await self.state(host)
+            for state in (CLOSED, OPEN, HALF_OPEN):
+                CIRCUIT_STATE.labels(host=host, state=state).set(1 if state == current else 0)
+
+    async def allow(self, host: str) -> bool | str:
+        """False while open; the probe token if this call is the half-open
+        probe; otherwise True."""
+        state = await self.state(host)
+        if state == CLOSED:
             return True
-        if time.time() - self.last_failure_ts > self.reset_seconds:
-            self.failures = 0
-            self.last_failure_ts = None
+        if state == OPEN:
+            return False
+        probe_key = self._keys(host)[1]
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis_client.client.set(probe_key, token, nx=True, ex=max(int(self.slow_call_seconds * 4), 5))
+        except Exception:
             return True
-        return False
-
-    def record_failure(self) -> None:
-        self.failures += 1
-        self.last_failure_ts = time.time()
-
-    def record_success(self) -> None:
-        self.failures = 0
-        self.last_failure_ts = None
-
-
-async def get_json(url: str, headers: dict[str, str] | None = None, params: dict[str, Any] | None = None) -> dict:
-    async with httpx.AsyncClient(timeout=10) as client:
-        async for attempt in AsyncRetrying(
-            stop=stop_after_attempt(3),
-            wait=wait_exponential(multiplier=0.5, min=0.5, max=4),
-            retry=retry_if_exception_type(httpx.HTTPError),
-            reraise=True,
-        ):
-            with attempt:
-                response = await client.get(url, headers=headers, params=params)
+        return token if acquired else False
+
+    async def record(self, host: str, success: bool, latency: float, probe: str | None = None) -> None:
+        failed = not success or latency > self.slow_call_seconds
+        state_key, probe_key = self._keys(host)
+        now = time.time()
+        window_key = self._window_key(host, now)
+        client = redis_client.client
+        try:
+            # A probe whose key expired meanwhile counts as an ordinary call.
+            if probe and await client.eval(_RELEASE_PROBE_SCRIPT, 1, probe_key, probe):
+                if failed:
+                    await client.hset(state_key, mapping={"state": OPEN, "opened_at": str(now)})
+                else:
+                    await client.delete(state_key, window_key)
+                    logger.info("circuit_closed", host=host)
+                return
+            tripped = await client.eval(
+                _RECORD_SCRIPT,
+                3,
+                state_key,
+                window_key,
+                self.HOSTS_KEY,
+                "1" if failed else "0",
+                str(now),
+                self.window_seconds,
+                self.min_calls,
+                self.failure_ratio,
+                host,
+            )
+            if tripped:
+                logger.warning("circuit_opened", host=host)
+        except Exception:
+            return
+
+
+class RetryBudget:
+    """Caps retries per host to a fraction of first attempts across all
+    workers, so a brownout does not multiply upstream load."""
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.window_seconds = settings.cb_window_seconds
+        self.ratio = settings.retry_budget_ratio
+        self.min_retries = settings.retry_budget_min
+
+    async def _acquire(self, host: str, is_retry: bool) -> bool:
+        try:
+            granted = await redis_client.client.eval(
+                _BUDGET_SCRIPT,
+                2,
+                f"rb:{host}:requests",
+                f"rb:{host}:retries",
+                "1" if is_retry else "0",
+                self.window_seconds,
+                self.ratio,
+                self.min_retries,
+            )
+        except Exception:
+            return not is_retry
+        return bool(granted)
+
+    async def record_request(self, host: str) -> None:
+        await self._acquire(host, is_retry=False)
+
+    async def try_retry(self, host: str) -> bool:
+        return await self._acquire(host, is_retry=True)
+
+
+circuit_breaker = CircuitBreaker()
+retry_budget = RetryBudget()
+
+MAX_ATTEMPTS = 3
+REQUEST_TIMEOUT_SECONDS = 10.0
+# Below this much remaining budget an attempt is not worth starting.
+MIN_ATTEMPT_SECONDS = 0.5
+
+
+def _is_upstream_failure(exc: httpx.HTTPError) -> bool:
+    """Transport errors, timeouts, 5xx and 429 say the upstream is unwell;
+    any other 4xx is an answer about the request and is not retried."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return True
+
+
+async def get_json(
+    url: str,
+    headers: dict[str, str] | None = None,
+    params: dict[str, Any] | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    parsed = httpx.URL(url)
+    with span("http.get", SPAN_KIND_CLIENT, host=parsed.host, path=parsed.path) as current:
+        return await _get_json(parsed.host, url, headers, params, deadline, current)
+
+
+async def _get_json(
+    host: str,
+    url: str,
+    headers: dict[str, str] | None,
+    params: dict[str, Any] | None,
+    deadline: Deadline | None,
+    current_span: Span | None,
+) -> dict:
+    if deadline is not None and deadline.remaining() < MIN_ATTEMPT_SECONDS:
+        raise DeadlineExceeded(f"Upstream budget exhausted before calling {host}")
+    permit = await circuit_breaker.allow(host)
+    if not permit:
+        raise CircuitOpenError(f"Circuit open for {host}")
+    probe = permit if isinstance(permit, str) else None
+
+    await retry_budget.record_request(host)
+    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT_SECONDS) as client:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            timeout = deadline.timeout(REQUEST_TIMEOUT_SECONDS) if deadline else REQUEST_TIMEOUT_SECONDS
+            started = time.monotonic()
+            if current_span is not None:
+                current_span.attributes["attempts"] = attempt
+            try:
+                response = await client.get(url, headers=headers, params=params, timeout=timeout)
                 response.raise_for_status()
-                return response.json()
+            except httpx.HTTPError as exc:
+                latency = time.monotonic() - started
+                if not _is_upstream_failure(exc):
+                    UPSTREAM_LATENCY.labels(host=host, outcome="client_error").observe(latency)
+                    await circuit_breaker.record(host, success=True, latency=latency, probe=probe)
+                    raise
+                UPSTREAM_LATENCY.labels(host=host, outcome="error").observe(latency)
+                await circuit_breaker.record(host, success=False, latency=latency, probe=probe)
+                backoff = min(4.0, 0.5 * 2 ** (attempt - 1))
+                # A failed probe re-opened the circuit; otherwise retry only while it stays closed.
+                if attempt == MAX_ATTEMPTS or probe or await circuit_breaker.state(host) != CLOSED:
+                    raise
+                if deadline is not None and deadline.remaining() < backoff + MIN_ATTEMPT_SECONDS:
+                    raise
+                if not await retry_budget.try_retry(host):
+                    raise
+                await asyncio.sleep(backoff)
+                continue
+            latency = time.monotonic() - started
+            UPSTREAM_LATENCY.labels(host=host, outcome="ok").observe(latency)
+            await circuit_breaker.record(host, success=True, latency=latency, probe=probe)
+            return response.json()
     return {}
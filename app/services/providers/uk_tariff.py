@@ -9,17 +9,19 @@ from app.models.rate_snapshot import RateSnapshot
 from app.repositories.fallback_repo import TariffOverrideRepository
 from app.repositories.rate_snapshot_repo import RateSnapshotRepository
 from app.services.providers.base import redis_get_json, redis_set_json
-from app.services.providers.http_client import CircuitBreaker, get_json
+from app.services.providers.deadline import Deadline
+from app.services.providers.http_client import get_json
 from app.services.providers.types import DutyRateResult
 
 TTL_SECONDS = 86400
-_cb = CircuitBreaker()
+COMPONENT = "uk_tariff"
 
 
 class UkTariffProvider:
-    def __init__(self, session) -> None:
+    def __init__(self, session, deadline: Deadline | None = None) -> None:
         self.session = session
         self.settings = get_settings()
+        self.deadline = deadline
         self.snapshot_repo = RateSnapshotRepository(session)
         self.override_repo = TariffOverrideRepository(session)
 
@@ -44,12 +46,9 @@ class UkTariffProvider:
                 rate = self._extract_ad_valorem(snapshot.response_payload)
                 return DutyRateResult(rate=rate, source="snapshot", is_estimated=False, missing=rate is None)
 
-        if not _cb.allow():
-            return await self._fallback(commodity_code, origin_country, preference_flag)
-
         url = f"{self.settings.uk_tariff_api_base}/commodities/{commodity_code}"
         try:
-            payload = await get_json(url)
+            payload = await get_json(url, deadline=self.deadline)
             await redis_set_json(cache_key, payload, TTL_SECONDS)
             if shipment_id is not None:
                 snapshot = RateSnapshot(
@@ -60,11 +59,11 @@ class UkTariffProvider:
                     ttl_seconds=TTL_SECONDS,
                 )
                 await self.snapshot_repo.create(snapshot)
-            _cb.record_success()
             rate = self._extract_ad_valorem(payload)
             return DutyRateResult(rate=rate, source="uk_api", is_estimated=False, missing=rate is None, raw_payload=payload)
         except Exception:
-            _cb.record_failure()
+            if self.deadline is not None:
+                self.deadline.mark_degraded(COMPONENT)
             return await self._fallback(commodity_code, origin_country, preference_flag)
 
     async def _fallback(
@@ -82,7 +81,7 @@ class UkTariffProvider:
             return cached
 
         url = f"{self.settings.uk_tariff_api_base}/commodities/{commodity_code}"
-        payload = await get_json(url)
+        payload = await get_json(url, deadline=self.deadline)
         await redis_set_json(cache_key, payload, TTL_SECONDS)
         return payload
 
@@ -3,18 +3,22 @@ from __future__ import annotations
 from typing import Any
 
 from app.core.config import get_settings
+from app.services.hs_search import normalize_query
 from app.services.providers.base import redis_get_json, redis_set_json
+from app.services.providers.deadline import Deadline
 from app.services.providers.http_client import get_json
 
 TTL_SECONDS = 86400
 
 
 class UkTariffSearchProvider:
-    def __init__(self) -> None:
+    def __init__(self, deadline: Deadline | None = None) -> None:
         self.settings = get_settings()
+        self.deadline = deadline
 
     async def search_by_description(self, query: str) -> dict[str, Any]:
-        cache_key = f"uk_tariff_search:{query}"
+        # Equivalent spellings of a description share one cache entry.
+        cache_key = f"uk_tariff_search:{normalize_query(query) or query}"
         cached = await redis_get_json(cache_key)
         if cached:
             return cached
@@ -24,6 +28,11 @@ class UkTariffSearchProvider:
 
         url = f"{self.settings.uk_tariff_search_base}/search.json"
         params = {"q": query}
-        payload = await get_json(url, params=params, headers={"X-Api-Key": self.settings.uk_tariff_search_key})
+        payload = await get_json(
+            url,
+            params=params,
+            headers={"X-Api-Key": self.settings.uk_tariff_search_key},
+            deadline=self.deadline,
+        )
         await redis_set_json(cache_key, payload, TTL_SECONDS)
         return payload
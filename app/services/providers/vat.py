@@ -1,28 +1,177 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from decimal import Decimal
+from types import MappingProxyType
+from typing import Mapping
 
 from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.redis import redis_client
+from app.db.session import SessionLocal
 from app.models.enums import ProviderType
+from app.models.fallback_tables import VatRate
 from app.models.rate_snapshot import RateSnapshot
 from app.repositories.fallback_repo import VatRateRepository
 from app.repositories.rate_snapshot_repo import RateSnapshotRepository
 from app.services.providers.base import redis_get_json, redis_set_json
-from app.services.providers.http_client import CircuitBreaker, get_json
+from app.services.providers.deadline import Deadline
+from app.services.providers.http_client import get_json
 from app.services.providers.types import VatRateResult
 
 TTL_SECONDS = 86400
-_cb = CircuitBreaker()
+VAT_REFRESH_CHANNEL = "vat_rates:changed"
+COMPONENT = "vat"
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class CountryVatRates:
+    standard: Decimal | None
+    # (hs_prefix, rate_type, rate), longest prefix first
+    categories: tuple[tuple[str, str, Decimal], ...]
+
+
+@dataclass(frozen=True)
+class VatTable:
+    countries: Mapping[str, CountryVatRates]
+    loaded_at: datetime
+
+    @classmethod
+    def from_rows(cls, rows: list[VatRate]) -> "VatTable":
+        standard: dict[str, Decimal] = {}
+        categories: dict[str, list[tuple[str, str, Decimal]]] = {}
+        for row in rows:
+            country = row.country.upper()
+            if row.hs_prefix:
+                prefix = "".join(ch for ch in row.hs_prefix if ch.isdigit())
+                categories.setdefault(country, []).append((prefix, row.rate_type, Decimal(row.rate)))
+            elif row.rate_type == "standard":
+                standard[country] = Decimal(row.rate)
+        countries = {
+            country: CountryVatRates(
+                standard=standard.get(country),
+                categories=tuple(sorted(categories.get(country, []), key=lambda c: len(c[0]), reverse=True)),
+            )
+            for country in standard.keys() | categories.keys()
+        }
+        return cls(countries=MappingProxyType(countries), loaded_at=datetime.now(timezone.utc))
+
+    def standard_rate(self, country: str) -> VatRateResult | None:
+        rates = self.countries.get(country.upper())
+        if not rates or rates.standard is None:
+            return None
+        return VatRateResult(rate=rates.standard, source="memory")
+
+    def item_rate(self, country: str, hs_code: str | None) -> VatRateResult | None:
+        rates = self.countries.get(country.upper())
+        if not rates:
+            return None
+        code = "".join(ch for ch in (hs_code or "") if ch.isdigit())
+        if code:
+            for prefix, rate_type, rate in rates.categories:
+                if code.startswith(prefix):
+                    return VatRateResult(rate=rate, source=f"memory:{rate_type}")
+        return self.standard_rate(country)
+
+
+_table: VatTable | None = None
+
+
+def get_vat_table() -> VatTable | None:
+    return _table
+
+
+async def load_vat_table() -> VatTable:
+    global _table
+    async with SessionLocal() as session:
+        rows = await VatRateRepository(session).list_all()
+    _table = VatTable.from_rows(rows)
+    logger.info("vat_table_loaded", countries=len(_table.countries))
+    return _table
+
+
+async def publish_vat_refresh() -> None:
+    await redis_client.client.publish(VAT_REFRESH_CHANNEL, "refresh")
+
+
+class VatTableRefresher:
+    """Keeps the in-process VAT table current: reloads on a fixed interval
+    and whenever another worker publishes on ``VAT_REFRESH_CHANNEL``."""
+
+    def __init__(self, interval_seconds: int) -> None:
+        self.interval_seconds = interval_seconds
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        try:
+            await load_vat_table()
+        except Exception:
+            logger.warning("vat_table_load_failed")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._wait_for_change()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("vat_table_listen_failed")
+                await asyncio.sleep(self.interval_seconds)
+            try:
+                await load_vat_table()
+            except Exception:
+                logger.warning("vat_table_load_failed")
+
+    async def _wait_for_change(self) -> None:
+        pubsub = redis_client.client.pubsub()
+        await pubsub.subscribe(VAT_REFRESH_CHANNEL)
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.interval_seconds
+            while (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message:
+                    return
+        finally:
+            await pubsub.unsubscribe(VAT_REFRESH_CHANNEL)
+            await pubsub.aclose()
 
 
 class VatRateProvider:
-    def __init__(self, session) -> None:
+    def __init__(self, session, deadline: Deadline | None = None) -> None:
         self.session = session
         self.settings = get_settings()
+        self.deadline = deadline
         self.repo = VatRateRepository(session)
         self.snapshot_repo = RateSnapshotRepository(session)
 
+    def get_item_rate(self, country: str, hs_code: str | None) -> VatRateResult | None:
+        table = get_vat_table()
+        if table is None:
+            return None
+        return table.item_rate(country, hs_code)
+
     async def get_standard_rate(self, country: str, shipment_id=None) -> VatRateResult:
+        table = get_vat_table()
+        if table is not None:
+            in_memory = table.standard_rate(country)
+            if in_memory:
+                return in_memory
+
         cache_key = f"vat:{country}:standard"
         cached = await redis_get_json(cache_key)
         if cached:
@@ -33,13 +182,14 @@ class VatRateProvider:
             await redis_set_json(cache_key, {"rate": str(db_rate.rate)}, TTL_SECONDS)
             return VatRateResult(rate=Decimal(db_rate.rate), source="db")
 
-        if self.settings.vat_api_base and self.settings.vat_api_key and _cb.allow():
+        if self.settings.vat_api_base and self.settings.vat_api_key:
             try:
                 url = f"{self.settings.vat_api_base}/vat-rate-check"
                 payload = await get_json(
                     url,
                     headers={"x-api-key": self.settings.vat_api_key},
                     params={"country_code": country, "rate_type": "GOODS"},
+                    deadline=self.deadline,
                 )
                 rate = self._extract_standard_rate(payload)
                 await redis_set_json(cache_key, {"rate": str(rate)}, TTL_SECONDS)
@@ -52,10 +202,10 @@ class VatRateProvider:
                         ttl_seconds=TTL_SECONDS,
                     )
                     await self.snapshot_repo.create(snapshot)
-                _cb.record_success()
                 return VatRateResult(rate=rate, source="vatapi", raw_payload=payload)
             except Exception:
-                _cb.record_failure()
+                if self.deadline is not None:
+                    self.deadline.mark_degraded(COMPONENT)
 
         return VatRateResult(rate=None, source="missing")
 
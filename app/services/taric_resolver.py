@@ -5,6 +5,7 @@ from datetime import date
 from decimal import Decimal
 from typing import Any
 
+from app.core.metrics import TARIC_CACHE
 from app.repositories.taric_repo import TaricRepository
 from app.models.taric import TaricResolvedCache
 
@@ -60,6 +61,7 @@ class TaricResolver:
             )
 
         cached = await self.repo.get_cached(snapshot_date, goods_code, origin_country_code, as_of, additional_code)
+        TARIC_CACHE.labels(outcome="hit" if cached else "miss").inc()
         if cached:
             payload = cached.payload
             duties = []
@@ -87,11 +89,21 @@ class TaricResolver:
             )
 
         codes = self._candidate_codes(goods_code)
-        goods_rows = await self.repo.get_goods_candidates(codes, as_of)
-        matched_codes = {row.goods_code for row in goods_rows}
-        matched_code = next((code for code in codes if code in matched_codes), None)
-
-        measures = await self.repo.get_measures(list(matched_codes) or codes, as_of)
+        # Measures are inherited from every real ancestor of the matched line,
+        # which aren't always the code's truncations (e.g. grouping headings).
+        ancestry = [row.goods_code for row in await self.repo.get_ancestry(codes, as_of)]
+        if ancestry:
+            matched_code = ancestry[0]
+        else:
+            # Paths not built yet (nomenclature loaded before they existed).
+            goods_rows = await self.repo.get_goods_candidates(codes, as_of)
+            matched_codes = {row.goods_code for row in goods_rows}
+            matched_code = next((code for code in codes if code in matched_codes), None)
+        # The truncations still count: a line whose parent link is missing has
+        # an ancestry of just itself but inherits from its heading all the same.
+        lookup_codes = list(dict.fromkeys(ancestry + codes))
+
+        measures = await self.repo.get_measures(lookup_codes, as_of)
         applicable_measures = []
         for measure in measures:
             applies = await self.repo.geo_applies(measure.geo_code, origin_country_code, as_of)
@@ -0,0 +1,48 @@
+"""Materialised goods nomenclature hierarchy.
+
+Each ``goods_nomenclature`` row carries ``path``: the codes from its root
+down to itself, joined with dots. Ancestors are the codes in the path (one
+primary-key lookup), children come from the ``parent_goods_code`` index and
+a subtree is a prefix match on ``path`` (btree, ``text_pattern_ops``).
+"""
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PATH_SEPARATOR = "."
+# Nomenclature trees are at most a dozen levels deep; the bound only stops a
+# corrupt parent cycle from recursing forever.
+MAX_DEPTH = 32
+
+# Roots are lines without a parent, pointing at themselves or at a code that
+# isn't loaded. Only rows whose path actually changes are written.
+REBUILD_PATHS_SQL = f"""
+WITH RECURSIVE tree AS (
+    SELECT g.goods_code, g.goods_code::text AS path, 1 AS depth
+    FROM goods_nomenclature g
+    WHERE g.parent_goods_code IS NULL
+       OR g.parent_goods_code = g.goods_code
+       OR NOT EXISTS (SELECT 1 FROM goods_nomenclature p WHERE p.goods_code = g.parent_goods_code)
+    UNION ALL
+    SELECT child.goods_code, tree.path || '{PATH_SEPARATOR}' || child.goods_code, tree.depth + 1
+    FROM goods_nomenclature child
+    JOIN tree ON child.parent_goods_code = tree.goods_code
+    WHERE child.goods_code <> tree.goods_code AND tree.depth < {MAX_DEPTH}
+)
+UPDATE goods_nomenclature g
+SET path = tree.path
+FROM tree
+WHERE g.goods_code = tree.goods_code AND g.path IS DISTINCT FROM tree.path
+"""
+
+
+async def rebuild_paths(session: AsyncSession) -> int:
+    """Recomputes ``path`` for the whole table; returns the number of rows changed."""
+    result = await session.execute(text(REBUILD_PATHS_SQL))
+    return result.rowcount or 0
+
+
+def path_codes(path: str | None) -> list[str]:
+    """Codes along ``path``, nearest first (the node itself, then its parent, ...)."""
+    return list(reversed(path.split(PATH_SEPARATOR))) if path else []
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import hashlib
 import json
 from datetime import date, datetime
@@ -24,6 +25,7 @@ from app.models.taric import (
     MeasureDutyExpression,
     TaricSnapshot,
 )
+from app.taric.hierarchy import rebuild_paths
 
 logger = get_logger()
 
@@ -90,11 +92,16 @@ async def import_taric_files(
     snapshot_date: date,
     source_label: str,
     force: bool = False,
+    file_hashes: tuple[str, str, str] | None = None,
 ) -> dict[str, Any]:
+    """``file_hashes`` are the SHA-256 digests of the three files when the
+    caller already computed them while receiving the upload."""
     async with SessionLocal() as session:
-        goods_hash = _file_hash(goods_file)
-        measures_hash = _file_hash(measures_file)
-        add_codes_hash = _file_hash(add_codes_file)
+        if file_hashes is None:
+            file_hashes = await asyncio.gather(
+                *(asyncio.to_thread(_file_hash, path) for path in (goods_file, measures_file, add_codes_file))
+            )
+        goods_hash, measures_hash, add_codes_hash = file_hashes
         files_hash = hashlib.sha256(f"{goods_hash}{measures_hash}{add_codes_hash}".encode()).hexdigest()
 
         existing = await session.execute(
@@ -112,9 +119,10 @@ async def import_taric_files(
             logger.info("taric_import_skip", snapshot_date=str(snapshot_date), files_hash=files_hash)
             return {"status": "skipped", "snapshot_date": str(snapshot_date)}
 
-        goods_df = _normalize_columns(pd.read_excel(goods_file))
-        measures_df = _normalize_columns(pd.read_excel(measures_file))
-        add_codes_df = _normalize_columns(pd.read_excel(add_codes_file))
+        # Parsing large workbooks takes a while; keep it off the event loop.
+        goods_df = _normalize_columns(await asyncio.to_thread(pd.read_excel, goods_file))
+        measures_df = _normalize_columns(await asyncio.to_thread(pd.read_excel, measures_file))
+        add_codes_df = _normalize_columns(await asyncio.to_thread(pd.read_excel, add_codes_file))
 
         goods_df = goods_df.rename(
             columns={
@@ -144,6 +152,7 @@ async def import_taric_files(
             )
         goods_code_set = {row["goods_code"] for row in goods_rows if row["goods_code"]}
         await _upsert(session, GoodsNomenclature, goods_rows, ["goods_code"])
+        paths_changed = await rebuild_paths(session)
 
         if "description" in goods_df.columns:
             desc_rows = []
@@ -276,6 +285,7 @@ async def import_taric_files(
             snapshot_date=str(snapshot_date),
             files_hash=files_hash,
             goods_rows=len(goods_rows),
+            paths_changed=paths_changed,
             measure_rows=len(measure_rows),
             add_code_rows=len(add_rows),
         )
@@ -303,8 +313,6 @@ def main() -> None:
     measures_file = next(base_dir.glob("Measures_*.xlsx"))
     add_codes_file = next(base_dir.glob("Add_Codes_*.xlsx"))
 
-    import asyncio
-
     asyncio.run(
         import_taric_files(
             goods_file=goods_file,
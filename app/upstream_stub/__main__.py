@@ -0,0 +1,4 @@
+from app.upstream_stub.server import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Local stand-in for the UK tariff, ECB, VAT, EU TARIC and UK search APIs.
+
+Replays recorded ``RateSnapshot.response_payload`` documents so ``/calculate``
+can be load-tested without touching real upstreams. Point the API at it with::
+
+    UK_TARIFF_API_BASE=http://localhost:8900/uk
+    ECB_API_BASE=http://localhost:8900/ecb
+    VAT_API_BASE=http://localhost:8900/vat      VAT_API_KEY=stub
+    EU_TARIC_API_BASE=http://localhost:8900/eu  EU_TARIC_API_KEY=stub
+    UK_TARIFF_SEARCH_BASE=http://localhost:8900/search  UK_TARIFF_SEARCH_KEY=stub
+
+Run ``python -m app.upstream_stub export --out snapshots.json`` to dump the
+recorded snapshots, then ``python -m app.upstream_stub serve --fixtures
+snapshots.json --latency-ms 80 --error-rate 0.02``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+
+from app.core.logging import configure_logging, get_logger
+from app.models.enums import ProviderType
+
+logger = get_logger()
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_ms: float = 5000.0
+    synthesize: bool = True
+
+
+def _request_key(provider: str, request_key: dict[str, Any]) -> str:
+    return f"{provider}:{json.dumps(request_key, sort_keys=True)}"
+
+
+class SnapshotStore:
+    def __init__(self) -> None:
+        self._payloads: dict[str, list[dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._payloads.values())
+
+    def add(self, provider: str, request_key: dict[str, Any], payload: dict[str, Any]) -> None:
+        self._payloads.setdefault(_request_key(provider, request_key), []).append(payload)
+
+    def get(self, provider: str, request_key: dict[str, Any]) -> dict[str, Any] | None:
+        payloads = self._payloads.get(_request_key(provider, request_key))
+        return random.choice(payloads) if payloads else None
+
+    @classmethod
+    def from_file(cls, path: Path) -> "SnapshotStore":
+        store = cls()
+        for record in json.loads(path.read_text()):
+            store.add(record["provider"], record["request_key"], record["response_payload"])
+            # FX snapshots carry the as-of date; also index them by pair alone.
+            if record["provider"] == ProviderType.FX.value and "as_of" in record["request_key"]:
+                pair = {k: v for k, v in record["request_key"].items() if k != "as_of"}
+                store.add(record["provider"], pair, record["response_payload"])
+        return store
+
+
+async def export_snapshots(out: Path) -> int:
+    from app.db.session import SessionLocal
+    from app.models.rate_snapshot import RateSnapshot
+
+    async with SessionLocal() as session:
+        result = await session.execute(select(RateSnapshot))
+        records = [
+            {
+                "provider": snapshot.provider.value,
+                "request_key": snapshot.request_key,
+                "response_payload": snapshot.response_payload,
+            }
+            for snapshot in result.scalars().all()
+        ]
+    out.write_text(json.dumps(records))
+    return len(records)
+
+
+def _synthetic_uk_commodity(code: str) -> dict[str, Any]:
+    return {
+        "data": {"id": code, "type": "commodity", "attributes": {"goods_nomenclature_item_id": code}},
+        "included": [{"type": "measure", "attributes": {"duty_expression": "2.00 %"}}],
+    }
+
+
+def _synthetic_ecb(end: date) -> dict[str, Any]:
+    days = [end - timedelta(days=offset) for offset in range(4, -1, -1)]
+    return {
+        "dataSets": [{"series": {"0:0:0:0:0": {"observations": {str(i): [0.85] for i in range(len(days))}}}}],
+        "structure": {"dimensions": {"observation": [{"values": [{"id": d.isoformat()} for d in days]}]}},
+    }
+
+
+def create_app(store: SnapshotStore, faults: FaultConfig) -> FastAPI:
+    app = FastAPI(title="Upstream stand-in")
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path.startswith("/_control"):
+            return await call_next(request)
+        delay = max(0.0, random.gauss(faults.latency_ms, faults.jitter_ms)) if faults.jitter_ms else faults.latency_ms
+        if faults.slow_rate and random.random() < faults.slow_rate:
+            delay = faults.slow_ms
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if faults.error_rate and random.random() < faults.error_rate:
+            return JSONResponse(status_code=503, content={"error": "injected"})
+        return await call_next(request)
+
+    def replay(provider: ProviderType, request_key: dict[str, Any], synthetic=None) -> dict[str, Any]:
+        payload = store.get(provider.value, request_key)
+        if payload is not None:
+            return payload
+        if faults.synthesize and synthetic is not None:
+            return synthetic()
+        raise HTTPException(status_code=404, detail="No recorded response")
+
+    @app.get("/_control")
+    async def get_control():
+        return {"snapshots": len(store), **asdict(faults)}
+
+    @app.post("/_control")
+    async def set_control(payload: dict[str, Any]):
+        for key, value in payload.items():
+            if hasattr(faults, key):
+                setattr(faults, key, type(getattr(faults, key))(value))
+        return asdict(faults)
+
+    @app.get("/uk/commodities/{commodity_code}")
+    async def uk_commodity(commodity_code: str):
+        return replay(
+            ProviderType.UK_TARIFF,
+            {"commodity_code": commodity_code},
+            lambda: _synthetic_uk_commodity(commodity_code),
+        )
+
+    @app.get("/ecb/{series_key}")
+    async def ecb_series(series_key: str, endPeriod: str | None = None):
+        parts = series_key.split(".")
+        if len(parts) < 3:
+            raise HTTPException(status_code=404, detail="Unknown series")
+        base, quote = parts[1], parts[2]
+        end = date.fromisoformat(endPeriod) if endPeriod else date.today()
+        request_key = {"base": base, "quote": quote}
+        if endPeriod:
+            recorded = store.get(ProviderType.FX.value, {**request_key, "as_of": endPeriod})
+            if recorded is not None:
+                return recorded
+        return replay(ProviderType.FX, request_key, lambda: _synthetic_ecb(end))
+
+    @app.get("/vat/vat-rate-check")
+    async def vat_rate_check(country_code: str):
+        return replay(ProviderType.VAT, {"country": country_code}, lambda: {"standard_rate": 20})
+
+    @app.get("/eu/taric")
+    async def eu_taric(hs_code: str, origin: str | None = None):
+        return replay(ProviderType.EU_TARIC, {"hs_code": hs_code, "origin": origin}, lambda: {"duty_rate": "0.02"})
+
+    @app.get("/search/search.json")
+    async def uk_search(q: str):
+        return {"results": [], "query": q}
+
+    return app
+
+
+def main() -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog="python -m app.upstream_stub")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Dump recorded rate snapshots to a fixtures file")
+    export.add_argument("--out", required=True)
+
+    serve = sub.add_parser("serve", help="Serve recorded responses with injected latency/errors")
+    serve.add_argument("--fixtures")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8900)
+    serve.add_argument("--latency-ms", type=float, default=0.0)
+    serve.add_argument("--jitter-ms", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--slow-rate", type=float, default=0.0)
+    serve.add_argument("--slow-ms", type=float, default=5000.0)
+    serve.add_argument("--no-synthesize", action="store_true", help="404 instead of synthesizing unrecorded responses")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count = asyncio.run(export_snapshots(Path(args.out)))
+        logger.info("upstream_stub_export", snapshots=count, out=args.out)
+        return
+
+    import uvicorn
+
+    store = SnapshotStore.from_file(Path(args.fixtures)) if args.fixtures else SnapshotStore()
+    faults = FaultConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+        synthesize=not args.no_synthesize,
+    )
+    logger.info("upstream_stub_start", snapshots=len(store), **asdict(faults))
+    uvicorn.run(create_app(store, faults), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
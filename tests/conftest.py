@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db import session as db_session
+
+
+class FakeResult(list):
+    def __init__(self, rows=(), rowcount=1):
+        super().__init__(rows)
+        self.rowcount = rowcount
+
+    def scalars(self):
+        return self
+
+    def unique(self):
+        return self
+
+    def all(self):
+        return list(self)
+
+    def scalar_one_or_none(self):
+        return self[0] if self else None
+
+    def one_or_none(self):
+        return self[0] if self else None
+
+
+class FakeSession:
+    """Stands in for an AsyncSession. Every statement is kept compiled for
+    PostgreSQL in ``statements``; SELECTs answer with ``rows`` and writes are
+    kept in ``writes`` as (kind, executemany params)."""
+
+    def __init__(self):
+        self.rows = []
+        self.rowcount = 1
+        self.statements = []
+        self.writes = []
+        self.added = []
+        self.selects = 0
+        self.flushes = 0
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    def inserted(self):
+        """Params of the last bulk INSERT, or None if nothing was inserted."""
+        return next((params for kind, params in reversed(self.writes) if kind == "insert"), None)
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def flush(self):
+        self.flushes += 1
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt.compile(dialect=postgresql.dialect()))
+        if stmt.is_select:
+            self.selects += 1
+            return FakeResult(self.rows)
+        self.writes.append((stmt.__visit_name__, params))
+        return FakeResult(rowcount=self.rowcount)
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def fake_session():
+    return FakeSession()
+
+
+@pytest.fixture
+def session_local(monkeypatch, fake_session):
+    """Hands ``fake_session`` to code that opens its own ``SessionLocal()``."""
+    monkeypatch.setattr(db_session, "SessionLocal", lambda: fake_session)
+    return fake_session
@@ -0,0 +1,63 @@
+import pytest
+
+from app.bench.generators import BENCH_CHAPTER, BENCH_GEO_PREFIX, goods_codes, taric_rows
+from app.bench.suite import BenchRefused, BenchRun, _summary, compare, ensure_disposable_database
+from app.core.config import Settings
+
+
+def test_summary_percentiles():
+    summary = _summary([float(n) for n in range(1, 21)])
+    assert summary["runs"] == 20
+    assert summary["min_ms"] == 1.0
+    assert summary["median_ms"] == 10.5
+    assert summary["p95_ms"] == 19.0
+
+
+def test_compare_flags_median_regressions_only_above_threshold():
+    baseline = {"results": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}}}
+    results = {"a": {"median_ms": 11.5}, "b": {"median_ms": 13.0}, "new": {"median_ms": 99.0}}
+    regressions = compare(results, baseline, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b:")
+
+
+def test_generated_codes_stay_outside_the_real_code_space():
+    codes = goods_codes(50)
+    assert len(set(codes)) == 50
+    assert all(code.startswith(BENCH_CHAPTER) and len(code) == 10 for code in codes)
+    rows = taric_rows(codes, measures=100, geo_groups=3, members_per_group=2)
+    assert {m["measure_uid"] for m in rows["measures"]} == {e["measure_uid"] for e in rows["duty_expressions"]}
+
+
+def test_import_workbook_rows_use_only_bench_geo_codes():
+    rows = taric_rows(goods_codes(20), measures=50, geo_groups=2, members_per_group=2, real_geo=False)
+    assert all(m["geo_code"].startswith(BENCH_GEO_PREFIX) for m in rows["measures"])
+
+
+def test_cleanup_keys_cover_exactly_the_generated_rows():
+    bench = BenchRun(items=[10], measures=30, goods=5, geo_groups=2, repeat=1, warmup=0)
+    keys = bench.inserted
+    assert set(keys["goods_codes"]) == {g["goods_code"] for g in bench.rows["goods"]}
+    assert all(code.startswith(BENCH_CHAPTER) for code in keys["goods_codes"])
+    assert all(uid.startswith("bench-") for uid in keys["measure_uids"])
+    assert len(keys["measure_uids"]) == 60
+    assert all(code.startswith(BENCH_GEO_PREFIX) for code in keys["geo_areas"])
+
+
+@pytest.mark.parametrize(
+    "flag,url,allowed",
+    [
+        (False, "postgresql+asyncpg://u:p@db:5432/landed_cost_bench", False),
+        (True, "postgresql+asyncpg://u:p@db:5432/landed_cost", False),
+        (True, "postgresql+asyncpg://u:p@db:5432/contest", False),
+        (True, "postgresql+asyncpg://u:p@db:5432/landed_cost_bench", True),
+        (True, "postgresql+asyncpg://u:p@localhost/test", True),
+    ],
+)
+def test_bench_requires_a_disposable_database(flag, url, allowed):
+    settings = Settings(BENCH_DISPOSABLE_DATABASE=flag, DATABASE_URL=url)
+    if allowed:
+        ensure_disposable_database(settings)
+    else:
+        with pytest.raises(BenchRefused):
+            ensure_disposable_database(settings)
@@ -1,4 +1,5 @@
 import asyncio
+from datetime import date
 from decimal import Decimal
 from types import SimpleNamespace
 
@@ -33,10 +34,43 @@ class FakeShipmentRepo:
     async def get(self, shipment_id, user_id):
         return self.shipment
 
+    async def get_many(self, shipment_ids, user_id):
+        return [self.shipment] if self.shipment.id in shipment_ids else []
+
     async def update(self, shipment):
         return shipment
 
 
+def _item(item_id="i1", hs_code="0101", quantity="1", unit_price="100", origin_country="CN"):
+    return SimpleNamespace(
+        id=item_id,
+        hs_code=hs_code,
+        origin_country=origin_country,
+        quantity=Decimal(quantity),
+        unit_price=Decimal(unit_price),
+        goods_value=None,
+    )
+
+
+def _shipment(shipment_id, items, currency="GBP", import_date=None):
+    """A UK import on CIF terms with no freight or insurance to add."""
+    return SimpleNamespace(
+        id=shipment_id,
+        user_id="u1",
+        direction=Direction.IMPORT_UK,
+        destination_country=None,
+        origin_country_default="CN",
+        incoterm=Incoterm.CIF,
+        currency=currency,
+        import_date=import_date,
+        fx_rate_to_gbp=None,
+        fx_rate_to_eur=None,
+        status=ShipmentStatus.DRAFT,
+        items=items,
+        costs=ShipmentCosts(shipment_id=shipment_id, freight_amount=Decimal("0"), insurance_amount=Decimal("0")),
+    )
+
+
 @pytest.mark.asyncio
 async def test_exw_missing_freight_insurance_needs_input():
     shipment = SimpleNamespace(
@@ -190,3 +224,125 @@ async def test_multi_item_different_rates():
     per_item = {item["hs_code"]: Decimal(item["duty_amount"]) for item in result.per_item}
     assert per_item["0101"] > 0
     assert per_item["0202"] > per_item["0101"]
+
+
+@pytest.mark.asyncio
+async def test_calculate_many_prefetches_fx_by_import_date():
+    shipment = _shipment("s4", [_item()], currency="USD", import_date=date(2024, 3, 1))
+
+    service = CalculatorService(FakeSession())
+    service.shipment_repo = FakeShipmentRepo(shipment)
+    prefetched = []
+    requested = []
+
+    async def prefetch(requests):
+        prefetched.extend(requests)
+
+    async def get_rate(base, quote, shipment_id=None, as_of=None):
+        requested.append(as_of)
+        return FxRateResult(rate=Decimal("0.8"), source="test", rate_date=str(as_of))
+
+    async def duty_rate(*args, **kwargs):
+        return DutyRateResult(rate=Decimal("0"), source="test", is_estimated=False, missing=False)
+
+    async def vat_rate(*args, **kwargs):
+        return VatRateResult(rate=Decimal("0.2"), source="test")
+
+    service.fx_provider.prefetch = prefetch
+    service.fx_provider.get_rate = get_rate
+    service._get_duty_rate = duty_rate
+    service._get_vat_rate = vat_rate
+
+    results = await service.calculate_many(["s4", "missing"], "u1")
+    assert prefetched == [("USD", "GBP", date(2024, 3, 1))]
+    assert requested == [date(2024, 3, 1)]
+    assert results["s4"].status == "ok"
+    assert results["missing"].status == "not_found"
+
+
+@pytest.mark.asyncio
+async def test_item_level_reduced_vat_rate():
+    shipment = _shipment("s5", [_item("i1", "4901990000"), _item("i2", "8471300000")])
+
+    service = CalculatorService(FakeSession())
+    service.shipment_repo = FakeShipmentRepo(shipment)
+
+    async def duty_rate(*args, **kwargs):
+        return DutyRateResult(rate=Decimal("0"), source="test", is_estimated=False, missing=False)
+
+    async def vat_rate(*args, **kwargs):
+        return VatRateResult(rate=Decimal("0.2"), source="test")
+
+    async def fx_rate(*args, **kwargs):
+        return FxRateResult(rate=Decimal("1"), source="test", rate_date=None)
+
+    def item_rate(country, hs_code):
+        if hs_code.startswith("49"):
+            return VatRateResult(rate=Decimal("0"), source="memory:zero")
+        return None
+
+    service._get_duty_rate = duty_rate
+    service._get_vat_rate = vat_rate
+    service._ensure_fx_rate = fx_rate
+    service.vat_provider.get_item_rate = item_rate
+
+    result = await service.calculate("s5", "u1")
+    assert Decimal(result.breakdown["vat_total"]) == Decimal("20.0000")
+    rates = {item["hs_code"]: item["vat_rate"] for item in result.per_item}
+    assert rates == {"4901990000": "0", "8471300000": "0.2"}
+
+
+@pytest.mark.asyncio
+async def test_degraded_components_reported_in_warnings():
+    shipment = _shipment("s6", [_item(unit_price="10")])
+
+    service = CalculatorService(FakeSession())
+    service.shipment_repo = FakeShipmentRepo(shipment)
+
+    async def duty_rate(*args, **kwargs):
+        service.deadline.mark_degraded("uk_tariff")
+        return DutyRateResult(rate=Decimal("0.1"), source="override", is_estimated=True, missing=False)
+
+    async def vat_rate(*args, **kwargs):
+        return VatRateResult(rate=Decimal("0.2"), source="test")
+
+    async def fx_rate(*args, **kwargs):
+        return FxRateResult(rate=Decimal("1"), source="test", rate_date=None)
+
+    service._get_duty_rate = duty_rate
+    service._get_vat_rate = vat_rate
+    service._ensure_fx_rate = fx_rate
+
+    result = await service.calculate("s6", "u1")
+    assert "Upstream uk_tariff degraded; cached or fallback data used." in result.warnings
+
+
+@pytest.mark.asyncio
+async def test_each_shipment_gets_its_own_upstream_budget():
+    shipment = _shipment("s7", [_item(unit_price="10")])
+
+    service = CalculatorService(FakeSession(), budget_seconds=5)
+    service.shipment_repo = FakeShipmentRepo(shipment)
+    remaining = []
+
+    async def duty_rate(*args, **kwargs):
+        remaining.append(service.uk_provider.deadline.remaining())
+        # The first shipment spends the whole budget.
+        service.deadline.budget_seconds = 0
+        service.deadline.mark_degraded("uk_tariff")
+        return DutyRateResult(rate=Decimal("0.1"), source="override", is_estimated=True, missing=False)
+
+    async def vat_rate(*args, **kwargs):
+        return VatRateResult(rate=Decimal("0.2"), source="test")
+
+    async def fx_rate(*args, **kwargs):
+        return FxRateResult(rate=Decimal("1"), source="test", rate_date=None)
+
+    service._get_duty_rate = duty_rate
+    service._get_vat_rate = vat_rate
+    service._ensure_fx_rate = fx_rate
+
+    await service.calculate("s7", "u1")
+    second = await service.calculate("s7", "u1")
+    assert all(value > 4 for value in remaining)
+    assert second.warnings.count("Upstream uk_tariff degraded; cached or fallback data used.") == 1
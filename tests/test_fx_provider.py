@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.providers.fx_ecb import FxProvider
+
+
+class FakeFxRepo:
+    def __init__(self, rows):
+        self.rows = rows
+        self.bulk_calls = 0
+
+    async def get_rates_for_pairs(self, pairs, start, end):
+        self.bulk_calls += 1
+        return [r for r in self.rows if (r.base, r.quote) in pairs and start <= r.rate_date <= end]
+
+    async def get_latest_rate(self, base, quote, rate_date, earliest):
+        raise AssertionError("prefetched rates must not hit the per-date query")
+
+
+def _row(base, quote, rate, rate_date):
+    return SimpleNamespace(base=base, quote=quote, rate=Decimal(rate), rate_date=rate_date)
+
+
+@pytest.mark.asyncio
+async def test_prefetch_resolves_all_pairs_in_one_query():
+    repo = FakeFxRepo(
+        [
+            _row("USD", "GBP", "0.80", date(2024, 3, 1)),
+            _row("USD", "GBP", "0.79", date(2024, 6, 3)),
+            _row("CNY", "EUR", "0.13", date(2024, 6, 3)),
+        ]
+    )
+    provider = FxProvider(None)
+    provider.repo = repo
+
+    # 2024-06-08 is a Saturday and falls back to the Monday fixing.
+    await provider.prefetch(
+        [("USD", "GBP", date(2024, 3, 1)), ("USD", "GBP", date(2024, 6, 8)), ("CNY", "EUR", date(2024, 6, 3))]
+    )
+    assert repo.bulk_calls == 1
+
+    march = await provider.get_rate("USD", "GBP", as_of=date(2024, 3, 1))
+    june = await provider.get_rate("USD", "GBP", as_of=date(2024, 6, 8))
+    cny = await provider.get_rate("CNY", "EUR", as_of=date(2024, 6, 3))
+    assert march.rate == Decimal("0.80")
+    assert june.rate == Decimal("0.79")
+    assert june.rate_date == "2024-06-03"
+    assert cny.rate == Decimal("0.13")
+
+
+@pytest.mark.asyncio
+async def test_future_date_uses_today():
+    provider = FxProvider(None)
+    provider.repo = FakeFxRepo([_row("USD", "EUR", "0.9", date.today())])
+
+    await provider.prefetch([("USD", "EUR", date.today() + timedelta(days=30))])
+    result = await provider.get_rate("USD", "EUR", as_of=date.today() + timedelta(days=30))
+    assert result.rate == Decimal("0.9")
+
+
+def test_fx_route_rejects_malformed_as_of():
+    from fastapi.testclient import TestClient
+
+    from app.core.deps import get_db_session
+    from app.main import app
+
+    async def no_session():
+        yield None
+
+    app.dependency_overrides[get_db_session] = no_session
+    try:
+        response = TestClient(app).get("/api/rates/fx", params={"base": "USD", "quote": "EUR", "as_of": "2024-13-01"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
@@ -0,0 +1,94 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.repositories.taric_repo import TaricRepository
+from app.services.hs_search import HsSearchService, HsSuggestionCache, normalize_query
+
+
+class _Repo:
+    def __init__(self):
+        self.queries = []
+        self.snapshot = date(2024, 1, 1)
+
+    async def get_latest_snapshot_date(self):
+        return self.snapshot
+
+    async def search_goods(self, query, as_of, limit):
+        self.queries.append(query)
+        return [("7318159000", "Other screws and bolts", 0.71234)]
+
+
+def test_queries_are_normalised():
+    assert normalize_query("  Steel BOLTS, steel bolts; M8 ") == "steel bolts m8"
+    assert normalize_query("---") == ""
+
+
+@pytest.mark.asyncio
+async def test_equivalent_queries_share_one_cache_entry():
+    repo = _Repo()
+    service = HsSearchService(repo, HsSuggestionCache(ttl_seconds=60, max_entries=10))
+
+    first = await service.suggest("Steel bolts", as_of=date(2024, 1, 1))
+    second = await service.suggest("steel, BOLTS", as_of=date(2024, 1, 1))
+
+    assert first == second
+    assert first[0].goods_code == "7318159000" and first[0].score == 0.7123
+    assert repo.queries == ["steel bolts"]
+    assert await service.suggest("  ") == []
+
+
+@pytest.mark.asyncio
+async def test_a_new_snapshot_retires_cached_suggestions():
+    repo = _Repo()
+    service = HsSearchService(repo, HsSuggestionCache(ttl_seconds=60, max_entries=10))
+
+    await service.suggest("steel bolts", as_of=date(2024, 1, 1))
+    repo.snapshot = date(2024, 2, 1)
+    await service.suggest("steel bolts", as_of=date(2024, 1, 1))
+
+    assert repo.queries == ["steel bolts", "steel bolts"]
+
+
+def test_suggest_route_rejects_malformed_as_of():
+    from fastapi.testclient import TestClient
+
+    from app.core.deps import get_read_db_session
+    from app.main import app
+
+    async def no_session():
+        yield None
+
+    app.dependency_overrides[get_read_db_session] = no_session
+    try:
+        response = TestClient(app).get("/api/taric/suggest", params={"q": "bolts", "as_of": "2024-13-01"})
+    finally:
+        app.dependency_overrides.pop(get_read_db_session, None)
+    assert response.status_code == 422
+
+
+def test_cache_evicts_least_recently_used():
+    cache = HsSuggestionCache(ttl_seconds=60, max_entries=2)
+    cache.put(("a",), [])
+    cache.put(("b",), [])
+    cache.get(("a",))
+    cache.put(("c",), [])
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == []
+
+
+@pytest.mark.asyncio
+async def test_search_uses_full_text_and_trigram_predicates():
+    statements = []
+
+    class _Session:
+        async def execute(self, stmt):
+            statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return []
+
+    await TaricRepository(_Session()).search_goods("steel bolts", date(2024, 1, 1), 5)
+    sql = statements[0]
+    assert "goods_description.search_vector @@ plainto_tsquery" in sql
+    assert "<%" in sql and "goods_description.description))" in sql
+    assert "word_similarity" in sql
@@ -0,0 +1,185 @@
+import time
+
+import fakeredis
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.services.providers import http_client
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_network(monkeypatch):
+    async def deny(host):
+        assert host == "upstream.example"
+        return False
+
+    async def no_network(*args, **kwargs):
+        raise AssertionError("open circuit must not reach the network")
+
+    monkeypatch.setattr(http_client.circuit_breaker, "allow", deny)
+    monkeypatch.setattr(httpx.AsyncClient, "get", no_network)
+
+    with pytest.raises(http_client.CircuitOpenError):
+        await http_client.get_json("https://upstream.example/api")
+
+
+@pytest.mark.asyncio
+async def test_retry_stops_when_budget_exhausted(monkeypatch):
+    calls = []
+    recorded = []
+
+    async def allow(host):
+        return True
+
+    async def record(host, success, latency, probe=None):
+        recorded.append(success)
+
+    async def record_request(host):
+        return None
+
+    async def try_retry(host):
+        return False
+
+    async def failing_get(self, url, headers=None, params=None, timeout=None):
+        calls.append(url)
+        raise httpx.ConnectError("boom")
+
+    monkeypatch.setattr(http_client.circuit_breaker, "allow", allow)
+    monkeypatch.setattr(http_client.circuit_breaker, "record", record)
+    monkeypatch.setattr(http_client.retry_budget, "record_request", record_request)
+    monkeypatch.setattr(http_client.retry_budget, "try_retry", try_retry)
+    monkeypatch.setattr(httpx.AsyncClient, "get", failing_get)
+
+    with pytest.raises(httpx.ConnectError):
+        await http_client.get_json("https://upstream.example/api")
+    assert len(calls) == 1
+    assert recorded == [False]
+
+
+@pytest.mark.asyncio
+async def test_spent_deadline_skips_upstream_call(monkeypatch):
+    from app.services.providers.deadline import Deadline, DeadlineExceeded
+
+    async def no_network(*args, **kwargs):
+        raise AssertionError("spent deadline must not reach the network")
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", no_network)
+
+    deadline = Deadline(budget_seconds=0)
+    with pytest.raises(DeadlineExceeded):
+        await http_client.get_json("https://upstream.example/api", deadline=deadline)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(http_client.redis_client, "_client", client)
+    return client
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(http_client.time, "time", lambda: now[0])
+    return now
+
+
+@pytest_asyncio.fixture
+async def breaker(redis):
+    breaker = http_client.CircuitBreaker()
+    # Opened long enough ago to be half-open.
+    await redis.hset("cb:upstream.example", mapping={"state": "open", "opened_at": str(time.time() - breaker.open_seconds - 1)})
+    return breaker, redis
+
+
+@pytest.mark.asyncio
+async def test_only_the_probe_holder_closes_a_half_open_circuit(breaker):
+    breaker, redis = breaker
+    token = await breaker.allow("upstream.example")
+    assert isinstance(token, str)
+    assert await breaker.allow("upstream.example") is False
+
+    # A call that started before the circuit opened finishes meanwhile.
+    await breaker.record("upstream.example", success=True, latency=0.01)
+    assert await breaker.state("upstream.example") == http_client.HALF_OPEN
+    assert await redis.exists("cb:upstream.example:probe")
+
+    await breaker.record("upstream.example", success=True, latency=0.01, probe=token)
+    assert await breaker.state("upstream.example") == http_client.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_is_not_retried(breaker, monkeypatch):
+    breaker, redis = breaker
+    monkeypatch.setattr(http_client, "circuit_breaker", breaker)
+    calls = []
+
+    async def failing_get(self, url, headers=None, params=None, timeout=None):
+        calls.append(url)
+        raise httpx.ConnectError("boom")
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", failing_get)
+    with pytest.raises(httpx.ConnectError):
+        await http_client.get_json("https://upstream.example/api")
+    assert len(calls) == 1
+    assert await breaker.state("upstream.example") == http_client.OPEN
+    assert not await redis.exists("cb:upstream.example:probe")
+
+
+@pytest.mark.asyncio
+async def test_hosts_come_from_the_registry_set(breaker):
+    breaker, redis = breaker
+    await breaker.record("other.example", success=False, latency=0.01)
+    assert await breaker.hosts() == ["other.example"]
+
+
+@pytest.mark.asyncio
+async def test_failures_from_an_expired_window_do_not_trip_the_breaker(redis, clock):
+    breaker = http_client.CircuitBreaker()
+    breaker.window_seconds, breaker.min_calls, breaker.failure_ratio = 60, 5, 0.5
+    clock[0] = 60 * 1000.0
+    for _ in range(97):
+        await breaker.record("upstream.example", success=True, latency=0.01)
+    # Three failures late in the window.
+    clock[0] += 50
+    for _ in range(3):
+        await breaker.record("upstream.example", success=False, latency=0.01)
+
+    clock[0] += 11
+    for _ in range(5):
+        await breaker.record("upstream.example", success=True, latency=0.01)
+    assert await breaker.state("upstream.example") == http_client.CLOSED
+
+    for _ in range(5):
+        await breaker.record("upstream.example", success=False, latency=0.01)
+    assert await breaker.state("upstream.example") == http_client.OPEN
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_neither_retried_nor_counted(monkeypatch):
+    calls = []
+    recorded = []
+
+    async def allow(host):
+        return True
+
+    async def record(host, success, latency, probe=None):
+        recorded.append(success)
+
+    async def not_found(self, url, headers=None, params=None, timeout=None):
+        calls.append(url)
+        return httpx.Response(404, request=httpx.Request("GET", url))
+
+    async def record_request(host):
+        return None
+
+    monkeypatch.setattr(http_client.circuit_breaker, "allow", allow)
+    monkeypatch.setattr(http_client.circuit_breaker, "record", record)
+    monkeypatch.setattr(http_client.retry_budget, "record_request", record_request)
+    monkeypatch.setattr(httpx.AsyncClient, "get", not_found)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await http_client.get_json("https://upstream.example/api/commodities/9999")
+    assert len(calls) == 1
+    assert recorded == [True]
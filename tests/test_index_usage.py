@@ -0,0 +1,119 @@
+"""Checks the hot lookups are planned against their indexes.
+
+Needs a migrated Postgres at ``TEST_DATABASE_URL``; skipped otherwise.
+Sequential scans are disabled for the session so the planner picks the
+index whenever one is usable, even on near-empty tables.
+"""
+import json
+import os
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+HOT_QUERIES = [
+    (
+        "ix_shipments_user_created",
+        "SELECT id FROM shipments WHERE user_id = '00000000-0000-0000-0000-000000000000' "
+        "ORDER BY created_at DESC, id DESC LIMIT 51",
+    ),
+    (
+        "ix_shipment_items_shipment",
+        "SELECT id FROM shipment_items WHERE shipment_id = '00000000-0000-0000-0000-000000000000'",
+    ),
+    (
+        "ix_invoice_items_invoice",
+        "SELECT id FROM invoice_items WHERE invoice_id = '00000000-0000-0000-0000-000000000000'",
+    ),
+    (
+        "ix_rate_snapshots_lookup",
+        "SELECT id FROM rate_snapshots WHERE shipment_id = '00000000-0000-0000-0000-000000000000' AND provider = 'VAT' "
+        "ORDER BY fetched_at DESC LIMIT 1",
+    ),
+    (
+        "ix_rate_snapshots_request_key",
+        "SELECT id FROM rate_snapshots WHERE request_key = '{\"country\": \"DE\"}'::jsonb",
+    ),
+    (
+        "ix_tariff_rate_overrides_lookup",
+        "SELECT duty_rate FROM tariff_rate_overrides WHERE destination_region = 'UK' "
+        "AND commodity_code = '0101210000' AND origin_country = 'CN' AND preference_flag = false",
+    ),
+    (
+        "ix_vat_rates_standard",
+        "SELECT rate FROM vat_rates WHERE country = 'DE' AND rate_type = 'standard' AND hs_prefix IS NULL",
+    ),
+    (
+        "ix_fx_rates_daily_pair_date",
+        "SELECT rate FROM fx_rates_daily WHERE base = 'USD' AND quote = 'EUR' "
+        "AND rate_date <= CURRENT_DATE ORDER BY rate_date DESC LIMIT 1",
+    ),
+    (
+        "ix_goods_description_search",
+        "SELECT goods_code FROM goods_description WHERE search_vector @@ plainto_tsquery('english', 'steel bolts')",
+    ),
+    (
+        "ix_goods_description_trgm",
+        "SELECT goods_code FROM goods_description WHERE 'stel bolt' <% description",
+    ),
+    (
+        "ix_goods_nomenclature_parent",
+        "SELECT goods_code FROM goods_nomenclature WHERE parent_goods_code = '0101000000'",
+    ),
+    (
+        "ix_goods_nomenclature_path",
+        "SELECT goods_code FROM goods_nomenclature "
+        "WHERE path ~>=~ '0100000000.0101000000.' AND path ~<~ '0100000000.0101000000/'",
+    ),
+]
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+@pytest_asyncio.fixture
+async def connection():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    engine = create_async_engine(url)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SET enable_seqscan = off"))
+            yield conn
+    except OSError:
+        pytest.skip("database unreachable")
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("index_name,query", HOT_QUERIES, ids=[name for name, _ in HOT_QUERIES])
+async def test_hot_query_uses_index(connection, index_name, query):
+    result = await connection.execute(text(f"EXPLAIN (FORMAT JSON) {query}"))
+    raw = result.scalar_one()
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    assert index_name in _index_names(plan)
+
+
+@pytest.mark.asyncio
+async def test_subtree_range_uses_the_path_index_with_bound_parameters(connection):
+    # get_subtree binds its bounds; a generic plan must still reach the index.
+    await connection.execute(text("SET plan_cache_mode = force_generic_plan"))
+    await connection.execute(
+        text(
+            "PREPARE subtree_range(text, text) AS SELECT goods_code FROM goods_nomenclature "
+            "WHERE path ~>=~ $1 AND path ~<~ $2"
+        )
+    )
+    result = await connection.execute(
+        text("EXPLAIN (FORMAT JSON) EXECUTE subtree_range('0100000000.0101000000.', '0100000000.0101000000/')")
+    )
+    raw = result.scalar_one()
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    assert "ix_goods_nomenclature_path" in _index_names(plan)
@@ -0,0 +1,103 @@
+import io
+import zipfile
+
+import pytest
+from fastapi import UploadFile
+
+from app.invoices.batch import declared_size, iter_documents
+from app.invoices.storage import store_document
+
+
+def _upload(name: str, data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=name)
+
+
+def _zip(members: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_zip_members_are_stored_individually(tmp_path):
+    archive = _zip({"a.pdf": b"%PDF a", "sub/b.docx": b"docx b", "notes.txt": b"x", "__MACOSX/._a.pdf": b"junk"})
+    files = [_upload("one.pdf", b"%PDF one"), _upload("bundle.zip", archive)]
+
+    stored, errors = [], {}
+    for document in iter_documents(files, max_files=10, max_bytes=1024):
+        if document.error:
+            errors[document.filename] = document.error
+            continue
+        path, _ = await store_document(document.source, document.filename, tmp_path, document.suffix)
+        stored.append((document.filename, path.read_bytes()))
+
+    assert stored == [
+        ("one.pdf", b"%PDF one"),
+        ("bundle.zip/a.pdf", b"%PDF a"),
+        ("bundle.zip/sub/b.docx", b"docx b"),
+    ]
+    assert errors == {"bundle.zip/notes.txt": "Only PDF or DOCX allowed"}
+
+
+def test_bad_files_and_batch_limit_are_reported_per_file():
+    files = [
+        _upload("a.pdf", b"1"),
+        _upload("broken.zip", b"not a zip"),
+        _upload("sheet.xlsx", b""),
+        _upload("big.zip", _zip({"huge.pdf": b"x" * 100})),
+        _upload("b.pdf", b"2"),
+        _upload("c.pdf", b"3"),
+    ]
+    results = [(d.filename, d.error) for d in iter_documents(files, max_files=2, max_bytes=50)]
+    assert results == [
+        ("a.pdf", None),
+        ("broken.zip", "Unreadable ZIP file"),
+        ("sheet.xlsx", "Only PDF, DOCX or ZIP allowed"),
+        ("big.zip/huge.pdf", "Exceeds the 50 byte upload limit"),
+        ("b.pdf", None),
+        ("c.pdf", "Batch limit of 2 files reached"),
+    ]
+
+
+def test_declared_size_counts_uncompressed_zip_members():
+    archive = _zip({"a.pdf": b"x" * 400, "b.docx": b"y" * 300, "notes.txt": b"z" * 1000, "huge.pdf": b"h" * 5000})
+    files = [_upload("one.pdf", b"12345"), _upload("bundle.zip", archive), _upload("broken.zip", b"nope")]
+    assert declared_size(files, max_bytes=1024) == 5 + 400 + 300
+    # The archives stay readable for iter_documents afterwards.
+    assert [d.filename for d in iter_documents(files, max_files=10, max_bytes=1024) if d.error is None] == [
+        "one.pdf",
+        "bundle.zip/a.pdf",
+        "bundle.zip/b.docx",
+    ]
+
+
+def test_batch_expanding_past_the_total_limit_is_rejected(monkeypatch, tmp_path):
+    from types import SimpleNamespace
+    import uuid
+
+    from fastapi.testclient import TestClient
+
+    from app.core.config import get_settings
+    from app.core.deps import get_current_user, get_db_session
+    from app.main import app
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "invoice_batch_max_bytes", 1000)
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+
+    async def no_session():
+        yield None
+
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=uuid.uuid4())
+    app.dependency_overrides[get_db_session] = no_session
+    try:
+        archive = _zip({f"{n}.pdf": b"x" * 400 for n in range(3)})
+        response = TestClient(app).post(
+            "/api/invoices/upload/batch", files=[("files", ("bundle.zip", archive, "application/zip"))]
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,82 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.invoices.conversion import InvoiceConversionError, convert_invoice
+from app.models.enums import Direction, Incoterm
+from app.models.shipment import Shipment
+from app.models.shipment_costs import ShipmentCosts
+
+
+def _line(**values):
+    line = dict(
+        description="Widget",
+        hs_code="8471.30",
+        origin_country="cn",
+        passport_item_id=None,
+        quantity=Decimal("2"),
+        unit_price=Decimal("9.5"),
+        total_price=Decimal("19"),
+        net_weight=Decimal("1.2"),
+    )
+    line.update(values)
+    return SimpleNamespace(**line)
+
+
+def _invoice(items, **values):
+    invoice = dict(
+        id=uuid.uuid4(),
+        invoice_number="INV-7",
+        invoice_date=date(2024, 5, 1),
+        currency="eur",
+        incoterm="FCA",
+        freight=Decimal("120"),
+        insurance=Decimal("15"),
+        shipment_id=None,
+        items=items,
+    )
+    invoice.update(values)
+    return SimpleNamespace(**invoice)
+
+
+@pytest.mark.asyncio
+async def test_invoice_becomes_shipment_with_costs_and_items_in_one_insert(fake_session):
+    invoice = _invoice([_line(), _line(description="Bolt", origin_country="VN"), _line(origin_country=None)])
+
+    conversion = await convert_invoice(fake_session, invoice, uuid.uuid4(), Direction.IMPORT_UK, max_rows=100)
+
+    shipment, costs = fake_session.added
+    assert isinstance(shipment, Shipment) and isinstance(costs, ShipmentCosts)
+    assert (shipment.currency, shipment.incoterm, shipment.origin_country_default) == ("EUR", Incoterm.FCA, "CN")
+    assert shipment.import_date == date(2024, 5, 1)
+    assert (costs.shipment_id, costs.freight_amount, costs.insurance_amount) == (shipment.id, 120, 15)
+    assert fake_session.flushes == 1 and fake_session.commits == 0
+    assert conversion.items.imported == 3
+    assert [row["origin_country"] for row in fake_session.inserted] == ["CN", "VN", "CN"]
+    assert fake_session.inserted[0]["goods_value"] == Decimal("19")
+    assert fake_session.inserted[0]["hs_code"] == "847130"
+    assert invoice.shipment_id == shipment.id
+
+
+@pytest.mark.asyncio
+async def test_invalid_lines_leave_the_invoice_unlinked(fake_session):
+    invoice = _invoice([_line(), _line(quantity=None)])
+
+    conversion = await convert_invoice(fake_session, invoice, uuid.uuid4(), Direction.IMPORT_UK, max_rows=100)
+    assert [error.row for error in conversion.items.errors] == [2]
+    assert fake_session.inserted is None
+    assert invoice.shipment_id is None
+
+
+@pytest.mark.asyncio
+async def test_missing_incoterm_must_be_given(fake_session):
+    invoice = _invoice([_line()], incoterm=None)
+    with pytest.raises(InvoiceConversionError):
+        await convert_invoice(fake_session, invoice, uuid.uuid4(), Direction.IMPORT_UK, max_rows=100)
+    conversion = await convert_invoice(
+        fake_session, invoice, uuid.uuid4(), Direction.IMPORT_UK, max_rows=100, incoterm=Incoterm.DAP
+    )
+    assert conversion.shipment.incoterm == Incoterm.DAP
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from app.core.config import get_settings
+from app.invoices import extractors, openai_extractor, preprocess
+from app.invoices.benchmark import agreement
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    def apply(**env):
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        get_settings.cache_clear()
+
+    yield apply
+    get_settings.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_remote_responses_are_recorded_and_replayed(settings_env, monkeypatch, tmp_path):
+    document = tmp_path / "invoice.pdf"
+    document.write_bytes(b"%PDF scanned")
+    recordings = tmp_path / "recordings"
+    settings_env(INVOICE_RECORDINGS_DIR=str(recordings), INVOICE_EXTRACTORS_PDF="replay,openai")
+    calls = []
+
+    async def remote(path, content):
+        calls.append(path)
+        return {"invoice_number": "INV-9", "items": []}
+
+    monkeypatch.setattr(openai_extractor, "extract_invoice", remote)
+
+    first, first_version = await extractors.extract_invoice(document, "pdf")
+    second, second_version = await extractors.extract_invoice(document, "pdf")
+
+    assert first == second == {"invoice_number": "INV-9", "items": []}
+    assert first_version.startswith("openai:")
+    assert second_version.startswith("replay:")
+    assert len(calls) == 1
+    assert [p.suffix for p in recordings.iterdir()] == [".json"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_hook_only_runs_before_remote_backends(settings_env, monkeypatch, tmp_path):
+    document = tmp_path / "invoice.pdf"
+    document.write_bytes(b"%PDF")
+    recordings = tmp_path / "recordings"
+    recordings.mkdir()
+    (recordings / f"{'ab' * 32}.json").write_text(json.dumps({"invoice_number": "R", "items": []}))
+    settings_env(INVOICE_RECORDINGS_DIR=str(recordings), INVOICE_EXTRACTORS_PDF="replay,openai")
+    waits = []
+
+    async def before_remote():
+        waits.append(1)
+
+    extracted, _ = await extractors.extract_invoice(document, "pdf", "ab" * 32, before_remote=before_remote)
+    assert extracted["invoice_number"] == "R"
+    assert waits == []
+
+
+@pytest.mark.asyncio
+async def test_remote_backend_reuses_the_loaded_document(settings_env, monkeypatch, tmp_path):
+    document = tmp_path / "invoice.pdf"
+    document.write_bytes(b"%PDF scanned")
+    settings_env(INVOICE_EXTRACTORS_PDF="template,openai")
+    loads, received = [], []
+
+    def load_document(path, file_type):
+        loads.append(path)
+        return None
+
+    async def remote(path, content):
+        received.append(content)
+        return {"invoice_number": "INV-3", "items": []}
+
+    monkeypatch.setattr(preprocess, "load_templates", lambda path: ({"_match": []},))
+    monkeypatch.setattr(preprocess, "load_document", load_document)
+    monkeypatch.setattr(openai_extractor, "extract_invoice", remote)
+
+    extracted, _ = await extractors.extract_invoice(document, "pdf")
+    assert extracted["invoice_number"] == "INV-3"
+    assert loads == [document]
+    assert received == [None]
+
+
+def test_backends_must_implement_the_extractor_interface():
+    class Partial(extractors.InvoiceExtractor):
+        name = "partial"
+
+        def version(self):
+            return "partial"
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.mark.asyncio
+async def test_replacing_a_recording_changes_the_replay_version(settings_env, tmp_path):
+    recordings = tmp_path / "recordings"
+    recordings.mkdir()
+    settings_env(INVOICE_RECORDINGS_DIR=str(recordings))
+    document = extractors.ExtractionDocument(path=tmp_path / "invoice.pdf", file_type="pdf", content_hash="ab" * 32)
+    replay = extractors.BACKENDS["replay"]
+
+    extractors.record_response(document, {"invoice_number": "OLD", "items": []})
+    before = replay.version()
+    extractors.record_response(document, {"invoice_number": "NEW, corrected", "items": []})
+
+    assert replay.version() != before
+    assert (await replay.extract(document))["invoice_number"] == "NEW, corrected"
+
+
+def test_unknown_backend_is_rejected(settings_env):
+    settings_env(INVOICE_EXTRACTORS_DOCX="template,nope")
+    with pytest.raises(ValueError):
+        extractors.extractor_chain("docx")
+
+
+def test_agreement_scores_fields_and_items():
+    reference = {"invoice_number": "INV-1", "currency": "EUR", "items": [{"description": "Bolt", "quantity": 2}]}
+    assert agreement(dict(reference), reference) == 1.0
+    partial = {"invoice_number": "INV-1", "currency": "USD", "items": [{"description": "bolt", "quantity": "2.0"}]}
+    assert 0.9 < agreement(partial, reference) < 1.0
@@ -0,0 +1,65 @@
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.invoices.items import ITEM_FIELDS, InvoiceItemError, apply_item_changes
+
+
+def _row(**values):
+    mapping = dict.fromkeys(ITEM_FIELDS)
+    mapping.update(description="Widget", quantity=Decimal("2.0000"), unit_price=Decimal("9.5000"))
+    mapping.update(values)
+    mapping["id"] = mapping.get("id") or uuid.uuid4()
+    return SimpleNamespace(id=mapping["id"], _mapping=mapping)
+
+
+@pytest.mark.asyncio
+async def test_only_edited_lines_are_written(fake_session):
+    rows = [_row() for _ in range(300)]
+    fake_session.rows = rows
+    edit = {"id": rows[5].id, "quantity": Decimal("3")}
+    same = {"id": rows[6].id, "quantity": Decimal("2")}
+
+    changes = await apply_item_changes(fake_session, uuid.uuid4(), uuid.uuid4(), [edit, same])
+
+    assert changes.updated == [rows[5].id]
+    assert changes.created == changes.deleted == []
+    assert fake_session.writes == [("update", [{"id": rows[5].id, "quantity": Decimal("3")}])]
+
+
+@pytest.mark.asyncio
+async def test_partial_patch_inserts_updates_and_deletes_in_one_statement_each(fake_session):
+    rows = [_row(), _row(), _row()]
+    fake_session.rows = rows
+    items = [{"id": rows[0].id, "hs_code": "8471"}, {"description": "New", "quantity": Decimal("1")}]
+
+    changes = await apply_item_changes(fake_session, uuid.uuid4(), uuid.uuid4(), items, [rows[1].id, rows[2].id])
+
+    kinds = [kind for kind, _ in fake_session.writes]
+    assert kinds == ["delete", "update", "insert"]
+    assert changes.deleted == sorted([rows[1].id, rows[2].id])
+    assert len(changes.created) == 1
+    inserted = fake_session.writes[2][1]
+    assert inserted[0]["description"] == "New" and inserted[0]["id"] == changes.created[0]
+
+
+@pytest.mark.asyncio
+async def test_replace_clears_omitted_fields_and_drops_unlisted_lines(fake_session):
+    kept, dropped = _row(hs_code="8471"), _row()
+    fake_session.rows = [kept, dropped]
+    items = [{"id": kept.id, "description": "Widget", "quantity": Decimal("2"), "unit_price": Decimal("9.5")}]
+
+    changes = await apply_item_changes(fake_session, uuid.uuid4(), uuid.uuid4(), items, replace=True)
+
+    assert changes.deleted == [dropped.id]
+    assert fake_session.writes[1] == ("update", [{"id": kept.id, "hs_code": None}])
+
+
+@pytest.mark.asyncio
+async def test_unknown_ids_are_rejected(fake_session):
+    fake_session.rows = [_row()]
+    with pytest.raises(InvoiceItemError):
+        await apply_item_changes(fake_session, uuid.uuid4(), uuid.uuid4(), [{"id": uuid.uuid4(), "quantity": 1}])
+    assert fake_session.writes == []
@@ -0,0 +1,110 @@
+import json
+import re
+
+import pytest
+from docx import Document
+
+from app.invoices import extractors, preprocess
+
+
+def _invoice_docx(path):
+    doc = Document()
+    doc.add_paragraph("ACME Trading GmbH")
+    doc.add_paragraph("Invoice No. INV-2024-17")
+    doc.add_paragraph("Date: 2024-03-05")
+    table = doc.add_table(rows=3, cols=4)
+    rows = [
+        ("Description", "HS Code", "Qty", "Amount"),
+        ("Steel bolts", "731815", "1.000", "1.234,50 €"),
+        ("Total", "", "", "1.234,50 €"),
+    ]
+    for row, values in zip(table.rows, rows):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    doc.save(path)
+    return path
+
+
+def test_docx_tables_are_kept_in_the_compact_text(tmp_path):
+    content = preprocess.load_document(_invoice_docx(tmp_path / "inv.docx"), "docx")
+    text = preprocess.compact_text(content)
+    assert "Invoice No. INV-2024-17" in text
+    assert "Line items:\nDescription\tHS Code\tQty\tAmount\nSteel bolts\t731815\t1.000\t1.234,50 €" in text
+
+
+def test_layout_text_is_split_into_tables():
+    lines = [
+        "Invoice 42",
+        "Description        Qty     Unit price",
+        "Widget              2        9.50",
+        "Bolt                100      0.10",
+        "Thank you",
+    ]
+    text, tables = preprocess._layout_tables(lines)
+    assert text == ["Invoice 42", "Thank you"]
+    assert tables == [[["Description", "Qty", "Unit price"], ["Widget", "2", "9.50"], ["Bolt", "100", "0.10"]]]
+
+
+@pytest.mark.asyncio
+async def test_known_template_is_extracted_without_the_remote_call(tmp_path, monkeypatch):
+    templates = tmp_path / "templates.json"
+    templates.write_text(
+        json.dumps(
+            [
+                {
+                    "name": "acme",
+                    "match": ["ACME Trading GmbH"],
+                    "fields": {"invoice_number": r"Invoice No\.?\s*(\S+)", "invoice_date": r"Date:\s*(\S+)"},
+                    "values": {"supplier_name": "ACME Trading GmbH", "currency": "EUR"},
+                }
+            ]
+        )
+    )
+    monkeypatch.setenv("INVOICE_TEMPLATES_PATH", str(templates))
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    from app.core.config import get_settings
+
+    get_settings.cache_clear()
+    try:
+        extracted, version = await extractors.extract_invoice(_invoice_docx(tmp_path / "inv.docx"), "docx")
+    finally:
+        get_settings.cache_clear()
+
+    assert version.startswith("template:")
+    assert extracted["invoice_number"] == "INV-2024-17"
+    assert extracted["invoice_date"] == "2024-03-05"
+    assert extracted["currency"] == "EUR"
+    assert [(i["description"], i["hs_code"], i["quantity"], i["total_price"]) for i in extracted["items"]] == [
+        ("Steel bolts", "731815", "1000", "1234.50")
+    ]
+
+
+def test_decimal_separator_follows_the_document():
+    assert preprocess.decimal_separator("Qty 1.000\nTotal 1.234,50 €") == ","
+    assert preprocess.decimal_separator("Qty 1,000\nTotal $1,234.50") == "."
+    assert preprocess.decimal_separator("Qty 1.000") is None
+    assert preprocess._number("1.000", ",") == "1000"
+    assert preprocess._number("1.000", ".") == "1.000"
+
+
+def test_template_match_patterns_see_table_text():
+    content = preprocess.DocumentContent(
+        lines=["Invoice No. 9"],
+        tables=[[["Description", "Qty", "Amount"], ["Widget", "2", "9,50"], ["Sold by ACME GmbH", "", ""]]],
+    )
+    templates = (
+        {
+            "match": ["ACME GmbH"],
+            "_match": [re.compile("ACME GmbH")],
+            "_fields": {"invoice_number": re.compile(r"Invoice No\.\s*(\S+)")},
+        },
+    )
+    extracted = preprocess.match_template(content, templates)
+    assert extracted["invoice_number"] == "9"
+    assert [(i["description"], i["total_price"]) for i in extracted["items"]] == [("Widget", "9.50")]
+
+
+def test_unmatched_template_falls_through():
+    content = preprocess.DocumentContent(lines=["Other Supplier Ltd"], tables=[])
+    templates = ({"match": ["ACME"], "_match": [re.compile("ACME")], "_fields": {}},)
+    assert preprocess.match_template(content, templates) is None
@@ -0,0 +1,31 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.invoices.storage import store_upload
+
+
+def _upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="invoice.pdf")
+
+
+@pytest.mark.asyncio
+async def test_identical_uploads_share_one_content_addressed_file(tmp_path):
+    data = b"%PDF-1.7 " + b"x" * 3_000_000
+    first, first_hash = await store_upload(_upload(data), tmp_path, ".pdf")
+    second, second_hash = await store_upload(_upload(data), tmp_path, ".pdf")
+
+    assert first_hash == second_hash == hashlib.sha256(data).hexdigest()
+    assert first == second == tmp_path / f"{first_hash}.pdf"
+    assert first.read_bytes() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == [first.name]
+
+
+@pytest.mark.asyncio
+async def test_different_content_gets_its_own_file(tmp_path):
+    first, _ = await store_upload(_upload(b"one"), tmp_path, ".pdf")
+    second, _ = await store_upload(_upload(b"two"), tmp_path, ".pdf")
+    assert first != second
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,218 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.invoices import extractors
+from app.invoices.worker import ExtractionJob, InvoiceExtractionWorker
+
+
+def _worker(**overrides):
+    options = dict(concurrency=2, max_attempts=3, timeout_seconds=5, retry_seconds=10, poll_seconds=0.01)
+    options.update(overrides)
+    return InvoiceExtractionWorker(**options)
+
+
+def _job(attempt=1):
+    return ExtractionJob(
+        invoice_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        file_path="/tmp/x.pdf",
+        file_type="pdf",
+        content_hash=None,
+        attempt=attempt,
+    )
+
+
+def test_retry_delay_backs_off_exponentially():
+    worker = _worker()
+    assert [worker.retry_delay(n) for n in (1, 2, 3)] == [10, 20, 40]
+
+
+@pytest.mark.asyncio
+async def test_failure_is_rescheduled_until_attempts_run_out(session_local, monkeypatch):
+    async def failing_extract(path, file_type, content_hash=None, before_remote=None):
+        raise RuntimeError("OpenAI error 500")
+
+    monkeypatch.setattr(extractors, "extract_invoice", failing_extract)
+    worker = _worker()
+
+    await worker._process(_job(attempt=1))
+    retry = session_local.statements[-1]
+    assert "extraction_available_at" in str(retry)
+    assert "status" not in retry.params
+
+    await worker._process(_job(attempt=3))
+    final = session_local.statements[-1]
+    assert final.params["status"].value == "FAILED"
+    assert final.params["extraction_error"] == "OpenAI error 500"
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_is_bounded_by_concurrency(monkeypatch):
+    worker = _worker(concurrency=2)
+    pending = [_job() for _ in range(5)]
+    done, running, peak = [], 0, 0
+
+    async def claim():
+        return pending.pop() if pending else None
+
+    async def slow_extract(path, file_type, content_hash=None, before_remote=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return {}, "test"
+
+    async def complete(job, extracted, version):
+        done.append(job)
+
+    monkeypatch.setattr(worker, "_claim", claim)
+    monkeypatch.setattr(worker, "_complete", complete)
+    monkeypatch.setattr(extractors, "extract_invoice", slow_extract)
+
+    await worker.start()
+    for _ in range(100):
+        if len(done) == 5:
+            break
+        await asyncio.sleep(0.01)
+    await worker.stop()
+    assert len(done) == 5
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_extraction_skips_the_remote_call(session_local, monkeypatch):
+    from app.invoices import worker as worker_module
+
+    async def cached(session, user_id, content_hash, versions):
+        assert user_id == job.user_id
+        return {"invoice_number": "INV-1", "items": []}, versions[0]
+
+    async def unexpected_extract(path, file_type, content_hash=None, before_remote=None):
+        raise AssertionError("remote extractor called")
+
+    completed = []
+
+    async def complete(job, extracted, version, outcome="extracted"):
+        completed.append((extracted["invoice_number"], outcome))
+
+    job = ExtractionJob(
+        invoice_id=uuid.uuid4(), user_id=uuid.uuid4(), file_path="/tmp/x.pdf", file_type="pdf", content_hash="ab", attempt=1
+    )
+    monkeypatch.setattr(worker_module, "find_cached_extraction", cached)
+    monkeypatch.setattr(extractors, "extract_invoice", unexpected_extract)
+    worker = _worker()
+    monkeypatch.setattr(worker, "_complete", complete)
+
+    await worker._process(job)
+    assert completed == [("INV-1", "cached")]
+
+
+@pytest.mark.asyncio
+async def test_provider_calls_wait_for_the_rate_limiter(session_local, monkeypatch):
+    answers = [(False, 0.01), (False, 0.01), (True, 0.0)]
+    identities = []
+
+    class _Limiter:
+        policy = SimpleNamespace(window_seconds=60)
+
+        async def hit(self, identity):
+            identities.append(identity)
+            return answers.pop(0)
+
+    calls = []
+
+    async def extract(path, file_type, content_hash=None, before_remote=None):
+        await before_remote()
+        calls.append(len(identities))
+        return {}, "test"
+
+    async def complete(job, extracted, version, outcome="extracted"):
+        pass
+
+    monkeypatch.setattr(extractors, "extract_invoice", extract)
+    worker = _worker(provider_limiter=_Limiter())
+    monkeypatch.setattr(worker, "_complete", complete)
+
+    await worker._process(_job())
+    assert identities == ["openai"] * 3
+    assert calls == [3]
+    # Having queued, the job renews its lease before the provider call.
+    assert len(session_local.statements) == 1
+    assert "extraction_available_at=(now() +" in str(session_local.statements[0])
+    assert "invoices.extraction_attempts = " in str(session_local.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_abandons_the_job_without_recording_a_failure(session_local, monkeypatch):
+    answers = [(False, 0.01), (True, 0.0)]
+
+    class _Limiter:
+        async def hit(self, identity):
+            return answers.pop(0)
+
+    calls = []
+
+    async def extract(path, file_type, content_hash=None, before_remote=None):
+        await before_remote()
+        calls.append(path)
+        return {}, "test"
+
+    monkeypatch.setattr(extractors, "extract_invoice", extract)
+    session_local.rowcount = 0
+    worker = _worker(provider_limiter=_Limiter())
+
+    await worker._process(_job())
+    assert calls == []
+    assert len(session_local.statements) == 1
+    assert "UPDATE invoices SET extraction_available_at" in str(session_local.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_time_queued_for_the_provider_does_not_count_against_the_timeout(session_local, monkeypatch):
+    answers = [(False, 0.15), (True, 0.0)]
+
+    class _Limiter:
+        async def hit(self, identity):
+            return answers.pop(0)
+
+    completed = []
+
+    async def extract(path, file_type, content_hash=None, before_remote=None):
+        await before_remote()
+        await asyncio.sleep(0.15)
+        return {}, "test"
+
+    async def complete(job, extracted, version, outcome="extracted"):
+        completed.append(version)
+
+    monkeypatch.setattr(extractors, "extract_invoice", extract)
+    worker = _worker(timeout_seconds=0.2, provider_limiter=_Limiter())
+    monkeypatch.setattr(worker, "_complete", complete)
+
+    await worker._process(_job())
+    assert completed == ["test"]
+
+
+@pytest.mark.asyncio
+async def test_cached_extraction_lookup_is_scoped_to_the_user(fake_session):
+    from app.invoices.extraction import find_cached_extraction
+
+    user_id = uuid.uuid4()
+    assert await find_cached_extraction(fake_session, user_id, "ab", ["v1"]) is None
+    statement = fake_session.statements[0]
+    assert "invoices.user_id = %(user_id_1)s" in str(statement)
+    assert statement.params["user_id_1"] == user_id
+
+
+@pytest.mark.asyncio
+async def test_cached_extraction_prefers_the_earliest_backend_in_the_chain(fake_session):
+    from app.invoices.extraction import find_cached_extraction
+
+    await find_cached_extraction(fake_session, uuid.uuid4(), "ab", ["template:x:v2", "openai:m:v2"])
+    statement = fake_session.statements[0]
+    assert "ORDER BY CASE invoices.extraction_version WHEN %(param_1)s THEN %(param_2)s" in str(statement)
+    assert [statement.params[f"param_{n}"] for n in range(1, 5)] == ["template:x:v2", 0, "openai:m:v2", 1]
@@ -0,0 +1,137 @@
+import csv
+import io
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import Workbook
+
+from app.services.item_import import ItemImportError, import_items, iter_csv, iter_upload, iter_xlsx
+
+
+def _shipment():
+    return SimpleNamespace(id=uuid.uuid4(), origin_country_default="CN")
+
+
+def test_csv_headers_are_normalised_and_blank_rows_skipped():
+    data = b"\xef\xbb\xbfDescription,Commodity Code,Qty,Price\nWidget,8471.30,2,9.50\n,,,\nBolt,7318,100,0.1\n"
+    rows = list(iter_csv(io.BytesIO(data)))
+    assert rows == [
+        {"description": "Widget", "hs_code": "8471.30", "quantity": "2", "unit_price": "9.50"},
+        {"description": "Bolt", "hs_code": "7318", "quantity": "100", "unit_price": "0.1"},
+    ]
+
+
+def test_xlsx_rows_are_read_in_read_only_mode():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["description", "hs_code", "origin", "quantity", "unit_price"])
+    sheet.append(["Widget", 8471300000, "de", 3, 1.25])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    rows = list(iter_xlsx(buffer))
+    assert rows == [
+        {"description": "Widget", "hs_code": "8471300000", "origin_country": "de", "quantity": "3", "unit_price": "1.25"}
+    ]
+
+
+def test_unsupported_upload_type_is_rejected():
+    with pytest.raises(ItemImportError):
+        iter_upload("items.txt", io.BytesIO(b""))
+
+
+@pytest.mark.asyncio
+async def test_import_inserts_all_rows_in_one_statement_and_resolves_passports_once(fake_session):
+    passport = SimpleNamespace(id=uuid.uuid4(), name="Gizmo", hs_code="8501", weight_per_unit=Decimal("0.5"))
+    fake_session.rows = [passport]
+    rows = [
+        {"description": "Widget", "hs_code": "8471", "quantity": "2", "unit_price": "9.50"},
+        {"passport_item_id": str(passport.id), "quantity": "1", "unit_price": "3"},
+        {"passport_item_id": str(passport.id), "quantity": "4", "unit_price": "3", "origin_country": "vn"},
+    ]
+    result = await import_items(fake_session, _shipment(), uuid.uuid4(), rows, max_rows=100)
+    assert result.errors == []
+    assert result.imported == 3
+    assert fake_session.selects == 1
+    assert fake_session.commits == 1
+    assert [row["description"] for row in fake_session.inserted] == ["Widget", "Gizmo", "Gizmo"]
+    assert [row["origin_country"] for row in fake_session.inserted] == ["CN", "CN", "VN"]
+    assert fake_session.inserted[1]["weight_net_kg"] == Decimal("0.5")
+
+
+@pytest.mark.asyncio
+async def test_invalid_rows_are_reported_and_block_the_import(fake_session):
+    rows = [
+        {"description": "Widget", "hs_code": "8471", "quantity": "2", "unit_price": "9.50"},
+        {"description": "Bad", "hs_code": "8471", "quantity": "-1", "unit_price": "1"},
+        {"quantity": "1", "unit_price": "1"},
+        {"passport_item_id": str(uuid.uuid4()), "quantity": "1", "unit_price": "1"},
+    ]
+    result = await import_items(fake_session, _shipment(), uuid.uuid4(), rows, max_rows=100)
+    assert [error.row for error in result.errors] == [2, 3, 4]
+    assert result.imported == 0
+    assert fake_session.inserted is None
+
+    result = await import_items(fake_session, _shipment(), uuid.uuid4(), rows, max_rows=100, skip_invalid=True)
+    assert result.imported == 1
+    assert len(fake_session.inserted) == 1
+
+
+@pytest.mark.asyncio
+async def test_row_limit_is_enforced(fake_session):
+    rows = [{"description": "x", "hs_code": "1", "quantity": "1", "unit_price": "1"}] * 3
+    with pytest.raises(ItemImportError):
+        await import_items(fake_session, _shipment(), uuid.uuid4(), rows, max_rows=2)
+
+
+def test_numeric_xlsx_hs_codes_keep_leading_zeros():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["description", "hs_code"])
+    sheet.append(["Horse", 101210000])
+    sheet.append(["Padded", 1012100])
+    sheet["B3"].number_format = "0000000000"
+    sheet.append(["Heading", 901])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    assert [row["hs_code"] for row in iter_xlsx(buffer)] == ["0101210000", "0001012100", "0901"]
+
+
+def test_malformed_csv_is_an_import_error():
+    data = b"description,hs_code\n" + b"x" * (csv.field_size_limit() + 1) + b",0101\n"
+    with pytest.raises(ItemImportError):
+        list(iter_csv(io.BytesIO(data)))
+
+
+def test_invalid_rows_return_422_from_the_route(monkeypatch, fake_session):
+    from fastapi.testclient import TestClient
+
+    from app.core.deps import get_current_user, get_db_session
+    from app.main import app
+    from app.routers import shipments
+
+    shipment = _shipment()
+
+    async def get(self, shipment_id, user_id, with_items=True):
+        return shipment
+
+    async def session():
+        yield fake_session
+
+    monkeypatch.setattr(shipments.ShipmentRepository, "get", get)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=uuid.uuid4())
+    app.dependency_overrides[get_db_session] = session
+    try:
+        response = TestClient(app).post(
+            f"/api/shipments/{shipment.id}/items/import",
+            json=[{"description": "Widget", "hs_code": "8471", "quantity": "-1", "unit_price": "1"}],
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
+    body = response.json()
+    assert body["imported"] == 0
+    assert body["errors"][0]["row"] == 1
@@ -0,0 +1,28 @@
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+
+
+def test_items_bucket_boundaries():
+    assert metrics.items_bucket(1) == "1"
+    assert metrics.items_bucket(10) == "2-10"
+    assert metrics.items_bucket(11) == "11-100"
+    assert metrics.items_bucket(1000) == "101-1000"
+    assert metrics.items_bucket(1001) == ">1000"
+
+
+def test_metrics_endpoint_exposes_route_latency_and_provider_sources(monkeypatch):
+    from app.main import app
+    from app.services.providers import http_client
+
+    async def no_redis():
+        return None
+
+    monkeypatch.setattr(http_client.circuit_breaker, "export_state", no_redis)
+    metrics.record_provider_source("uk_tariff", "snapshot")
+    client = TestClient(app)
+    client.get("/")
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/",status="200"}' in body
+    assert 'provider_results_total{provider="uk_tariff",source="snapshot"}' in body
+    assert 'db_pool_size{pool="primary"}' in body
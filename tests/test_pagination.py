@@ -0,0 +1,79 @@
+import json
+import uuid
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    PageParams,
+    check_fields,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    render_page,
+)
+from app.models.passport import PassportItem
+from app.schemas.passport import PassportItemRead
+
+
+def _params(**overrides):
+    values = dict(cursor=None, limit=2, fields=None, created_from=None, created_to=None)
+    values.update(overrides)
+    return PageParams(**values)
+
+
+def _item(n):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        name=f"Item {n}",
+        description=None,
+        hs_code="8471300000",
+        supplier=None,
+        weight_per_unit=None,
+        notes=None,
+        created_at=datetime(2025, 1, n, tzinfo=timezone.utc),
+    )
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    created_at, row_id = datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc), uuid.uuid4()
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_keyset_query_uses_row_comparison_and_fetches_one_extra_row():
+    cursor = encode_cursor(datetime(2025, 3, 1, tzinfo=timezone.utc), uuid.uuid4())
+    params = _params(cursor=cursor, created_from=date(2025, 1, 1))
+    stmt = keyset_page(select(PassportItem).where(PassportItem.user_id == uuid.uuid4()), PassportItem, params, ["hs_code"])
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "(passport_items.created_at, passport_items.id) < (" in sql
+    assert "ORDER BY passport_items.created_at DESC, passport_items.id DESC" in sql
+    assert "passport_items.notes" not in sql
+    assert stmt._limit_clause.value == 3
+
+
+def test_render_page_sets_next_cursor_only_when_more_rows_exist():
+    rows = [_item(3), _item(2), _item(1)]
+    response = render_page(rows, PassportItemRead, _params())
+    assert len(json.loads(response.body)) == 2
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == (rows[1].created_at, rows[1].id)
+
+    last = render_page(rows[:2], PassportItemRead, _params())
+    assert NEXT_CURSOR_HEADER not in last.headers
+
+
+def test_sparse_fields_return_only_requested_keys():
+    params = _params(fields={"id", "hs_code"})
+    check_fields(params, PassportItemRead)
+    body = json.loads(render_page([_item(1)], PassportItemRead, params).body)
+    assert set(body[0]) == {"id", "hs_code"}
+    with pytest.raises(HTTPException):
+        check_fields(_params(fields={"password"}), PassportItemRead)
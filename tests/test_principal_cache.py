@@ -0,0 +1,150 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import deps, principal as principal_module
+from app.core.principal import Principal, PrincipalCache
+from app.core.security import create_access_token, hash_password
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(principal_module.redis_client, "_client", redis)
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_redis_entry_repopulates_local_cache_and_revoke_clears_both(fake_redis):
+    cache = PrincipalCache(local_ttl_seconds=30, redis_ttl_seconds=300)
+    principal = Principal(id=uuid.uuid4(), email="a@example.com")
+    await cache.put("sub", principal)
+
+    cache.drop_local("sub")
+    assert await cache.get("sub") == principal
+    assert cache.get_local("sub") == principal
+
+    await cache.revoke("sub")
+    assert await cache.get("sub") is None
+    assert fake_redis.published == [(principal_module.PRINCIPAL_REVOKED_CHANNEL, "sub")]
+
+
+def test_local_cache_expires_and_evicts_least_recent():
+    cache = PrincipalCache(local_ttl_seconds=30, redis_ttl_seconds=300, max_entries=2)
+    for n in range(3):
+        cache.put_local(str(n), Principal(id=uuid.uuid4(), email=f"{n}@example.com"))
+    assert cache.get_local("0") is None
+    assert cache.get_local("2") is not None
+
+    cache.local_ttl_seconds = -1
+    cache.put_local("3", Principal(id=uuid.uuid4(), email="3@example.com"))
+    assert cache.get_local("3") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_principal_skips_user_lookup(monkeypatch, fake_redis):
+    user_id = uuid.uuid4()
+    cached = Principal(id=user_id, email="c@example.com")
+    cache = PrincipalCache(local_ttl_seconds=30, redis_ttl_seconds=300)
+    cache.put_local(str(user_id), cached)
+    monkeypatch.setattr(deps, "principal_cache", cache)
+
+    def no_database():
+        raise AssertionError("user lookup should be served from cache")
+
+    monkeypatch.setattr(deps.db_session, "SessionLocal", no_database)
+    assert await deps.get_current_user(create_access_token(str(user_id))) is cached
+
+
+class _UserSession:
+    def __init__(self, user):
+        self.user = user
+        self.deleted = []
+
+    async def execute(self, stmt):
+        return SimpleNamespace(scalar_one_or_none=lambda: self.user)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+    async def delete(self, obj):
+        self.deleted.append(obj)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def account(monkeypatch, fake_redis):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.models.user import User
+    from app.repositories import user_repo
+
+    user = User(id=uuid.uuid4(), email="old@example.com", hashed_password=hash_password("secret"))
+    session = _UserSession(user)
+    cache = PrincipalCache(local_ttl_seconds=30, redis_ttl_seconds=300)
+    monkeypatch.setattr(deps, "principal_cache", cache)
+    monkeypatch.setattr(user_repo, "principal_cache", cache)
+
+    async def user_session():
+        yield session
+
+    app.dependency_overrides[deps.get_db_session] = user_session
+    # Principals missing from the cache are loaded through SessionLocal.
+    monkeypatch.setattr(deps.db_session, "SessionLocal", lambda: session)
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token(str(user.id))}"
+    yield SimpleNamespace(client=client, cache=cache, user=user, session=session)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_account_update_revokes_the_cached_principal(account, fake_redis):
+    subject = str(account.user.id)
+    await account.cache.put(subject, Principal(id=account.user.id, email="old@example.com"))
+
+    response = account.client.patch("/api/auth/me", json={"current_password": "secret", "password": "new-secret"})
+    assert response.status_code == 200
+    assert account.cache.get_local(subject) is None
+    assert fake_redis.published == [(principal_module.PRINCIPAL_REVOKED_CHANNEL, subject)]
+
+    response = account.client.patch("/api/auth/me", json={"current_password": "wrong", "password": "x"})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_account_delete_revokes_the_cached_principal(account, fake_redis):
+    subject = str(account.user.id)
+    await account.cache.put(subject, Principal(id=account.user.id, email="old@example.com"))
+
+    response = account.client.request("DELETE", "/api/auth/me", json={"password": "secret"})
+    assert response.status_code == 204
+    assert account.session.deleted == [account.user]
+    assert await account.cache.get(subject) is None
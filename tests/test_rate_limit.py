@@ -0,0 +1,49 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimiter, RateLimitPolicy
+
+
+class FakeRedis:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    async def eval(self, script, numkeys, *args):
+        self.calls.append(args)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_policy_parse():
+    policy = RateLimitPolicy.parse("calculate", "30/120", key="user")
+    assert (policy.limit, policy.window_seconds, policy.key) == (30, 120, "user")
+    assert RateLimitPolicy.parse("auth", "5").window_seconds == 60
+
+
+@pytest.mark.asyncio
+async def test_rejection_sets_retry_after_from_oldest_entry(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rate_limit.redis_client, "_client", redis)
+    monkeypatch.setattr(rate_limit.time, "time", lambda: 1000.0)
+    limiter = RateLimiter(RateLimitPolicy("calculate", limit=2, window_seconds=60, key="user"))
+
+    redis.result = [1, 1, 0]
+    await limiter.check("user:1")
+    assert redis.calls[0][0] == "rl:calculate:user:1"
+
+    redis.result = [0, 2, 1000_000 - 15_000]
+    with pytest.raises(HTTPException) as exc:
+        await limiter.check("user:1")
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "45"
+
+
+@pytest.mark.asyncio
+async def test_limiter_fails_open_without_redis(monkeypatch):
+    monkeypatch.setattr(rate_limit.redis_client, "_client", FakeRedis(error=ConnectionError("down")))
+    limiter = RateLimiter(RateLimitPolicy("auth", limit=1, window_seconds=60))
+    assert await limiter.hit("ip:1.2.3.4") == (True, 0.0)
@@ -0,0 +1,41 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core import deps
+from app.db import session as db_session
+from app.repositories.taric_repo import TaricRepository
+
+
+async def _drain(gen):
+    value = await gen.__anext__()
+    with pytest.raises(StopAsyncIteration):
+        await gen.__anext__()
+    return value
+
+
+@pytest.mark.asyncio
+async def test_read_session_reuses_primary_without_replica(monkeypatch):
+    monkeypatch.setattr(db_session, "ReadSessionLocal", None)
+    primary = object()
+    assert await _drain(deps.get_read_db_session(primary)) is primary
+
+
+@pytest.mark.asyncio
+async def test_read_session_uses_replica_when_configured(monkeypatch):
+    replica = object()
+
+    @asynccontextmanager
+    async def replica_factory():
+        yield replica
+
+    monkeypatch.setattr(db_session, "ReadSessionLocal", replica_factory)
+    assert await _drain(deps.get_read_db_session(object())) is replica
+
+
+def test_taric_repository_reads_from_replica_and_writes_to_primary():
+    primary, replica = object(), object()
+    repo = TaricRepository(primary, replica)
+    assert repo.session is primary
+    assert repo.reader is replica
+    assert TaricRepository(primary).reader is primary
@@ -0,0 +1,49 @@
+import uuid
+
+import pytest
+
+from app.core.pagination import PageParams
+from app.repositories.shipment_repo import ShipmentRepository
+
+
+@pytest.mark.asyncio
+async def test_item_lookup_checks_ownership_in_one_statement(fake_session):
+    repo = ShipmentRepository(fake_session)
+    await repo.get_item(uuid.uuid4(), uuid.uuid4(), uuid.uuid4())
+    assert len(fake_session.statements) == 1
+    sql = str(fake_session.statements[0])
+    assert "JOIN shipments" in sql
+    assert "shipments.user_id" in sql
+
+
+@pytest.mark.asyncio
+async def test_item_delete_is_a_single_owned_delete(fake_session):
+    deleted = await ShipmentRepository(fake_session).delete_item(uuid.uuid4(), uuid.uuid4(), uuid.uuid4())
+    assert deleted
+    assert len(fake_session.statements) == 1
+    assert str(fake_session.statements[0]).startswith("DELETE FROM shipment_items")
+    assert "shipments.user_id" in str(fake_session.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_detail_loads_items_and_costs_in_one_query(fake_session):
+    await ShipmentRepository(fake_session).get(uuid.uuid4(), uuid.uuid4())
+    assert len(fake_session.statements) == 1
+    assert "shipment_items" in str(fake_session.statements[0])
+    assert "shipment_costs" in str(fake_session.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_malformed_ids_are_not_found_without_querying(fake_session):
+    repo = ShipmentRepository(fake_session)
+    assert await repo.get_item("not-a-uuid", uuid.uuid4(), uuid.uuid4()) is None
+    assert await repo.delete_item(uuid.uuid4(), "not-a-uuid", uuid.uuid4()) is False
+    assert fake_session.statements == []
+
+
+@pytest.mark.asyncio
+async def test_hs_code_filter_treats_like_wildcards_literally(fake_session):
+    page = PageParams(cursor=None, limit=10, fields=None, created_from=None, created_to=None)
+    await ShipmentRepository(fake_session).list(uuid.uuid4(), page, hs_code="84_%")
+    assert "ESCAPE '/'" in str(fake_session.statements[0])
+    assert "84/_/%" in fake_session.statements[0].params.values()
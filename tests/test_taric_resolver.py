@@ -3,7 +3,9 @@ from decimal import Decimal
 from types import SimpleNamespace
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
+from app.repositories.taric_repo import TaricRepository
 from app.services.taric_resolver import DutyComponent, ResolvedTaricResult, TaricResolver
 
 
@@ -11,6 +13,7 @@ class FakeTaricRepo:
     def __init__(self):
         self.snapshot_date = date(2025, 1, 1)
         self.goods = {}
+        self.parents = {}
         self.measures = {}
         self.geo_members = set()
         self.duty_expr = {}
@@ -27,6 +30,14 @@ class FakeTaricRepo:
     async def get_goods_candidates(self, codes, as_of):
         return [self.goods[c] for c in codes if c in self.goods]
 
+    async def get_ancestry(self, codes, as_of):
+        code = next((c for c in codes if c in self.goods), None)
+        ancestry = []
+        while code is not None:
+            ancestry.append(self.goods[code])
+            code = self.parents.get(code)
+        return ancestry
+
     async def get_measures(self, goods_codes, as_of):
         results = []
         for code in goods_codes:
@@ -86,3 +97,81 @@ async def test_resolver_geo_membership():
     resolver = TaricResolver(repo)
     result = await resolver.resolve_taric("0101", "CN", date(2025, 1, 2))
     assert result.effective_duty_rate == Decimal("0.1")
+
+
+@pytest.mark.asyncio
+async def test_resolver_inherits_measures_from_real_parents():
+    repo = FakeTaricRepo()
+    for code in ("0101000000", "0101290000", "0101291000"):
+        repo.goods[code] = SimpleNamespace(goods_code=code)
+    # 0101290000 is a grouping line, not a truncation of 0101291000.
+    repo.parents = {"0101291000": "0101290000", "0101290000": "0101000000"}
+    repo.measures["0101290000"] = [
+        SimpleNamespace(measure_uid="m3", goods_code="0101290000", measure_type_code="103", geo_code="ERGA_OMNES", regulation_ref=None)
+    ]
+    repo.duty_expr["m3"] = "11.5%"
+
+    result = await TaricResolver(repo).resolve_taric("0101291000", "CN", date(2025, 1, 2))
+    assert result.matched_goods_code == "0101291000"
+    assert result.effective_duty_rate == Decimal("0.115")
+
+
+@pytest.mark.asyncio
+async def test_resolver_falls_back_to_truncations_for_lines_without_parents():
+    repo = FakeTaricRepo()
+    for code in ("1234", "1234567890"):
+        repo.goods[code] = SimpleNamespace(goods_code=code)
+    repo.measures["1234"] = [
+        SimpleNamespace(measure_uid="m4", goods_code="1234", measure_type_code="103", geo_code="ERGA_OMNES", regulation_ref=None)
+    ]
+    repo.duty_expr["m4"] = "7%"
+
+    result = await TaricResolver(repo).resolve_taric("1234567890", "CN", date(2025, 1, 2))
+    assert result.matched_goods_code == "1234567890"
+    assert result.effective_duty_rate == Decimal("0.07")
+
+
+@pytest.mark.asyncio
+async def test_hierarchy_queries_use_the_materialised_path():
+    statements, params = [], []
+
+    class _Result(list):
+        def scalars(self):
+            return self
+
+        def all(self):
+            return list(self)
+
+    class _Session:
+        async def execute(self, stmt):
+            compiled = stmt.compile(dialect=postgresql.dialect())
+            statements.append(str(compiled))
+            params.append(compiled.params)
+            return _Result()
+
+    repo = TaricRepository(_Session())
+    await repo.get_ancestry(["0101291000", "01012910"], date(2025, 1, 2))
+    await repo.get_subtree("0100000000.01_1000000", date(2025, 1, 2), 10)
+    ancestry, subtree = statements
+    assert "goods_nomenclature.goods_code = ANY (string_to_array((SELECT goods_nomenclature_1.path" in ancestry
+    assert "(goods_nomenclature.path ~>=~ %(path_1)s) AND (goods_nomenclature.path ~<~ %(path_2)s)" in subtree
+    assert (params[1]["path_1"], params[1]["path_2"]) == ("0100000000.01_1000000.", "0100000000.01_1000000/")
+    assert "ORDER BY goods_nomenclature.path" in subtree
+
+
+@pytest.mark.parametrize("view", ["ancestors", "children", "subtree"])
+def test_hierarchy_routes_reject_malformed_as_of(view):
+    from fastapi.testclient import TestClient
+
+    from app.core.deps import get_read_db_session
+    from app.main import app
+
+    async def no_session():
+        yield None
+
+    app.dependency_overrides[get_read_db_session] = no_session
+    try:
+        response = TestClient(app).get(f"/api/taric/goods/0101000000/{view}", params={"as_of": "2025-02-30"})
+    finally:
+        app.dependency_overrides.pop(get_read_db_session, None)
+    assert response.status_code == 422
@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+from app.core import tracing
+
+
+def test_spans_are_noops_outside_a_trace():
+    with tracing.span("calc.fx") as current:
+        assert current is None
+    assert tracing.current_trace() is None
+
+
+def test_nested_spans_record_parent_and_server_timing():
+    trace = tracing.start_trace("req-1", "POST /calculate")
+    with tracing.span("calc.duty", hs_code="8471300000") as outer:
+        with tracing.span("redis.get", tracing.SPAN_KIND_CLIENT, key="k"):
+            pass
+    with tracing.span("redis.get", tracing.SPAN_KIND_CLIENT, key="k2"):
+        pass
+    tracing.finish_trace(trace)
+
+    by_name = {}
+    for s in trace.spans:
+        by_name.setdefault(s.name, []).append(s)
+    assert by_name["calc.duty"][0].parent_id == trace.root.span_id
+    assert by_name["redis.get"][0].parent_id == outer.span_id
+    assert by_name["redis.get"][1].parent_id == trace.root.span_id
+    header = trace.server_timing()
+    assert 'redis.get;dur=' in header and 'desc="2"' in header
+    assert header.endswith(f"total;dur={trace.root.duration_ms:.1f}")
+    assert tracing.current_trace() is None
+
+
+def test_span_cap_counts_dropped_spans():
+    trace = tracing.start_trace("req-2", "GET /")
+    trace.max_spans = 2
+    for _ in range(5):
+        with tracing.span("db"):
+            pass
+    tracing.finish_trace(trace)
+    assert len(trace.spans) == 2
+    assert trace.dropped == 3
+
+
+def test_otlp_payload_shape():
+    trace = tracing.start_trace("req-3", "GET /")
+    with tracing.span("http.get", tracing.SPAN_KIND_CLIENT, host="upstream.example", attempts=2):
+        pass
+    tracing.finish_trace(trace)
+    exporter = tracing.OtlpExporter("http://collector:4318/", "svc", 5)
+    assert exporter.url == "http://collector:4318/v1/traces"
+    spans = exporter.payload([trace])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root, child = spans
+    assert root["traceId"] == child["traceId"] == trace.trace_id
+    assert child["parentSpanId"] == root["spanId"]
+    assert {"key": "attempts", "value": {"intValue": "2"}} in child["attributes"]
+    assert {"key": "request_id", "value": {"stringValue": "req-3"}} in root["attributes"]
+
+
+def test_responses_carry_server_timing_header():
+    from app.main import app
+
+    response = TestClient(app).get("/")
+    assert response.status_code == 200
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert response.headers["X-Request-ID"]
@@ -0,0 +1,28 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.core import uploads
+from app.core.uploads import save_upload
+
+
+@pytest.mark.asyncio
+async def test_upload_is_copied_in_chunks_and_hashed(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "CHUNK_SIZE", 1024)
+    data = bytes(range(256)) * 100
+    saved = await save_upload(UploadFile(file=io.BytesIO(data), filename="a.xlsx"), tmp_path / "out" / "a.xlsx")
+    assert saved.size == len(data)
+    assert saved.sha256 == hashlib.sha256(data).hexdigest()
+    assert saved.path.read_bytes() == data
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_rejected_and_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "CHUNK_SIZE", 1024)
+    dest = tmp_path / "big.pdf"
+    with pytest.raises(HTTPException) as exc:
+        await save_upload(UploadFile(file=io.BytesIO(b"x" * 5000), filename="big.pdf"), dest, max_bytes=4096)
+    assert exc.value.status_code == 413
+    assert not dest.exists()
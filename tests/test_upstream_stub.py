@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from app.services.providers.fx_ecb import FxProvider
+from app.services.providers.uk_tariff import UkTariffProvider
+from app.upstream_stub.server import FaultConfig, SnapshotStore, create_app
+
+
+def test_replays_recorded_payload_and_synthesizes_missing():
+    store = SnapshotStore()
+    store.add(
+        "UK_TARIFF",
+        {"commodity_code": "0101"},
+        {"included": [{"type": "measure", "attributes": {"duty_expression": "12.00 %"}}]},
+    )
+    client = TestClient(create_app(store, FaultConfig()))
+
+    recorded = client.get("/uk/commodities/0101").json()
+    assert UkTariffProvider(None)._extract_ad_valorem(recorded) == Decimal("0.12")
+
+    synthetic = client.get("/ecb/D.USD.GBP.SP00.A", params={"endPeriod": "2024-06-03"}).json()
+    rate, rate_date = FxProvider(None)._extract_rate(synthetic)
+    assert rate is not None
+    assert rate_date == "2024-06-03"
+
+
+def test_error_injection_and_runtime_control():
+    client = TestClient(create_app(SnapshotStore(), FaultConfig(error_rate=1.0)))
+    assert client.get("/vat/vat-rate-check", params={"country_code": "GB"}).status_code == 503
+
+    client.post("/_control", json={"error_rate": 0})
+    assert client.get("/vat/vat-rate-check", params={"country_code": "GB"}).json() == {"standard_rate": 20}
@@ -0,0 +1,31 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.providers.vat import VatTable
+
+
+def _row(country, rate, rate_type="standard", hs_prefix=None):
+    return SimpleNamespace(country=country, rate_type=rate_type, rate=Decimal(rate), hs_prefix=hs_prefix)
+
+
+def test_item_rate_prefers_longest_category_prefix():
+    table = VatTable.from_rows(
+        [
+            _row("GB", "0.2"),
+            _row("GB", "0", rate_type="zero", hs_prefix="49"),
+            _row("GB", "0.05", rate_type="reduced", hs_prefix="4911"),
+        ]
+    )
+    assert table.item_rate("GB", "4901990000").rate == Decimal("0")
+    assert table.item_rate("GB", "4911.10").rate == Decimal("0.05")
+    assert table.item_rate("GB", "8471300000").rate == Decimal("0.2")
+    assert table.item_rate("gb", None).source == "memory"
+    assert table.item_rate("FR", "4901990000") is None
+
+
+def test_table_is_immutable():
+    table = VatTable.from_rows([_row("DE", "0.19")])
+    with pytest.raises(TypeError):
+        table.countries["FR"] = None